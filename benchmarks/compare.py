@@ -0,0 +1,42 @@
+import argparse
+import json
+from pathlib import Path
+
+
+def _load_cases(file_path: Path) -> dict[tuple[int, int], dict[str, float]]:
+    results = json.loads(file_path.read_text('utf-8'))
+    return {(case['glyph_count'], case['font_size']): case['stages'] for case in results['cases']}
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description='Compare the stage timings of two benchmark results.')
+    parser.add_argument('baseline', type=Path)
+    parser.add_argument('current', type=Path)
+    parser.add_argument('--threshold', type=float, default=1.1, help='report stages slower than the baseline by this ratio')
+    options = parser.parse_args(args)
+
+    baseline_cases = _load_cases(options.baseline)
+    current_cases = _load_cases(options.current)
+
+    regression_count = 0
+    for key, current_stages in current_cases.items():
+        baseline_stages = baseline_cases.get(key)
+        if baseline_stages is None:
+            continue
+        glyph_count, font_size = key
+        for stage, seconds in current_stages.items():
+            baseline_seconds = baseline_stages.get(stage)
+            if baseline_seconds is None or baseline_seconds <= 0:
+                continue
+            ratio = seconds / baseline_seconds
+            marker = ' <- slower' if ratio > options.threshold else ''
+            if marker != '':
+                regression_count += 1
+            print(f'{glyph_count:>6} glyphs {font_size:>3}px  {stage:<32} {baseline_seconds:>9.4f}s -> {seconds:>9.4f}s  x{ratio:.2f}{marker}')
+
+    if regression_count > 0:
+        raise SystemExit(f'{regression_count} stages are slower than the baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import platform
+import tempfile
+import time
+from collections.abc import Callable
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from fontTools.fontBuilder import FontBuilder as OpenTypeFontBuilder
+
+from benchmarks import build_dir
+from benchmarks.synthetic import create_builder
+from pixel_font_builder import FontBuilder, FontFormat, opentype
+from pixel_font_builder.opentype.bitmap import create_bitmap_strike_data
+from pixel_font_builder.opentype.feature import build_kern_feature, build_kern_lookup, add_kern_lookup
+from pixel_font_builder.opentype.outline.common import create_normal_xtf_glyphs
+
+DEFAULT_GLYPH_COUNTS = [100, 5000, 30000, 60000]
+DEFAULT_FONT_SIZES = [8, 16, 32]
+
+PAINTERS = {
+    'solid': opentype.SolidOutlinesPainter(),
+    'square_dot': opentype.SquareDotOutlinesPainter(),
+    'circle_dot': opentype.CircleDotOutlinesPainter(),
+}
+
+
+def _get_version(distribution_name: str) -> str | None:
+    try:
+        return metadata.version(distribution_name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def _measure(stages: dict[str, float], stage: str, repeat: int, function: Callable[[], Any]) -> Any:
+    """
+    Run the function `repeat` times, and record the fastest run in seconds.
+    """
+    result = None
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    stages[stage] = min(seconds)
+    return result
+
+
+def _compile_xtf_glyphs(is_ttf: bool, xtf_glyphs: dict):
+    for xtf_glyph in xtf_glyphs.values():
+        if is_ttf:
+            xtf_glyph.compile(None)
+        else:
+            xtf_glyph.compile()
+
+
+def _add_kern_feature(glyph_order: list[str], kerning_values: dict[tuple[str, str], int], px_to_units: int):
+    builder = OpenTypeFontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(glyph_order)
+    builder.addOpenTypeFeatures(build_kern_feature(glyph_order, kerning_values, px_to_units))
+
+
+def _add_kern_lookup(glyph_order: list[str], kerning_values: dict[tuple[str, str], int], px_to_units: int):
+    builder = OpenTypeFontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(glyph_order)
+    add_kern_lookup(builder.font, build_kern_lookup(glyph_order, kerning_values, px_to_units))
+
+
+def _save(builder: FontBuilder, font_format: FontFormat, outputs_dir: Path):
+    getattr(builder, f'save_{font_format.replace(".", "_")}')(outputs_dir.joinpath(f'font.{font_format}'))
+
+
+def run_case(
+        glyph_count: int,
+        font_size: int,
+        painter_names: list[str],
+        font_formats: list[FontFormat],
+        repeat: int,
+) -> dict[str, float]:
+    builder = create_builder(glyph_count, font_size)
+    config = builder.opentype_config
+    stages = {}
+
+    glyph_order, name_to_glyph = _measure(stages, 'prepare_glyphs', repeat, builder.prepare_glyphs)
+
+    for painter_name in painter_names:
+        painter = PAINTERS[painter_name]
+        for is_ttf in (False, True):
+            outline_format = 'ttf' if is_ttf else 'otf'
+            xtf_glyphs, _, _ = _measure(stages, f'outlines.{painter_name}.{outline_format}', repeat, lambda: create_normal_xtf_glyphs(is_ttf, painter, name_to_glyph, config.px_to_units))
+            _measure(stages, f'compile_outlines.{painter_name}.{outline_format}', repeat, lambda: _compile_xtf_glyphs(is_ttf, xtf_glyphs))
+
+    _measure(stages, 'bitmap_strike', repeat, lambda: create_bitmap_strike_data(builder.font_metric, config.has_vertical_metrics, glyph_order, name_to_glyph))
+
+    if len(builder.kerning_values) > 0:
+        _measure(stages, 'features', repeat, lambda: _add_kern_feature(glyph_order, builder.kerning_values, config.px_to_units))
+        _measure(stages, 'features.direct', repeat, lambda: _add_kern_lookup(glyph_order, builder.kerning_values, config.px_to_units))
+
+    with tempfile.TemporaryDirectory() as outputs_dir:
+        for font_format in font_formats:
+            _measure(stages, f'save.{font_format}', repeat, lambda: _save(builder, font_format, Path(outputs_dir)))
+
+    return stages
+
+
+def main(args: list[str] | None = None):
+    parser = argparse.ArgumentParser(description='Measure the stages of building synthetic fonts.')
+    parser.add_argument('--glyph-counts', type=int, nargs='+', default=DEFAULT_GLYPH_COUNTS)
+    parser.add_argument('--font-sizes', type=int, nargs='+', default=DEFAULT_FONT_SIZES)
+    parser.add_argument('--painters', nargs='+', choices=list(PAINTERS), default=list(PAINTERS))
+    parser.add_argument('--font-formats', type=FontFormat, nargs='+', choices=list(FontFormat), default=list(FontFormat))
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', type=Path, default=build_dir.joinpath('benchmarks', 'results.json'))
+    options = parser.parse_args(args)
+
+    results = {
+        'environment': {
+            'pixel_font_builder': _get_version('pixel-font-builder'),
+            'fonttools': _get_version('fonttools'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'cases': [],
+    }
+    for glyph_count in options.glyph_counts:
+        for font_size in options.font_sizes:
+            stages = run_case(glyph_count, font_size, options.painters, options.font_formats, options.repeat)
+            results['cases'].append({
+                'glyph_count': glyph_count,
+                'font_size': font_size,
+                'stages': stages,
+            })
+            print(f'{glyph_count} glyphs, {font_size}px: {sum(stages.values()):.3f}s')
+
+    options.output.parent.mkdir(parents=True, exist_ok=True)
+    options.output.write_text(json.dumps(results, indent=2) + '\n', 'utf-8')
+
+
+if __name__ == '__main__':
+    main()
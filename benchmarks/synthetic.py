@@ -0,0 +1,88 @@
+import random
+from datetime import datetime
+
+from pixel_font_builder import FontBuilder, Glyph
+
+_ASCII_CODE_POINTS = list(range(0x21, 0x7F))
+
+
+def _get_code_points(glyph_count: int) -> list[int]:
+    code_points = _ASCII_CODE_POINTS[:glyph_count]
+    code_point = 0x4E00
+    while len(code_points) < glyph_count:
+        code_points.append(code_point)
+        code_point += 1
+        if code_point == 0xA000:
+            code_point = 0x20000
+    return code_points
+
+
+def _create_bitmap(rnd: random.Random, width: int, height: int) -> list[list[int]]:
+    """
+    Strokes of random length, which have the shapes of pixel glyphs better than noise.
+    """
+    bitmap = [[0] * width for _ in range(height)]
+    for _ in range(max(width, height) // 2 + 1):
+        if rnd.random() < 0.5:
+            y = rnd.randrange(height)
+            x_0 = rnd.randrange(width)
+            x_1 = rnd.randrange(x_0, width)
+            for x in range(x_0, x_1 + 1):
+                bitmap[y][x] = 1
+        else:
+            x = rnd.randrange(width)
+            y_0 = rnd.randrange(height)
+            y_1 = rnd.randrange(y_0, height)
+            for y in range(y_0, y_1 + 1):
+                bitmap[y][x] = 1
+    return bitmap
+
+
+def create_builder(glyph_count: int, font_size: int, seed: int = 0) -> FontBuilder:
+    """
+    Create a font of `glyph_count` glyphs besides '.notdef'.
+    The first glyphs are half width ASCII glyphs, the others are full width CJK glyphs.
+    """
+    rnd = random.Random(seed)
+
+    builder = FontBuilder()
+    builder.font_metric.font_size = font_size
+    builder.font_metric.horizontal_layout.ascent = font_size - font_size // 8
+    builder.font_metric.horizontal_layout.descent = -(font_size // 8)
+    builder.font_metric.vertical_layout.ascent = font_size // 2
+    builder.font_metric.vertical_layout.descent = -(font_size // 2)
+    builder.font_metric.x_height = font_size // 2
+    builder.font_metric.cap_height = font_size * 3 // 4
+
+    builder.meta_info.version = '1.0.0'
+    builder.meta_info.created_time = datetime.fromisoformat('2024-01-01T00:00:00Z')
+    builder.meta_info.modified_time = builder.meta_info.created_time
+    builder.meta_info.family_name = f'Benchmark {glyph_count} {font_size}px'
+
+    builder.glyphs.append(Glyph(
+        name='.notdef',
+        horizontal_offset=(0, builder.font_metric.horizontal_layout.descent),
+        advance_width=font_size // 2,
+        vertical_offset=(-(font_size // 4), 0),
+        advance_height=font_size,
+        bitmap=[[1 if x in (0, font_size // 2 - 1) or y in (0, font_size - 1) else 0 for x in range(font_size // 2)] for y in range(font_size)],
+    ))
+
+    for code_point in _get_code_points(glyph_count):
+        width = font_size // 2 if code_point < 0x80 else font_size
+        glyph_name = f'uni{code_point:04X}'
+        builder.glyphs.append(Glyph(
+            name=glyph_name,
+            horizontal_offset=(0, builder.font_metric.horizontal_layout.descent),
+            advance_width=width,
+            vertical_offset=(-(width // 2), 0),
+            advance_height=font_size,
+            bitmap=_create_bitmap(rnd, width, font_size),
+        ))
+        builder.character_mapping[code_point] = glyph_name
+
+    ascii_glyph_names = [f'uni{code_point:04X}' for code_point in _ASCII_CODE_POINTS[:glyph_count]]
+    for _ in range(min(len(ascii_glyph_names) ** 2 // 8, 1000)):
+        builder.kerning_values[(rnd.choice(ascii_glyph_names), rnd.choice(ascii_glyph_names))] = rnd.choice((-2, -1, 1))
+
+    return builder
@@ -1,4 +1,5 @@
-from pixel_font_builder.builder import FontBuilder, FontCollectionBuilder
-from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.builder import FontFormat, FontBuilder, FontCollectionBuilder
+from pixel_font_builder.glyph import PackedBitmap, Glyph, GlyphBitmapLoader, LazyGlyph
+from pixel_font_builder.instrumentation import StageRecord, Instrumentation
 from pixel_font_builder.meta import WeightName, SerifStyle, SlantStyle, WidthStyle, MetaInfo
 from pixel_font_builder.metric import LineMetric, FontMetric
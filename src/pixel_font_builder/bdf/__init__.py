@@ -1,2 +1,3 @@
-from pixel_font_builder.bdf.common import create_font_builder
+from pixel_font_builder.bdf.common import create_font_builder, dump_font, save_font
 from pixel_font_builder.bdf.config import Config
+from pixel_font_builder.bdf.loader import load_glyphs
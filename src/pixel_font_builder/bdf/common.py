@@ -2,33 +2,76 @@ from __future__ import annotations
 
 import math
 import statistics
+from os import PathLike
+from typing import TextIO
 
 from bdffont import BdfFont, BdfGlyph
+from bdffont.error import BdfDumpError
 
 import pixel_font_builder
 from pixel_font_builder.bdf.config import Config
 from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.instrumentation import Instrumentation, measure_stage
 from pixel_font_builder.meta import WeightName, SlantStyle, WidthStyle
 from pixel_font_builder.metric import FontMetric
 
+_EMPTY_FONT_TRAILER = 'CHARS 0\nENDFONT\n'
+
+
+def _collect_glyphs(context: pixel_font_builder.FontBuilder) -> list[tuple[Glyph, int]]:
+    config = context.bdf_config
+    _, name_to_glyph = context.prepare_glyphs()
+
+    glyphs = [(name_to_glyph['.notdef'], -1)]
+    for code_point, glyph_name in sorted(context.character_mapping.items()):
+        if code_point > 0xFFFF and config.only_basic_plane:
+            break
+        glyphs.append((name_to_glyph[glyph_name], code_point))
+    return glyphs
+
+
+def _calculate_scalable_width(glyph: Glyph, font_metric: FontMetric, config: Config) -> int:
+    return math.ceil((glyph.advance_width / font_metric.font_size) * (75 / config.resolution_x) * 1000)
+
 
 def _create_glyphs(glyph: Glyph, encoding: int, font_metric: FontMetric, config: Config) -> BdfGlyph:
     return BdfGlyph(
         name=glyph.name,
         encoding=encoding,
-        scalable_width=(math.ceil((glyph.advance_width / font_metric.font_size) * (75 / config.resolution_x) * 1000), 0),
+        scalable_width=(_calculate_scalable_width(glyph, font_metric, config), 0),
         device_width=(glyph.advance_width, 0),
         bounding_box=(glyph.width, glyph.height, glyph.horizontal_offset_x, glyph.horizontal_offset_y),
-        bitmap=glyph.bitmap,
+        bitmap=glyph.packed_bitmap.to_bitmap() if glyph.is_packed else glyph.bitmap,
     )
 
 
-def create_font_builder(context: pixel_font_builder.FontBuilder) -> BdfFont:
+def _dump_glyph(stream: TextIO, glyph: Glyph, encoding: int, font_metric: FontMetric, config: Config):
+    name = glyph.name.strip()
+    if '\n' in name or '\r' in name:
+        raise BdfDumpError(f'glyph name cannot be multi-line string: {name!r}')
+
+    lines = [
+        f'STARTCHAR {name}' if name != '' else 'STARTCHAR',
+        f'ENCODING {encoding}',
+        f'SWIDTH {_calculate_scalable_width(glyph, font_metric, config)} 0',
+        f'DWIDTH {glyph.advance_width} 0',
+        f'BBX {glyph.width} {glyph.height} {glyph.horizontal_offset_x} {glyph.horizontal_offset_y}',
+        'BITMAP',
+    ]
+    packed_bitmap = glyph.packed_bitmap
+    row_size = (packed_bitmap.width + 7) // 8
+    shift = row_size * 8 - packed_bitmap.width
+    for row_value in packed_bitmap.row_values():
+        lines.append(f'{row_value << shift:0{row_size * 2}X}' if row_size > 0 else '')
+    lines.append('ENDCHAR')
+    stream.write('\n'.join(lines))
+    stream.write('\n')
+
+
+def _create_font(context: pixel_font_builder.FontBuilder, glyphs: list[tuple[Glyph, int]]) -> BdfFont:
     config = context.bdf_config
     font_metric = context.font_metric
     meta_info = context.meta_info
-    _, name_to_glyph = context.prepare_glyphs()
-    character_mapping = context.character_mapping
 
     font = BdfFont(
         point_size=font_metric.font_size,
@@ -36,12 +79,6 @@ def create_font_builder(context: pixel_font_builder.FontBuilder) -> BdfFont:
         bounding_box=(font_metric.font_size, font_metric.horizontal_layout.line_height, 0, font_metric.horizontal_layout.descent),
     )
 
-    font.glyphs.append(_create_glyphs(name_to_glyph['.notdef'], -1, font_metric, config))
-    for code_point, glyph_name in sorted(character_mapping.items()):
-        if code_point > 0xFFFF and config.only_basic_plane:
-            break
-        font.glyphs.append(_create_glyphs(name_to_glyph[glyph_name], code_point, font_metric, config))
-
     if meta_info.manufacturer is not None:
         font.properties.foundry = meta_info.manufacturer.replace('-', '_')
     font.properties.family_name = meta_info.family_name.replace('-', '_')
@@ -75,7 +112,7 @@ def create_font_builder(context: pixel_font_builder.FontBuilder) -> BdfFont:
             font.properties.spacing = 'C'
         case WidthStyle.PROPORTIONAL:
             font.properties.spacing = 'P'
-    font.properties.average_width = round(statistics.fmean(glyph.device_width_x * 10 for glyph in font.glyphs))
+    font.properties.average_width = round(statistics.fmean(glyph.advance_width * 10 for glyph, _ in glyphs))
     font.properties.charset_registry = 'ISO10646'
     font.properties.charset_encoding = '1'
     font.generate_name_as_xlfd()
@@ -98,3 +135,44 @@ def create_font_builder(context: pixel_font_builder.FontBuilder) -> BdfFont:
         font.properties['LICENSE'] = '<br>'.join(meta_info.license_info.splitlines())
 
     return font
+
+
+def create_font_builder(
+        context: pixel_font_builder.FontBuilder,
+        instrumentation: Instrumentation | None = None,
+) -> BdfFont:
+    with measure_stage(instrumentation, 'bdf.prepare_glyphs'):
+        glyphs = _collect_glyphs(context)
+    font = _create_font(context, glyphs)
+    with measure_stage(instrumentation, 'bdf.glyphs', len(glyphs)):
+        for glyph, encoding in glyphs:
+            font.glyphs.append(_create_glyphs(glyph, encoding, context.font_metric, context.bdf_config))
+    return font
+
+
+def dump_font(
+        context: pixel_font_builder.FontBuilder,
+        stream: TextIO,
+        instrumentation: Instrumentation | None = None,
+):
+    with measure_stage(instrumentation, 'bdf.prepare_glyphs'):
+        glyphs = _collect_glyphs(context)
+    header = _create_font(context, glyphs).dump_to_string()
+    if not header.endswith(_EMPTY_FONT_TRAILER):
+        raise RuntimeError(f'unexpected trailer of the font header: {header[-len(_EMPTY_FONT_TRAILER):]!r}')
+    stream.write(header.removesuffix(_EMPTY_FONT_TRAILER))
+
+    with measure_stage(instrumentation, 'bdf.dump_glyphs', len(glyphs)):
+        stream.write(f'CHARS {len(glyphs)}\n')
+        for glyph, encoding in glyphs:
+            _dump_glyph(stream, glyph, encoding, context.font_metric, context.bdf_config)
+        stream.write('ENDFONT\n')
+
+
+def save_font(
+        context: pixel_font_builder.FontBuilder,
+        file_path: str | PathLike[str],
+        instrumentation: Instrumentation | None = None,
+):
+    with open(file_path, 'w', encoding='utf-8', newline='\n') as file:
+        dump_font(context, file, instrumentation)
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import math
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+
+from bdffont.error import BdfParseError, BdfMissingWordError
+
+from pixel_font_builder.glyph import PackedBitmap, Glyph
+
+_CHUNKS_PER_WORKER = 4
+
+_STARTCHAR_PATTERN = re.compile(r'^[ \t]*STARTCHAR\b[ \t]*', re.MULTILINE)
+_DEFAULT_CHAR_PATTERN = re.compile(r'^[ \t]*DEFAULT_CHAR[ \t]+(-?\d+)', re.MULTILINE)
+
+
+def _parse_bitmap_row(line: str, width: int) -> int:
+    bits_count = len(line) * 4
+    if bits_count == 0:
+        return 0
+    row_value = int(line, 16)
+    if bits_count >= width:
+        return row_value >> (bits_count - width)
+    return row_value << (width - bits_count)
+
+
+def _parse_glyph_segment(segment: str) -> tuple[Glyph, int]:
+    lines = segment.splitlines()
+    name = lines[0].strip()
+    encoding = None
+    device_width = None
+    bounding_box = None
+    bitmap_lines = None
+    for i, line in enumerate(lines[1:], 1):
+        parts = line.split()
+        if len(parts) == 0:
+            continue
+        match parts[0]:
+            case 'ENCODING':
+                encoding = int(parts[1])
+            case 'DWIDTH':
+                device_width = int(parts[1])
+            case 'BBX':
+                bounding_box = [int(part) for part in parts[1:5]]
+            case 'BITMAP':
+                bitmap_lines = lines[i + 1:]
+                break
+            case 'ENDCHAR':
+                bitmap_lines = []
+                break
+    if encoding is None:
+        raise BdfMissingWordError('ENCODING')
+    if device_width is None:
+        raise BdfMissingWordError('DWIDTH')
+    if bounding_box is None:
+        raise BdfMissingWordError('BBX')
+    if bitmap_lines is None:
+        raise BdfMissingWordError('ENDCHAR')
+
+    width, height, offset_x, offset_y = bounding_box
+    row_values = []
+    for line in bitmap_lines:
+        line = line.strip()
+        if line == '':
+            continue
+        if line == 'ENDCHAR':
+            break
+        row_values.append(_parse_bitmap_row(line, width))
+    else:
+        raise BdfMissingWordError('ENDCHAR')
+    # Glyphs without bitmaps are blank.
+    if len(row_values) == 0:
+        row_values = [0] * height
+    if len(row_values) != height:
+        raise BdfParseError(f'bitmap height mismatch: {name!r}')
+
+    glyph = Glyph(
+        name=name,
+        horizontal_offset=(offset_x, offset_y),
+        advance_width=device_width,
+        bitmap=PackedBitmap.from_row_values(width, row_values),
+    )
+    return glyph, encoding
+
+
+def _parse_glyph_segments(segments: list[str]) -> list[tuple[Glyph, int]]:
+    return [_parse_glyph_segment(segment) for segment in segments]
+
+
+def load_glyphs(
+        file_path: str | PathLike[str],
+        max_workers: int | None = 1,
+) -> tuple[list[Glyph], dict[int, str]]:
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f'max workers must be greater than 0: {max_workers}')
+
+    text = Path(file_path).read_text('utf-8')
+    header, *segments = _STARTCHAR_PATTERN.split(text)
+    if not header.lstrip().startswith('STARTFONT'):
+        raise BdfMissingWordError('STARTFONT')
+
+    if max_workers == 1 or len(segments) < 2:
+        results = _parse_glyph_segments(segments)
+    else:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        chunk_size = max(math.ceil(len(segments) / (max_workers * _CHUNKS_PER_WORKER)), 1)
+        chunks = [segments[i:i + chunk_size] for i in range(0, len(segments), chunk_size)]
+        results = []
+        with ProcessPoolExecutor(max_workers) as executor:
+            for chunk_results in executor.map(_parse_glyph_segments, chunks):
+                results.extend(chunk_results)
+
+    glyphs = []
+    character_mapping = {}
+    for glyph, encoding in results:
+        glyphs.append(glyph)
+        if encoding >= 0:
+            character_mapping[encoding] = glyph.name
+
+    if all(glyph.name != '.notdef' for glyph in glyphs):
+        match = _DEFAULT_CHAR_PATTERN.search(header)
+        if match is not None and int(match.group(1)) in character_mapping:
+            default_glyph_name = character_mapping[int(match.group(1))]
+            notdef_glyph = next(glyph for glyph in glyphs if glyph.name == default_glyph_name).copy()
+            notdef_glyph.name = '.notdef'
+            glyphs.insert(0, notdef_glyph)
+
+    return glyphs, character_mapping
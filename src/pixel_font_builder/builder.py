@@ -1,7 +1,11 @@
 from __future__ import annotations
 
 from collections import UserList
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from enum import StrEnum, unique
 from os import PathLike
+from pathlib import Path
 from typing import Any
 
 import bdffont
@@ -9,12 +13,87 @@ import fontTools.fontBuilder
 import fontTools.ttLib
 import pcffont
 
-from pixel_font_builder import opentype, dfont, bdf, pcf
-from pixel_font_builder.glyph import Glyph
+from pixel_font_builder import opentype, dfont, bdf, pcf, loader
+from pixel_font_builder.glyph import PackedBitmap, Glyph, GlyphBitmapLoader, LazyGlyph
+from pixel_font_builder.instrumentation import Instrumentation, measure_stage
 from pixel_font_builder.meta import MetaInfo
 from pixel_font_builder.metric import FontMetric
 
 
+@unique
+class FontFormat(StrEnum):
+    OTF = 'otf'
+    OTF_WOFF = 'otf.woff'
+    OTF_WOFF2 = 'otf.woff2'
+    TTF = 'ttf'
+    TTF_WOFF = 'ttf.woff'
+    TTF_WOFF2 = 'ttf.woff2'
+    MS_BITMAP_TTF = 'ms.bitmap.ttf'
+    OTB = 'otb'
+    DFONT = 'dfont'
+    BDF = 'bdf'
+    PCF = 'pcf'
+
+
+# Formats in the same group share intermediates, so each group is saved by one worker.
+_FONT_FORMAT_GROUPS = [
+    [FontFormat.OTF, FontFormat.OTF_WOFF, FontFormat.OTF_WOFF2],
+    [FontFormat.TTF, FontFormat.TTF_WOFF, FontFormat.TTF_WOFF2],
+    [FontFormat.MS_BITMAP_TTF, FontFormat.OTB, FontFormat.DFONT],
+    [FontFormat.BDF],
+    [FontFormat.PCF],
+]
+
+_OTF_FONT_FORMATS = {FontFormat.OTF, FontFormat.OTF_WOFF, FontFormat.OTF_WOFF2}
+_TTF_FONT_FORMATS = {FontFormat.TTF, FontFormat.TTF_WOFF, FontFormat.TTF_WOFF2}
+
+_FONT_FORMAT_FLAVORS = {
+    FontFormat.OTF_WOFF: opentype.Flavor.WOFF,
+    FontFormat.OTF_WOFF2: opentype.Flavor.WOFF2,
+    FontFormat.TTF_WOFF: opentype.Flavor.WOFF,
+    FontFormat.TTF_WOFF2: opentype.Flavor.WOFF2,
+}
+
+
+def _save_font_format_group(
+        context: FontBuilder,
+        targets: list[tuple[FontFormat, Path]],
+        build_cache: opentype.BuildCache | None = None,
+):
+    if build_cache is None:
+        build_cache = opentype.BuildCache(context)
+
+    # The flavors of a font are compiled once, and compressed from the same sfnt data.
+    for is_ttf, flavored_formats in ((False, _OTF_FONT_FORMATS), (True, _TTF_FONT_FORMATS)):
+        flavored_targets = [(font_format, file_path) for font_format, file_path in targets if font_format in flavored_formats]
+        if len(flavored_targets) == 0:
+            continue
+        font = opentype.create_font_builder(context, is_ttf, build_cache=build_cache, instrumentation=context.instrumentation).font
+        flavor_to_data = opentype.compile_font_flavors(font, [_FONT_FORMAT_FLAVORS.get(font_format) for font_format, _ in flavored_targets], context.instrumentation)
+        for font_format, file_path in flavored_targets:
+            with measure_stage(context.instrumentation, 'save'):
+                file_path.write_bytes(flavor_to_data[_FONT_FORMAT_FLAVORS.get(font_format)])
+
+    for font_format, file_path in targets:
+        match font_format:
+            case FontFormat.MS_BITMAP_TTF:
+                builder = opentype.create_font_builder(context, True, opentype.OutlineTableMode.BLANK_GLYPHS, opentype.BitmapTableMode.STANDARD, build_cache=build_cache, instrumentation=context.instrumentation)
+                with measure_stage(context.instrumentation, 'save'):
+                    builder.save(file_path)
+            case FontFormat.OTB:
+                builder = opentype.create_font_builder(context, True, opentype.OutlineTableMode.ZERO_LENGTH, opentype.BitmapTableMode.STANDARD, build_cache=build_cache, instrumentation=context.instrumentation)
+                with measure_stage(context.instrumentation, 'save'):
+                    builder.save(file_path)
+            case FontFormat.DFONT:
+                builder = dfont.create_font_builder(context, build_cache, context.instrumentation)
+                with measure_stage(context.instrumentation, 'save'):
+                    builder.save(file_path)
+            case FontFormat.BDF:
+                context.save_bdf(file_path)
+            case FontFormat.PCF:
+                context.save_pcf(file_path)
+
+
 class FontBuilder:
     font_metric: FontMetric
     meta_info: MetaInfo
@@ -25,6 +104,7 @@ class FontBuilder:
     dfont_config: dfont.Config
     bdf_config: bdf.Config
     pcf_config: pcf.Config
+    instrumentation: Instrumentation | None
 
     def __init__(self):
         self.font_metric = FontMetric()
@@ -36,6 +116,7 @@ class FontBuilder:
         self.dfont_config = dfont.Config()
         self.bdf_config = bdf.Config()
         self.pcf_config = pcf.Config()
+        self.instrumentation = None
 
     def __copy__(self) -> FontBuilder:
         return self.copy()
@@ -56,6 +137,54 @@ class FontBuilder:
                 self.bdf_config == other.bdf_config and
                 self.pcf_config == other.pcf_config)
 
+    def add_lazy_glyphs(
+            self,
+            index: Iterable[tuple[str, dict[str, Any]]],
+            load_bitmap: Callable[[str], list[list[int]] | PackedBitmap],
+            cache_size: int = 64,
+    ) -> list[LazyGlyph]:
+        bitmap_loader = GlyphBitmapLoader(load_bitmap, cache_size)
+        glyphs = [LazyGlyph(name, bitmap_loader, **metadata) for name, metadata in index]
+        self.glyphs.extend(glyphs)
+        return glyphs
+
+    def add_glyph_files(
+            self,
+            dir_path: str | PathLike[str],
+            max_workers: int | None = 1,
+    ) -> list[Glyph]:
+        glyphs, character_mapping = loader.load_glyph_files(dir_path, self.font_metric, max_workers)
+        self.glyphs.extend(glyphs)
+        self.character_mapping.update(character_mapping)
+        return glyphs
+
+    def add_sprite_sheet_glyphs(
+            self,
+            file_path: str | PathLike[str],
+            cell_dimensions: tuple[int, int],
+            code_points: Iterable[int | None],
+    ) -> list[Glyph]:
+        glyphs, character_mapping = loader.load_sprite_sheet(file_path, cell_dimensions, code_points, self.font_metric)
+        self.glyphs.extend(glyphs)
+        self.character_mapping.update(character_mapping)
+        return glyphs
+
+    def add_bdf_glyphs(
+            self,
+            file_path: str | PathLike[str],
+            max_workers: int | None = 1,
+    ) -> list[Glyph]:
+        glyphs, character_mapping = bdf.load_glyphs(file_path, max_workers)
+        self.glyphs.extend(glyphs)
+        self.character_mapping.update(character_mapping)
+        return glyphs
+
+    def add_pcf_glyphs(self, file_path: str | PathLike[str]) -> list[Glyph]:
+        glyphs, character_mapping = pcf.load_glyphs(file_path)
+        self.glyphs.extend(glyphs)
+        self.character_mapping.update(character_mapping)
+        return glyphs
+
     def prepare_glyphs(self) -> tuple[list[str], dict[str, Glyph]]:
         glyph_order = ['.notdef']
         name_to_glyph = {}
@@ -90,7 +219,7 @@ class FontBuilder:
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
             flavor: opentype.Flavor | None = None,
     ) -> fontTools.fontBuilder.FontBuilder:
-        return opentype.create_font_builder(self, False, outline_table_mode, bitmap_table_mode, flavor)
+        return opentype.create_font_builder(self, False, outline_table_mode, bitmap_table_mode, flavor, instrumentation=self.instrumentation)
 
     def save_otf(
             self,
@@ -99,7 +228,9 @@ class FontBuilder:
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
             flavor: opentype.Flavor | None = None,
     ):
-        self.to_otf_builder(outline_table_mode, bitmap_table_mode, flavor).save(file_path)
+        builder = self.to_otf_builder(outline_table_mode, bitmap_table_mode, flavor)
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_otf_woff_builder(
             self,
@@ -114,7 +245,9 @@ class FontBuilder:
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
     ):
-        self.to_otf_woff_builder(outline_table_mode, bitmap_table_mode).save(file_path)
+        builder = self.to_otf_woff_builder(outline_table_mode, bitmap_table_mode)
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_otf_woff2_builder(
             self,
@@ -129,7 +262,18 @@ class FontBuilder:
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
     ):
-        self.to_otf_woff2_builder(outline_table_mode, bitmap_table_mode).save(file_path)
+        builder = self.to_otf_woff2_builder(outline_table_mode, bitmap_table_mode)
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
+
+    def compile_otf_flavors(
+            self,
+            flavors: Iterable[opentype.Flavor | None] = (None, opentype.Flavor.WOFF, opentype.Flavor.WOFF2),
+            outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
+            bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
+    ) -> dict[opentype.Flavor | None, bytes]:
+        builder = self.to_otf_builder(outline_table_mode, bitmap_table_mode)
+        return opentype.compile_font_flavors(builder.font, flavors, self.instrumentation)
 
     def to_ttf_builder(
             self,
@@ -137,7 +281,7 @@ class FontBuilder:
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
             flavor: opentype.Flavor | None = None,
     ) -> fontTools.fontBuilder.FontBuilder:
-        return opentype.create_font_builder(self, True, outline_table_mode, bitmap_table_mode, flavor)
+        return opentype.create_font_builder(self, True, outline_table_mode, bitmap_table_mode, flavor, instrumentation=self.instrumentation)
 
     def save_ttf(
             self,
@@ -146,7 +290,9 @@ class FontBuilder:
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
             flavor: opentype.Flavor | None = None,
     ):
-        self.to_ttf_builder(outline_table_mode, bitmap_table_mode, flavor).save(file_path)
+        builder = self.to_ttf_builder(outline_table_mode, bitmap_table_mode, flavor)
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_ttf_woff_builder(
             self,
@@ -161,7 +307,9 @@ class FontBuilder:
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
     ):
-        self.to_ttf_woff_builder(outline_table_mode, bitmap_table_mode).save(file_path)
+        builder = self.to_ttf_woff_builder(outline_table_mode, bitmap_table_mode)
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_ttf_woff2_builder(
             self,
@@ -176,37 +324,86 @@ class FontBuilder:
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
     ):
-        self.to_ttf_woff2_builder(outline_table_mode, bitmap_table_mode).save(file_path)
+        builder = self.to_ttf_woff2_builder(outline_table_mode, bitmap_table_mode)
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
+
+    def compile_ttf_flavors(
+            self,
+            flavors: Iterable[opentype.Flavor | None] = (None, opentype.Flavor.WOFF, opentype.Flavor.WOFF2),
+            outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
+            bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
+    ) -> dict[opentype.Flavor | None, bytes]:
+        builder = self.to_ttf_builder(outline_table_mode, bitmap_table_mode)
+        return opentype.compile_font_flavors(builder.font, flavors, self.instrumentation)
 
     def to_ms_bitmap_ttf_builder(self) -> fontTools.fontBuilder.FontBuilder:
         return self.to_ttf_builder(opentype.OutlineTableMode.BLANK_GLYPHS, opentype.BitmapTableMode.STANDARD)
 
     def save_ms_bitmap_ttf(self, file_path: str | PathLike[str]):
-        self.to_ms_bitmap_ttf_builder().save(file_path)
+        builder = self.to_ms_bitmap_ttf_builder()
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_otb_builder(self) -> fontTools.fontBuilder.FontBuilder:
         return self.to_ttf_builder(opentype.OutlineTableMode.ZERO_LENGTH, opentype.BitmapTableMode.STANDARD)
 
     def save_otb(self, file_path: str | PathLike[str]):
-        self.to_otb_builder().save(file_path)
+        builder = self.to_otb_builder()
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_dfont_builder(self) -> dfont.DFontBuilder:
-        return dfont.create_font_builder(self)
+        return dfont.create_font_builder(self, instrumentation=self.instrumentation)
     
     def save_dfont(self, file_path: str | PathLike[str]):
-        self.to_dfont_builder().save(file_path)
+        builder = self.to_dfont_builder()
+        with measure_stage(self.instrumentation, 'save'):
+            builder.save(file_path)
 
     def to_bdf_builder(self) -> bdffont.BdfFont:
-        return bdf.create_font_builder(self)
+        return bdf.create_font_builder(self, self.instrumentation)
 
     def save_bdf(self, file_path: str | PathLike[str]):
-        self.to_bdf_builder().save(file_path)
+        with measure_stage(self.instrumentation, 'save'):
+            bdf.save_font(self, file_path, self.instrumentation)
 
     def to_pcf_builder(self) -> pcffont.PcfFontBuilder:
-        return pcf.create_font_builder(self)
+        return pcf.create_font_builder(self, self.instrumentation)
 
     def save_pcf(self, file_path: str | PathLike[str]):
-        self.to_pcf_builder().save(file_path)
+        with measure_stage(self.instrumentation, 'save'):
+            pcf.save_font(self, file_path, self.instrumentation)
+
+    def save_all(
+            self,
+            font_formats: Iterable[FontFormat],
+            outputs_dir: str | PathLike[str],
+            file_stem: str,
+            max_workers: int | None = 1,
+    ):
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f'max workers must be greater than 0: {max_workers}')
+
+        outputs_dir = Path(outputs_dir)
+        font_formats = {FontFormat(font_format) for font_format in font_formats}
+        groups = []
+        for group_formats in _FONT_FORMAT_GROUPS:
+            targets = [(font_format, outputs_dir.joinpath(f'{file_stem}.{font_format}')) for font_format in group_formats if font_format in font_formats]
+            if len(targets) > 0:
+                groups.append(targets)
+
+        if max_workers == 1 or len(groups) < 2:
+            build_cache = opentype.BuildCache(self)
+            for targets in groups:
+                _save_font_format_group(self, targets, build_cache)
+        else:
+            # Stages in worker processes are not recorded.
+            context = self.copy()
+            context.instrumentation = None
+            with ProcessPoolExecutor(max_workers) as executor:
+                for _ in executor.map(_save_font_format_group, [context] * len(groups), groups):
+                    pass
 
     def copy(self) -> FontBuilder:
         builder = FontBuilder()
@@ -219,6 +416,7 @@ class FontBuilder:
         builder.dfont_config = self.dfont_config
         builder.bdf_config = self.bdf_config
         builder.pcf_config = self.pcf_config
+        builder.instrumentation = self.instrumentation
         return builder
 
     def deepcopy(self) -> FontBuilder:
@@ -232,6 +430,7 @@ class FontBuilder:
         builder.dfont_config = self.dfont_config.deepcopy()
         builder.bdf_config = self.bdf_config.deepcopy()
         builder.pcf_config = self.pcf_config.deepcopy()
+        builder.instrumentation = self.instrumentation
         return builder
 
 
@@ -251,8 +450,10 @@ class FontCollectionBuilder(UserList[FontBuilder]):
             self,
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
+            max_workers: int | None = 1,
+            share_glyphs: bool = False,
     ) -> fontTools.ttLib.TTCollection:
-        return opentype.create_font_collection_builder(self, False, outline_table_mode, bitmap_table_mode)
+        return opentype.create_font_collection_builder(self, False, outline_table_mode, bitmap_table_mode, max_workers, share_glyphs)
 
     def save_otc(
             self,
@@ -260,15 +461,19 @@ class FontCollectionBuilder(UserList[FontBuilder]):
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
             share_tables: bool = True,
+            max_workers: int | None = 1,
+            share_glyphs: bool = False,
     ):
-        self.to_otc_builder(outline_table_mode, bitmap_table_mode).save(file_path, share_tables)
+        self.to_otc_builder(outline_table_mode, bitmap_table_mode, max_workers, share_glyphs).save(file_path, share_tables)
 
     def to_ttc_builder(
             self,
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
+            max_workers: int | None = 1,
+            share_glyphs: bool = False,
     ) -> fontTools.ttLib.TTCollection:
-        return opentype.create_font_collection_builder(self, True, outline_table_mode, bitmap_table_mode)
+        return opentype.create_font_collection_builder(self, True, outline_table_mode, bitmap_table_mode, max_workers, share_glyphs)
 
     def save_ttc(
             self,
@@ -276,8 +481,10 @@ class FontCollectionBuilder(UserList[FontBuilder]):
             outline_table_mode: opentype.OutlineTableMode = opentype.OutlineTableMode.NORMAL,
             bitmap_table_mode: opentype.BitmapTableMode = opentype.BitmapTableMode.NONE,
             share_tables: bool = True,
+            max_workers: int | None = 1,
+            share_glyphs: bool = False,
     ):
-        self.to_ttc_builder(outline_table_mode, bitmap_table_mode).save(file_path, share_tables)
+        self.to_ttc_builder(outline_table_mode, bitmap_table_mode, max_workers, share_glyphs).save(file_path, share_tables)
 
     def copy(self) -> FontCollectionBuilder:
         return FontCollectionBuilder(self)
@@ -3,10 +3,15 @@ from __future__ import annotations
 import pixel_font_builder
 from pixel_font_builder import opentype
 from pixel_font_builder.dfont.builder import DFontBuilder
+from pixel_font_builder.instrumentation import Instrumentation
 
 
-def create_font_builder(context: pixel_font_builder.FontBuilder) -> DFontBuilder:
-    font = opentype.create_font_builder(context, True, opentype.OutlineTableMode.OMIT, opentype.BitmapTableMode.APPLE).font
+def create_font_builder(
+        context: pixel_font_builder.FontBuilder,
+        build_cache: opentype.BuildCache | None = None,
+        instrumentation: Instrumentation | None = None,
+) -> DFontBuilder:
+    font = opentype.create_font_builder(context, True, opentype.OutlineTableMode.OMIT, opentype.BitmapTableMode.APPLE, build_cache=build_cache, instrumentation=instrumentation).font
 
     config = context.dfont_config
     font_metric = context.font_metric
@@ -1,9 +1,162 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from collections.abc import Callable, Iterable
 from typing import Any
 
+_PIXELS_TO_BINARY_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+_BINARY_DIGITS_TO_PIXELS = bytes.maketrans(b'01', b'\x00\x01')
+
+
+def _pack_bitmap_row(bitmap_row: list[int]) -> int:
+    if len(bitmap_row) == 0:
+        return 0
+    return int(bytes(map(bool, bitmap_row)).translate(_PIXELS_TO_BINARY_DIGITS), 2)
+
+
+def _unpack_bitmap_row(row_value: int, width: int) -> list[int]:
+    if width == 0:
+        return []
+    return list(format(row_value, f'0{width}b').encode().translate(_BINARY_DIGITS_TO_PIXELS))
+
+
+def _calculate_ink_paddings(packed_bitmap: PackedBitmap) -> tuple[int, int, int, int]:
+    mask = 0
+    top = None
+    bottom = 0
+    for y, row_value in enumerate(packed_bitmap.row_values()):
+        if row_value != 0:
+            mask |= row_value
+            if top is None:
+                top = y
+            bottom = y
+    width, height = packed_bitmap.dimensions
+    if top is None:
+        return width, height, width, height
+    return width - mask.bit_length(), top, (mask & -mask).bit_length() - 1, height - 1 - bottom
+
+
+class PackedBitmap:
+    # Rows are top to bottom, each row is `stride` bytes, the leftmost pixel is the most significant bit of the first byte.
+
+    @staticmethod
+    def from_bitmap(bitmap: list[list[int]]) -> PackedBitmap:
+        width = len(bitmap[0]) if len(bitmap) > 0 else 0
+        row_values = []
+        for bitmap_row in bitmap:
+            if len(bitmap_row) != width:
+                raise ValueError('bitmap rows must have the same width')
+            row_values.append(_pack_bitmap_row(bitmap_row))
+        return PackedBitmap.from_row_values(width, row_values)
+
+    @staticmethod
+    def from_row_values(width: int, row_values: Iterable[int]) -> PackedBitmap:
+        stride = (width + 7) // 8
+        shift = stride * 8 - width
+        data = bytearray()
+        height = 0
+        for row_value in row_values:
+            if row_value < 0 or row_value >> width != 0:
+                raise ValueError(f'row value out of range: {row_value}')
+            data.extend((row_value << shift).to_bytes(stride, 'big'))
+            height += 1
+        return PackedBitmap(width, height, bytes(data))
+
+    __slots__ = ('width', 'height', 'stride', 'data')
+
+    width: int
+    height: int
+    stride: int
+    data: bytes
+
+    def __init__(
+            self,
+            width: int,
+            height: int,
+            data: bytes,
+            stride: int | None = None,
+    ):
+        if stride is None:
+            stride = (width + 7) // 8
+        if stride * 8 < width:
+            raise ValueError(f'stride too small: {stride}')
+        if len(data) != stride * height:
+            raise ValueError(f'data size mismatch: {len(data)}')
+        self.width = width
+        self.height = height
+        self.stride = stride
+        self.data = bytes(data)
+
+    def __copy__(self) -> PackedBitmap:
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> PackedBitmap:
+        return self.deepcopy()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, PackedBitmap):
+            return NotImplemented
+        if self.stride == other.stride:
+            return (self.width == other.width and
+                    self.height == other.height and
+                    self.data == other.data)
+        return (self.width == other.width and
+                self.height == other.height and
+                self.row_values() == other.row_values())
+
+    def __hash__(self) -> int:
+        return hash((self.width, self.height, tuple(self.row_values())))
+
+    @property
+    def dimensions(self) -> tuple[int, int]:
+        return self.width, self.height
+
+    def row(self, y: int) -> memoryview:
+        return memoryview(self.data)[y * self.stride:(y + 1) * self.stride]
+
+    def rows(self) -> list[memoryview]:
+        view = memoryview(self.data)
+        return [view[i * self.stride:(i + 1) * self.stride] for i in range(self.height)]
+
+    def row_values(self) -> list[int]:
+        if self.stride == 0:
+            return [0] * self.height
+        shift = self.stride * 8 - self.width
+        return [int.from_bytes(self.data[i:i + self.stride], 'big') >> shift for i in range(0, len(self.data), self.stride)]
+
+    def row_value(self, y: int) -> int:
+        if self.stride == 0:
+            return 0
+        shift = self.stride * 8 - self.width
+        return int.from_bytes(self.data[y * self.stride:(y + 1) * self.stride], 'big') >> shift
+
+    def to_bitmap_row(self, y: int) -> list[int]:
+        return _unpack_bitmap_row(self.row_value(y), self.width)
+
+    def to_bitmap(self) -> list[list[int]]:
+        return [_unpack_bitmap_row(row_value, self.width) for row_value in self.row_values()]
+
+    def copy(self) -> PackedBitmap:
+        return self
+
+    def deepcopy(self) -> PackedBitmap:
+        return self.copy()
+
 
 class Glyph:
+    __slots__ = (
+        'name',
+        'horizontal_offset_x',
+        'horizontal_offset_y',
+        'advance_width',
+        'vertical_offset_x',
+        'vertical_offset_y',
+        'advance_height',
+        '_bitmap',
+        '_packed_bitmap',
+        '_ink_paddings',
+    )
+
     name: str
     horizontal_offset_x: int
     horizontal_offset_y: int
@@ -11,7 +164,9 @@ class Glyph:
     vertical_offset_x: int
     vertical_offset_y: int
     advance_height: int
-    bitmap: list[list[int]]
+    _bitmap: list[list[int]] | None
+    _packed_bitmap: PackedBitmap | None
+    _ink_paddings: tuple[int, int, int, int] | None
 
     def __init__(
             self,
@@ -20,14 +175,17 @@ class Glyph:
             advance_width: int = 0,
             vertical_offset: tuple[int, int] = (0, 0),
             advance_height: int = 0,
-            bitmap: list[list[int]] | None = None,
+            bitmap: list[list[int]] | PackedBitmap | None = None,
     ):
         self.name = name
         self.horizontal_offset_x, self.horizontal_offset_y = horizontal_offset
         self.advance_width = advance_width
         self.vertical_offset_x, self.vertical_offset_y = vertical_offset
         self.advance_height = advance_height
-        self.bitmap = bitmap if bitmap is not None else []
+        if isinstance(bitmap, PackedBitmap):
+            self.packed_bitmap = bitmap
+        else:
+            self.bitmap = bitmap if bitmap is not None else []
 
     def __copy__(self) -> Glyph:
         return self.copy()
@@ -38,6 +196,10 @@ class Glyph:
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Glyph):
             return NotImplemented
+        if self._bitmap is not None and other._bitmap is not None:
+            bitmap_equals = self._bitmap == other._bitmap
+        else:
+            bitmap_equals = self.packed_bitmap == other.packed_bitmap
         return (self.name == other.name and
                 self.horizontal_offset_x == other.horizontal_offset_x and
                 self.horizontal_offset_y == other.horizontal_offset_y and
@@ -45,7 +207,7 @@ class Glyph:
                 self.vertical_offset_x == other.vertical_offset_x and
                 self.vertical_offset_y == other.vertical_offset_y and
                 self.advance_height == other.advance_height and
-                self.bitmap == other.bitmap)
+                bitmap_equals)
 
     @property
     def horizontal_offset(self) -> tuple[int, int]:
@@ -63,69 +225,271 @@ class Glyph:
     def vertical_offset(self, value: tuple[int, int]):
         self.vertical_offset_x, self.vertical_offset_y = value
 
+    @property
+    def bitmap(self) -> list[list[int]]:
+        # The lists of a packed glyph are created on first access and become its storage, so changes to the rows are kept.
+        if self._bitmap is None:
+            self._bitmap = self._packed_bitmap.to_bitmap()
+            self._packed_bitmap = None
+            self._ink_paddings = None
+        return self._bitmap
+
+    @bitmap.setter
+    def bitmap(self, value: list[list[int]]):
+        self._bitmap = value
+        self._packed_bitmap = None
+        self._ink_paddings = None
+
+    @property
+    def packed_bitmap(self) -> PackedBitmap:
+        if self._packed_bitmap is not None:
+            return self._packed_bitmap
+        return PackedBitmap.from_bitmap(self._bitmap)
+
+    @packed_bitmap.setter
+    def packed_bitmap(self, value: PackedBitmap):
+        self._packed_bitmap = value
+        self._bitmap = None
+        self._ink_paddings = None
+
+    @property
+    def is_packed(self) -> bool:
+        return self._packed_bitmap is not None
+
     @property
     def width(self) -> int:
-        if len(self.bitmap) > 0:
-            return len(self.bitmap[0])
+        if self._packed_bitmap is not None:
+            return self._packed_bitmap.width
+        if len(self._bitmap) > 0:
+            return len(self._bitmap[0])
         else:
             return 0
 
     @property
     def height(self) -> int:
-        return len(self.bitmap)
+        if self._packed_bitmap is not None:
+            return self._packed_bitmap.height
+        return len(self._bitmap)
 
     @property
     def dimensions(self) -> tuple[int, int]:
         return self.width, self.height
 
+    def pack_bitmap(self):
+        if self._packed_bitmap is None:
+            self.packed_bitmap = PackedBitmap.from_bitmap(self._bitmap)
+
+    def _get_ink_paddings(self) -> tuple[int, int, int, int]:
+        # Lists of pixels may be changed in place, so only paddings of packed bitmaps are cached.
+        if self._packed_bitmap is None:
+            return _calculate_ink_paddings(PackedBitmap.from_bitmap(self._bitmap))
+        if self._ink_paddings is None:
+            self._ink_paddings = _calculate_ink_paddings(self._packed_bitmap)
+        return self._ink_paddings
+
+    @property
+    def ink_bbox(self) -> tuple[int, int, int, int] | None:
+        # The right and bottom edges are exclusive.
+        left_padding, top_padding, right_padding, bottom_padding = self._get_ink_paddings()
+        width, height = self.dimensions
+        if top_padding == height:
+            return None
+        return left_padding, top_padding, width - right_padding, height - bottom_padding
+
     def calculate_bitmap_left_padding(self) -> int:
-        padding = 0
-        for i in range(self.width):
-            if any(bitmap_row[i] != 0 for bitmap_row in self.bitmap):
-                break
-            padding += 1
-        return padding
+        return self._get_ink_paddings()[0]
 
     def calculate_bitmap_right_padding(self) -> int:
-        padding = 0
-        for i in range(self.width):
-            if any(bitmap_row[-1 - i] != 0 for bitmap_row in self.bitmap):
-                break
-            padding += 1
-        return padding
+        return self._get_ink_paddings()[2]
 
     def calculate_bitmap_top_padding(self) -> int:
-        padding = 0
-        for bitmap_row in self.bitmap:
-            if any(pixel != 0 for pixel in bitmap_row):
-                break
-            padding += 1
-        return padding
+        return self._get_ink_paddings()[1]
 
     def calculate_bitmap_bottom_padding(self) -> int:
-        padding = 0
-        for bitmap_row in reversed(self.bitmap):
-            if any(pixel != 0 for pixel in bitmap_row):
-                break
-            padding += 1
-        return padding
+        return self._get_ink_paddings()[3]
 
     def copy(self) -> Glyph:
-        return Glyph(
+        glyph = Glyph(
             self.name,
             self.horizontal_offset,
             self.advance_width,
             self.vertical_offset,
             self.advance_height,
-            self.bitmap,
+            self._bitmap if self._bitmap is not None else self._packed_bitmap,
         )
+        glyph._ink_paddings = self._ink_paddings
+        return glyph
 
     def deepcopy(self) -> Glyph:
-        return Glyph(
+        glyph = Glyph(
             self.name,
             self.horizontal_offset,
             self.advance_width,
             self.vertical_offset,
             self.advance_height,
-            [bitmap_row.copy() for bitmap_row in self.bitmap],
+            [bitmap_row.copy() for bitmap_row in self._bitmap] if self._bitmap is not None else self._packed_bitmap,
         )
+        glyph._ink_paddings = self._ink_paddings
+        return glyph
+
+
+class GlyphBitmapLoader:
+    # The load function must be picklable to be used by worker processes.
+
+    load_function: Callable[[str], list[list[int]] | PackedBitmap]
+    cache_size: int
+    _cache: OrderedDict[str, PackedBitmap]
+
+    def __init__(
+            self,
+            load_function: Callable[[str], list[list[int]] | PackedBitmap],
+            cache_size: int = 64,
+    ):
+        if cache_size < 0:
+            raise ValueError(f'cache size must be greater than or equal to 0: {cache_size}')
+        self.load_function = load_function
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {
+            'load_function': self.load_function,
+            'cache_size': self.cache_size,
+        }
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.load_function = state['load_function']
+        self.cache_size = state['cache_size']
+        self._cache = OrderedDict()
+
+    def load(self, source_name: str) -> PackedBitmap:
+        packed_bitmap = self._cache.get(source_name)
+        if packed_bitmap is not None:
+            self._cache.move_to_end(source_name)
+            return packed_bitmap
+
+        bitmap = self.load_function(source_name)
+        packed_bitmap = bitmap if isinstance(bitmap, PackedBitmap) else PackedBitmap.from_bitmap(bitmap)
+        if self.cache_size > 0:
+            self._cache[source_name] = packed_bitmap
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return packed_bitmap
+
+    def clear(self):
+        self._cache.clear()
+
+
+class LazyGlyph(Glyph):
+    # The bitmap lists are created again on every access, so changes to them are not kept.
+
+    __slots__ = (
+        'source_name',
+        '_loader',
+        '_dimensions',
+    )
+
+    source_name: str
+    _loader: GlyphBitmapLoader | None
+    _dimensions: tuple[int, int] | None
+
+    def __init__(
+            self,
+            name: str,
+            loader: GlyphBitmapLoader,
+            horizontal_offset: tuple[int, int] = (0, 0),
+            advance_width: int = 0,
+            vertical_offset: tuple[int, int] = (0, 0),
+            advance_height: int = 0,
+            dimensions: tuple[int, int] | None = None,
+            source_name: str | None = None,
+    ):
+        super().__init__(name, horizontal_offset, advance_width, vertical_offset, advance_height)
+        self._bitmap = None
+        self.source_name = source_name if source_name is not None else name
+        self._loader = loader
+        self._dimensions = dimensions
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loader is None
+
+    @property
+    def bitmap(self) -> list[list[int]]:
+        if self._loader is not None:
+            return self._loader.load(self.source_name).to_bitmap()
+        return super().bitmap
+
+    @bitmap.setter
+    def bitmap(self, value: list[list[int]]):
+        self._bitmap = value
+        self._packed_bitmap = None
+        self._ink_paddings = None
+        self._loader = None
+        self._dimensions = None
+
+    @property
+    def packed_bitmap(self) -> PackedBitmap:
+        if self._loader is not None:
+            return self._loader.load(self.source_name)
+        return super().packed_bitmap
+
+    @packed_bitmap.setter
+    def packed_bitmap(self, value: PackedBitmap):
+        self._packed_bitmap = value
+        self._bitmap = None
+        self._ink_paddings = None
+        self._loader = None
+        self._dimensions = None
+
+    @property
+    def is_packed(self) -> bool:
+        if self._loader is not None:
+            return True
+        return super().is_packed
+
+    @property
+    def width(self) -> int:
+        if self._loader is not None:
+            if self._dimensions is not None:
+                return self._dimensions[0]
+            return self.packed_bitmap.width
+        return super().width
+
+    @property
+    def height(self) -> int:
+        if self._loader is not None:
+            if self._dimensions is not None:
+                return self._dimensions[1]
+            return self.packed_bitmap.height
+        return super().height
+
+    def pack_bitmap(self):
+        if self._loader is None:
+            super().pack_bitmap()
+
+    def _get_ink_paddings(self) -> tuple[int, int, int, int]:
+        # The source may change, so the paddings are calculated from the loaded bitmap every time.
+        if self._loader is not None:
+            return _calculate_ink_paddings(self.packed_bitmap)
+        return super()._get_ink_paddings()
+
+    def copy(self) -> Glyph:
+        if self._loader is None:
+            return super().copy()
+        glyph = LazyGlyph(
+            self.name,
+            self._loader,
+            self.horizontal_offset,
+            self.advance_width,
+            self.vertical_offset,
+            self.advance_height,
+            self._dimensions,
+            self.source_name,
+        )
+        return glyph
+
+    def deepcopy(self) -> Glyph:
+        if self._loader is None:
+            return super().deepcopy()
+        return self.copy()
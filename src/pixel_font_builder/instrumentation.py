@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager
+
+
+class StageRecord:
+    name: str
+    depth: int
+    seconds: float
+    glyph_count: int | None
+    peak_memory: int | None
+
+    def __init__(
+            self,
+            name: str,
+            depth: int,
+            seconds: float,
+            glyph_count: int | None = None,
+            peak_memory: int | None = None,
+    ):
+        self.name = name
+        self.depth = depth
+        self.seconds = seconds
+        self.glyph_count = glyph_count
+        self.peak_memory = peak_memory
+
+    def __repr__(self) -> str:
+        return f'StageRecord({self.name!r}, depth={self.depth}, seconds={self.seconds:.6f}, glyph_count={self.glyph_count}, peak_memory={self.peak_memory})'
+
+
+class _StageFrame:
+    start_memory: int
+    peak_memory: int
+
+    def __init__(self, start_memory: int):
+        self.start_memory = start_memory
+        self.peak_memory = start_memory
+
+
+class Instrumentation:
+    # Tracing memory with `tracemalloc` slows down the build considerably.
+
+    callback: Callable[[StageRecord], None] | None
+    trace_memory: bool
+    records: list[StageRecord]
+    _frames: list[_StageFrame]
+    _started_tracing: bool
+
+    def __init__(
+            self,
+            callback: Callable[[StageRecord], None] | None = None,
+            trace_memory: bool = False,
+    ):
+        self.callback = callback
+        self.trace_memory = trace_memory
+        self.records = []
+        self._frames = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, glyph_count: int | None = None) -> Iterator[None]:
+        if self.trace_memory:
+            if len(self._frames) == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            current_memory, peak_memory = tracemalloc.get_traced_memory()
+            for frame in self._frames:
+                frame.peak_memory = max(frame.peak_memory, peak_memory)
+            tracemalloc.reset_peak()
+            frame = _StageFrame(current_memory)
+        else:
+            frame = _StageFrame(0)
+
+        depth = len(self._frames)
+        self._frames.append(frame)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._frames.pop()
+
+            peak_memory = None
+            if self.trace_memory:
+                frame.peak_memory = max(frame.peak_memory, tracemalloc.get_traced_memory()[1])
+                peak_memory = frame.peak_memory - frame.start_memory
+                for parent_frame in self._frames:
+                    parent_frame.peak_memory = max(parent_frame.peak_memory, frame.peak_memory)
+                if len(self._frames) == 0 and self._started_tracing:
+                    tracemalloc.stop()
+                    self._started_tracing = False
+
+            record = StageRecord(name, depth, seconds, glyph_count, peak_memory)
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def clear(self):
+        self.records.clear()
+
+
+def measure_stage(instrumentation: Instrumentation | None, name: str, glyph_count: int | None = None) -> ContextManager[None]:
+    if instrumentation is None:
+        return nullcontext()
+    return instrumentation.stage(name, glyph_count)
@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import math
+import os
+import struct
+import zlib
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from os import PathLike
+from pathlib import Path
+
+from pixel_font_builder.glyph import PackedBitmap, Glyph
+from pixel_font_builder.metric import FontMetric
+
+_CHUNKS_PER_WORKER = 4
+
+_GLYPH_FILE_PIXELS_TO_BINARY_DIGITS = bytes.maketrans(b'#.', b'10')
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Channels of each PNG color type: grayscale, RGB, indexed, grayscale with alpha, RGB with alpha.
+_PNG_COLOR_TYPE_CHANNELS = {
+    0: 1,
+    2: 3,
+    3: 1,
+    4: 2,
+    6: 4,
+}
+
+
+def _create_glyph_name(code_point: int) -> str:
+    return '.notdef' if code_point == -1 else f'u{code_point:04X}'
+
+
+def _create_centered_glyph(name: str, packed_bitmap: PackedBitmap, font_metric: FontMetric) -> Glyph:
+    width, height = packed_bitmap.dimensions
+    horizontal_layout = font_metric.horizontal_layout
+    return Glyph(
+        name=name,
+        horizontal_offset=(0, (horizontal_layout.ascent + horizontal_layout.descent - height) // 2),
+        advance_width=width,
+        vertical_offset=(-math.ceil(width / 2), (font_metric.font_size - height) // 2),
+        advance_height=font_metric.font_size,
+        bitmap=packed_bitmap,
+    )
+
+
+def _load_glyph_file(file_path: Path) -> PackedBitmap:
+    width = None
+    row_values = []
+    for line in file_path.read_text('utf-8').splitlines():
+        line = line.strip().replace('##', '#').replace('..', '.')
+        if width is None:
+            width = len(line)
+        elif len(line) != width:
+            raise ValueError(f'glyph file rows must have the same width: {str(file_path)!r}')
+        if width > 0:
+            try:
+                row_values.append(int(line.encode().translate(_GLYPH_FILE_PIXELS_TO_BINARY_DIGITS), 2))
+            except ValueError:
+                raise ValueError(f'illegal pixels in glyph file: {str(file_path)!r}') from None
+        else:
+            row_values.append(0)
+    return PackedBitmap.from_row_values(width or 0, row_values)
+
+
+def _load_glyph_files(file_paths: list[Path]) -> list[PackedBitmap]:
+    return [_load_glyph_file(file_path) for file_path in file_paths]
+
+
+def load_glyph_files(
+        dir_path: str | PathLike[str],
+        font_metric: FontMetric,
+        max_workers: int | None = 1,
+) -> tuple[list[Glyph], dict[int, str]]:
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f'max workers must be greater than 0: {max_workers}')
+
+    glyph_files = []
+    for file_path in Path(dir_path).iterdir():
+        if file_path.suffix != '.txt':
+            continue
+        file_stem = file_path.stem.strip()
+        if file_stem == 'notdef':
+            code_point = -1
+        else:
+            try:
+                code_point = int(file_stem, 16)
+            except ValueError:
+                raise ValueError(f'illegal glyph file name: {file_path.name!r}') from None
+        glyph_files.append((code_point, file_path))
+    glyph_files.sort(key=lambda x: x[0])
+    file_paths = [file_path for _, file_path in glyph_files]
+
+    if max_workers == 1 or len(file_paths) < 2:
+        packed_bitmaps = _load_glyph_files(file_paths)
+    else:
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        chunk_size = max(math.ceil(len(file_paths) / (max_workers * _CHUNKS_PER_WORKER)), 1)
+        chunks = [file_paths[i:i + chunk_size] for i in range(0, len(file_paths), chunk_size)]
+        packed_bitmaps = []
+        with ProcessPoolExecutor(max_workers) as executor:
+            for chunk_packed_bitmaps in executor.map(_load_glyph_files, chunks):
+                packed_bitmaps.extend(chunk_packed_bitmaps)
+
+    glyphs = []
+    character_mapping = {}
+    for (code_point, _), packed_bitmap in zip(glyph_files, packed_bitmaps):
+        glyph_name = _create_glyph_name(code_point)
+        glyphs.append(_create_centered_glyph(glyph_name, packed_bitmap, font_metric))
+        if code_point != -1:
+            character_mapping[code_point] = glyph_name
+    return glyphs, character_mapping
+
+
+def _create_ink_table(max_value: int, ink_below: bool) -> bytes:
+    return bytes(0x31 if (value * 255 < 128 * max_value) == ink_below else 0x30 for value in range(256))
+
+
+def _add_bytes(left: bytes, right: bytes) -> bytes:
+    size = len(left)
+    low_mask = int.from_bytes(b'\x7f' * size, 'big')
+    high_mask = int.from_bytes(b'\x80' * size, 'big')
+    left_value = int.from_bytes(left, 'big')
+    right_value = int.from_bytes(right, 'big')
+    value = ((left_value & low_mask) + (right_value & low_mask)) ^ ((left_value ^ right_value) & high_mask)
+    return value.to_bytes(size, 'big')
+
+
+def _unfilter_png_row(filter_type: int, row: bytes, previous_row: bytes, bpp: int) -> bytes:
+    match filter_type:
+        case 0:
+            return row
+        case 2:
+            return _add_bytes(row, previous_row)
+        case 1:
+            result = bytearray(row)
+            for i in range(bpp, len(result)):
+                result[i] = (result[i] + result[i - bpp]) & 0xFF
+            return bytes(result)
+        case 3:
+            result = bytearray(row)
+            for i in range(len(result)):
+                left = result[i - bpp] if i >= bpp else 0
+                result[i] = (result[i] + ((left + previous_row[i]) >> 1)) & 0xFF
+            return bytes(result)
+        case 4:
+            result = bytearray(row)
+            for i in range(len(result)):
+                left = result[i - bpp] if i >= bpp else 0
+                up = previous_row[i]
+                up_left = previous_row[i - bpp] if i >= bpp else 0
+                p = left + up - up_left
+                pa = abs(p - left)
+                pb = abs(p - up)
+                pc = abs(p - up_left)
+                if pa <= pb and pa <= pc:
+                    predictor = left
+                elif pb <= pc:
+                    predictor = up
+                else:
+                    predictor = up_left
+                result[i] = (result[i] + predictor) & 0xFF
+            return bytes(result)
+        case _:
+            raise ValueError(f'illegal PNG filter type: {filter_type}')
+
+
+def _decode_png(data: bytes) -> tuple[int, int, list[int]]:
+    # A pixel is ink if it is dark and opaque, so the glyphs are drawn in black on a white or transparent background.
+    if not data.startswith(_PNG_SIGNATURE):
+        raise ValueError('not a PNG image')
+
+    header = None
+    palette = b''
+    transparency = None
+    image_data = bytearray()
+    offset = len(_PNG_SIGNATURE)
+    while offset + 8 <= len(data):
+        length, chunk_type = struct.unpack_from('>I4s', data, offset)
+        chunk_data = data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+        match chunk_type:
+            case b'IHDR':
+                header = struct.unpack('>IIBBBBB', chunk_data)
+            case b'PLTE':
+                palette = chunk_data
+            case b'tRNS':
+                transparency = chunk_data
+            case b'IDAT':
+                image_data.extend(chunk_data)
+            case b'IEND':
+                break
+    if header is None:
+        raise ValueError("missing PNG chunk: 'IHDR'")
+    width, height, bit_depth, color_type, _, _, interlace_method = header
+    if color_type not in _PNG_COLOR_TYPE_CHANNELS:
+        raise ValueError(f'illegal PNG color type: {color_type}')
+    if interlace_method != 0:
+        raise ValueError('interlaced PNG images are not supported')
+
+    channels = _PNG_COLOR_TYPE_CHANNELS[color_type]
+    samples_per_row = width * channels
+    row_size = (samples_per_row * bit_depth + 7) // 8
+    bpp = max(channels * bit_depth // 8, 1)
+    max_value = (1 << bit_depth) - 1
+
+    if color_type == 3:
+        # The ink of each palette index, with the alpha of the 'tRNS' chunk.
+        alphas = transparency or b''
+        ink_table = bytearray(b'0' * 256)
+        for index in range(len(palette) // 3):
+            r, g, b = palette[index * 3:index * 3 + 3]
+            alpha = alphas[index] if index < len(alphas) else 255
+            if max(r, g, b) < 128 <= alpha:
+                ink_table[index] = 0x31
+        channel_ink_tables = [bytes(ink_table)]
+    else:
+        # 16-bit samples are compared by their most significant byte.
+        sample_max_value = 255 if bit_depth == 16 else max_value
+        has_alpha = color_type in (4, 6)
+        channel_ink_tables = [_create_ink_table(sample_max_value, True)] * (channels - 1 if has_alpha else channels)
+        if has_alpha:
+            channel_ink_tables.append(_create_ink_table(sample_max_value, False))
+
+    # The gray sample marked transparent by the 'tRNS' chunk.
+    transparent_table = None
+    if color_type == 0 and transparency is not None and bit_depth <= 8:
+        transparent_sample = struct.unpack('>H', transparency[:2])[0]
+        transparent_table = bytes(0x30 if value == transparent_sample else 0x31 for value in range(256))
+
+    # Bytes of sub-byte depths expanded to one sample per byte.
+    expand_table = None
+    if bit_depth < 8:
+        samples_per_byte = 8 // bit_depth
+        expand_table = [bytes((value >> (8 - bit_depth * (i + 1))) & max_value for i in range(samples_per_byte)) for value in range(256)]
+
+    raw_data = zlib.decompress(image_data)
+    if len(raw_data) < (row_size + 1) * height:
+        raise ValueError('PNG image data too short')
+
+    row_values = []
+    previous_row = bytes(row_size)
+    for y in range(height):
+        start = y * (row_size + 1)
+        row = _unfilter_png_row(raw_data[start], raw_data[start + 1:start + 1 + row_size], previous_row, bpp)
+        previous_row = row
+
+        if bit_depth == 16:
+            samples = row[0::2]
+        elif expand_table is not None:
+            samples = b''.join([expand_table[value] for value in row])[:samples_per_row]
+        else:
+            samples = row
+        if width == 0:
+            row_values.append(0)
+            continue
+
+        row_value = -1
+        for channel, ink_table in enumerate(channel_ink_tables):
+            row_value &= int(samples[channel::channels].translate(ink_table), 2)
+        if transparent_table is not None:
+            row_value &= int(samples.translate(transparent_table), 2)
+        row_values.append(row_value)
+    return width, height, row_values
+
+
+def load_sprite_sheet(
+        file_path: str | PathLike[str],
+        cell_dimensions: tuple[int, int],
+        code_points: Iterable[int | None],
+        font_metric: FontMetric,
+) -> tuple[list[Glyph], dict[int, str]]:
+    cell_width, cell_height = cell_dimensions
+    if cell_width < 1 or cell_height < 1:
+        raise ValueError(f'cell dimensions must be greater than 0: {cell_dimensions}')
+
+    width, height, row_values = _decode_png(Path(file_path).read_bytes())
+    columns_count = width // cell_width
+    cells_count = columns_count * (height // cell_height)
+    cell_mask = (1 << cell_width) - 1
+
+    glyphs = []
+    character_mapping = {}
+    for index, code_point in enumerate(code_points):
+        if index >= cells_count:
+            raise ValueError(f'too many code points for {cells_count} cells')
+        if code_point is None:
+            continue
+
+        row, column = divmod(index, columns_count)
+        shift = width - (column + 1) * cell_width
+        cell_row_values = [row_value >> shift & cell_mask for row_value in row_values[row * cell_height:(row + 1) * cell_height]]
+        glyph_name = _create_glyph_name(code_point)
+        glyphs.append(_create_centered_glyph(glyph_name, PackedBitmap.from_row_values(cell_width, cell_row_values), font_metric))
+        if code_point != -1:
+            character_mapping[code_point] = glyph_name
+    return glyphs, character_mapping
@@ -1,6 +1,10 @@
-from pixel_font_builder.opentype.common import OutlineTableMode, BitmapTableMode, Flavor, create_font_builder, create_font_collection_builder
+from pixel_font_builder.opentype.common import OutlineTableMode, BitmapTableMode, Flavor, create_font_builder, compile_font_flavors, create_font_collection_builder
+from pixel_font_builder.opentype.cache import BuildCache
 from pixel_font_builder.opentype.config import FieldsOverride, Config
-from pixel_font_builder.opentype.feature import FeatureFile
+from pixel_font_builder.opentype.feature import KerningMode, FeatureFile
+from pixel_font_builder.opentype.feature_cache import FeaturesCache
+from pixel_font_builder.opentype.outline.cache import OutlinesCache
+from pixel_font_builder.opentype.session import BuildSession
 from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter
 from pixel_font_builder.opentype.outline.painter.circle_dot import CircleDotOutlinesPainter
 from pixel_font_builder.opentype.outline.painter.solid import SolidOutlinesPainter
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import math
+
+from fontTools.misc.arrayTools import intRect, unionRect
+from fontTools.misc.roundTools import otRound
+from fontTools.ttLib import TTFont
+from fontTools.ttLib.tables._g_l_y_f import table__g_l_y_f
+
+from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter, get_optional_method
+
+GlyphBounds = tuple[float, float, float, float]
+
+_MAXP_FIELDS = ['numGlyphs', 'maxPoints', 'maxContours', 'maxCompositePoints', 'maxCompositeContours', 'maxComponentElements', 'maxComponentDepth']
+_HEAD_FIELDS = ['xMin', 'yMin', 'xMax', 'yMax', 'flags']
+_HHEA_FIELDS = ['advanceWidthMax', 'minLeftSideBearing', 'minRightSideBearing', 'xMaxExtent']
+_VHEA_FIELDS = ['advanceHeightMax', 'minTopSideBearing', 'minBottomSideBearing', 'yMaxExtent']
+
+
+def _calculate_ttf_glyph_bounds(font: TTFont, glyph_order: list[str]) -> dict[str, GlyphBounds]:
+    # The bounds of glyphs are calculated when the glyf table is set up.
+    tb_glyf = font['glyf']
+    glyph_bounds = {}
+    for glyph_name in glyph_order:
+        xtf_glyph = tb_glyf[glyph_name]
+        if xtf_glyph.numberOfContours != 0:
+            glyph_bounds[glyph_name] = xtf_glyph.xMin, xtf_glyph.yMin, xtf_glyph.xMax, xtf_glyph.yMax
+    return glyph_bounds
+
+
+def _calculate_otf_glyph_bounds(
+        font: TTFont,
+        glyph_order: list[str],
+        name_to_glyph: dict[str, Glyph],
+        outlines_painter: OutlinesPainter | None,
+        px_to_units: int,
+) -> dict[str, GlyphBounds]:
+    glyph_bounds = {}
+    # The bounds before coordinates are rounded, where curves do not go beyond their on-curve points.
+    calculate_bounds = get_optional_method(outlines_painter, 'calculate_bounds') if outlines_painter is not None else None
+    if calculate_bounds is not None:
+        try:
+            for glyph_name in glyph_order:
+                bounds = calculate_bounds(name_to_glyph[glyph_name], px_to_units)
+                if bounds is not None:
+                    # Points of charstrings are rounded in the same way.
+                    glyph_bounds[glyph_name] = otRound(bounds[0]), otRound(bounds[1]), otRound(bounds[2]), otRound(bounds[3])
+            return glyph_bounds
+        except NotImplementedError:
+            glyph_bounds.clear()
+
+    char_strings = font['CFF '].cff.topDictIndex[0].CharStrings
+    for glyph_name in glyph_order:
+        bounds = char_strings[glyph_name].calcBounds(char_strings)
+        if bounds is not None:
+            glyph_bounds[glyph_name] = bounds
+    return glyph_bounds
+
+
+def _calculate_maxp_values(tb_glyf: table__g_l_y_f, glyph_name: str, values: dict[str, tuple[int, int, int]]) -> tuple[int, int, int]:
+    if glyph_name not in values:
+        xtf_glyph = tb_glyf[glyph_name]
+        if xtf_glyph.isComposite():
+            points_count = 0
+            contours_count = 0
+            max_depth = 0
+            for component in xtf_glyph.components:
+                component_points_count, component_contours_count, depth = _calculate_maxp_values(tb_glyf, component.glyphName, values)
+                points_count += component_points_count
+                contours_count += component_contours_count
+                max_depth = max(max_depth, depth + 1)
+            values[glyph_name] = points_count, contours_count, max_depth
+        elif xtf_glyph.numberOfContours > 0:
+            values[glyph_name] = len(xtf_glyph.coordinates), len(xtf_glyph.endPtsOfContours), 0
+        else:
+            values[glyph_name] = 0, 0, 0
+    return values[glyph_name]
+
+
+def _apply_maxp_values(font: TTFont, glyph_order: list[str]):
+    tb_glyf = font['glyf']
+    tb_maxp = font['maxp']
+    tb_maxp.numGlyphs = len(tb_glyf)
+    tb_maxp.maxPoints = 0
+    tb_maxp.maxContours = 0
+    tb_maxp.maxCompositePoints = 0
+    tb_maxp.maxCompositeContours = 0
+    tb_maxp.maxComponentElements = 0
+    tb_maxp.maxComponentDepth = 0
+    values = {}
+    for glyph_name in glyph_order:
+        xtf_glyph = tb_glyf[glyph_name]
+        if xtf_glyph.numberOfContours > 0:
+            points_count, contours_count, _ = _calculate_maxp_values(tb_glyf, glyph_name, values)
+            tb_maxp.maxPoints = max(tb_maxp.maxPoints, points_count)
+            tb_maxp.maxContours = max(tb_maxp.maxContours, contours_count)
+        elif xtf_glyph.isComposite():
+            points_count, contours_count, depth = _calculate_maxp_values(tb_glyf, glyph_name, values)
+            tb_maxp.maxCompositePoints = max(tb_maxp.maxCompositePoints, points_count)
+            tb_maxp.maxCompositeContours = max(tb_maxp.maxCompositeContours, contours_count)
+            tb_maxp.maxComponentElements = max(tb_maxp.maxComponentElements, len(xtf_glyph.components))
+            tb_maxp.maxComponentDepth = max(tb_maxp.maxComponentDepth, depth)
+
+
+def _calculate_side_bearings(
+        metrics: dict[str, tuple[int, int]],
+        glyph_bounds: dict[str, GlyphBounds],
+        start: int,
+) -> tuple[int, int, int, int]:
+    advance_max = max(advance for advance, _ in metrics.values())
+    if len(glyph_bounds) == 0:
+        return advance_max, 0, 0, 0
+
+    min_side_bearing = math.inf
+    min_other_side_bearing = math.inf
+    max_extent = -math.inf
+    for glyph_name, bounds in glyph_bounds.items():
+        advance, side_bearing = metrics[glyph_name]
+        size = math.ceil(bounds[start + 2]) - math.floor(bounds[start])
+        min_side_bearing = min(min_side_bearing, side_bearing)
+        min_other_side_bearing = min(min_other_side_bearing, advance - side_bearing - size)
+        max_extent = max(max_extent, side_bearing + size)
+    return advance_max, min_side_bearing, min_other_side_bearing, max_extent
+
+
+def apply_aggregate_metrics(
+        font: TTFont,
+        is_ttf: bool,
+        glyph_order: list[str],
+        name_to_glyph: dict[str, Glyph],
+        outlines_painter: OutlinesPainter | None,
+        px_to_units: int,
+):
+    if is_ttf:
+        glyph_bounds = _calculate_ttf_glyph_bounds(font, glyph_order)
+    else:
+        glyph_bounds = _calculate_otf_glyph_bounds(font, glyph_order, name_to_glyph, outlines_painter, px_to_units)
+
+    font_bounds = None
+    for bounds in glyph_bounds.values():
+        font_bounds = unionRect(font_bounds, bounds) if font_bounds is not None else bounds
+
+    tb_head = font['head']
+    if is_ttf:
+        _apply_maxp_values(font, glyph_order)
+        tb_head.xMin, tb_head.yMin, tb_head.xMax, tb_head.yMax = font_bounds if font_bounds is not None else (0, 0, 0, 0)
+        horizontal_metrics = font['hmtx'].metrics
+        if all(horizontal_metrics[glyph_name][1] == bounds[0] for glyph_name, bounds in glyph_bounds.items()):
+            tb_head.flags |= 0x2
+        else:
+            tb_head.flags &= ~0x2
+    else:
+        for top_dict in font['CFF '].cff.topDictIndex:
+            top_dict.FontBBox = list(intRect(font_bounds)) if font_bounds is not None else top_dict.defaults['FontBBox'][:]
+        tb_head.xMin, tb_head.yMin, tb_head.xMax, tb_head.yMax = intRect(font['CFF '].cff.topDictIndex[0].FontBBox)
+
+    tb_hhea = font['hhea']
+    tb_hhea.advanceWidthMax, tb_hhea.minLeftSideBearing, tb_hhea.minRightSideBearing, tb_hhea.xMaxExtent = _calculate_side_bearings(font['hmtx'].metrics, glyph_bounds, 0)
+    if 'vhea' in font:
+        tb_vhea = font['vhea']
+        tb_vhea.advanceHeightMax, tb_vhea.minTopSideBearing, tb_vhea.minBottomSideBearing, tb_vhea.yMaxExtent = _calculate_side_bearings(font['vmtx'].metrics, glyph_bounds, 1)
+
+
+def verify_aggregate_metrics(font: TTFont, is_ttf: bool):
+    tables = [('maxp', _MAXP_FIELDS), ('head', _HEAD_FIELDS)] if is_ttf else [('head', _HEAD_FIELDS[:4])]
+    tables.append(('hhea', _HHEA_FIELDS))
+    if 'vhea' in font:
+        tables.append(('vhea', _VHEA_FIELDS))
+    expected_values = {(table_tag, field): getattr(font[table_tag], field) for table_tag, fields in tables for field in fields}
+    if not is_ttf:
+        expected_values['CFF ', 'FontBBox'] = font['CFF '].cff.topDictIndex[0].FontBBox
+
+    if is_ttf:
+        font['maxp'].recalc(font)
+    else:
+        cff = font['CFF '].cff
+        for top_dict in cff.topDictIndex:
+            top_dict.recalcFontBBox()
+        font['head'].xMin, font['head'].yMin, font['head'].xMax, font['head'].yMax = intRect(cff.topDictIndex[0].FontBBox)
+    font['hhea'].recalc(font)
+    if 'vhea' in font:
+        font['vhea'].recalc(font)
+
+    for (table_tag, field), expected_value in expected_values.items():
+        if table_tag == 'CFF ':
+            value = font['CFF '].cff.topDictIndex[0].FontBBox
+        else:
+            value = getattr(font[table_tag], field)
+        if value != expected_value:
+            raise RuntimeError(f"aggregate metric mismatch: '{table_tag}.{field}' is {expected_value!r}, but fontTools calculates {value!r}")
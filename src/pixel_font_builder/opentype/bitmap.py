@@ -1,30 +1,100 @@
+from __future__ import annotations
+
+import itertools
+import math
+import operator
+from array import array
+from collections import deque
+
 from fontTools.ttLib.tables.BitmapGlyphMetrics import BigGlyphMetrics, SmallGlyphMetrics
 from fontTools.ttLib.tables.E_B_D_T_ import ebdt_bitmap_format_1, ebdt_bitmap_format_2, ebdt_bitmap_format_5, ebdt_bitmap_format_6, ebdt_bitmap_format_7
-from fontTools.ttLib.tables.E_B_L_C_ import BitmapSizeTable, SbitLineMetrics, Strike, eblc_index_sub_table_1, eblc_index_sub_table_2, eblc_index_sub_table_5
+from fontTools.ttLib.tables.E_B_L_C_ import BitmapSizeTable, SbitLineMetrics, Strike, eblc_index_sub_table_1, eblc_index_sub_table_2, eblc_index_sub_table_3
 
-from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.glyph import Glyph, PackedBitmap
 from pixel_font_builder.metric import LineMetric, FontMetric
 
 GlyphBitmapFormat = ebdt_bitmap_format_1 | ebdt_bitmap_format_2 | ebdt_bitmap_format_5 | ebdt_bitmap_format_6 | ebdt_bitmap_format_7
 BigMetricsSignature = tuple[int, int, int, int, int, int, int, int]
-GroupSignature = tuple[bool, int]
+SmallMetricsSignature = tuple[int, int, int, int, int]
+
+# The index subtable array record and the index subtable header.
+_INDEX_SUB_TABLE_SIZE = 16
+_INDEX_SUB_TABLE_OFFSET_SIZE = 4
+# Index format 2 adds the image size and big metrics to the index subtable header.
+_FIXED_INDEX_SUB_TABLE_SIZE = _INDEX_SUB_TABLE_SIZE + 4 + 8
+# Offsets of index format 3 are 16-bit.
+_MAX_SHORT_OFFSET = 0xFFFF
+
+
+class _StrikeMetrics:
+    widths: array[int]
+    heights: array[int]
+    horizontal_offsets_x: array[int]
+    horizontal_offsets_y: array[int]
+    advance_widths: array[int]
+    vertical_offsets_x: array[int]
+    vertical_offsets_y: array[int]
+    advance_heights: array[int]
+    image_formats: list[int]
+    signatures: list[BigMetricsSignature | SmallMetricsSignature]
+    fixed_signatures: list[BigMetricsSignature]
+    image_sizes: list[int]
+
+    def __init__(self, glyphs: list[Glyph], use_big_metrics: bool, bit_aligned: bool = False):
+        self.widths = array('q')
+        self.heights = array('q')
+        self.horizontal_offsets_x = array('q')
+        self.horizontal_offsets_y = array('q')
+        self.advance_widths = array('q')
+        self.vertical_offsets_x = array('q')
+        self.vertical_offsets_y = array('q')
+        self.advance_heights = array('q')
+        for glyph in glyphs:
+            width, height = glyph.dimensions
+            self.widths.append(width)
+            self.heights.append(height)
+            self.horizontal_offsets_x.append(glyph.horizontal_offset_x)
+            self.horizontal_offsets_y.append(glyph.horizontal_offset_y)
+            self.advance_widths.append(glyph.advance_width)
+            self.vertical_offsets_x.append(glyph.vertical_offset_x)
+            self.vertical_offsets_y.append(glyph.vertical_offset_y)
+            self.advance_heights.append(glyph.advance_height)
+
+        # The image format of each glyph on its own, which is also the image format of the index subtable containing it.
+        # Bit-aligned images are never larger, so with `bit_aligned` all glyphs can share index subtables.
+        if bit_aligned:
+            self.image_formats = [7 if use_big_metrics else 2] * len(self.widths)
+        elif use_big_metrics:
+            self.image_formats = [6 if width % 8 == 0 else 7 for width in self.widths]
+        else:
+            self.image_formats = [1 if width % 8 == 0 else 2 for width in self.widths]
+
+        bearings_y = list(map(operator.add, self.heights, self.horizontal_offsets_y))
+        # Index format 2 always stores big metrics.
+        self.fixed_signatures = list(zip(self.heights, self.widths, self.horizontal_offsets_x, bearings_y, self.advance_widths, self.vertical_offsets_x, self.vertical_offsets_y, self.advance_heights))
+        if use_big_metrics:
+            self.signatures = self.fixed_signatures
+        else:
+            self.signatures = list(zip(self.heights, self.widths, self.horizontal_offsets_x, bearings_y, self.advance_widths))
+
+        self.image_sizes = [((width + 7) // 8) * height if image_format in (1, 6) else (width * height + 7) // 8 for width, height, image_format in zip(self.widths, self.heights, self.image_formats)]
 
 
 def _create_horizontal_sbit_line_metrics(
         horizontal_layout: LineMetric,
-        name_to_glyph: dict[str, Glyph],
+        metrics: _StrikeMetrics,
 ) -> SbitLineMetrics:
     line_metrics = SbitLineMetrics()
     line_metrics.ascender = horizontal_layout.ascent
     line_metrics.descender = horizontal_layout.descent
-    line_metrics.widthMax = max((glyph.width for glyph in name_to_glyph.values()), default=0)
+    line_metrics.widthMax = max(metrics.widths, default=0)
     line_metrics.caretSlopeNumerator = 1
     line_metrics.caretSlopeDenominator = 0
     line_metrics.caretOffset = 0
-    line_metrics.minOriginSB = min((glyph.horizontal_offset_x for glyph in name_to_glyph.values()), default=0)
-    line_metrics.minAdvanceSB = min((glyph.advance_width - glyph.horizontal_offset_x - glyph.width for glyph in name_to_glyph.values()), default=0)
-    line_metrics.maxBeforeBL = max((glyph.height + glyph.horizontal_offset_y for glyph in name_to_glyph.values()), default=0)
-    line_metrics.minAfterBL = min((glyph.horizontal_offset_y for glyph in name_to_glyph.values()), default=0)
+    line_metrics.minOriginSB = min(metrics.horizontal_offsets_x, default=0)
+    line_metrics.minAdvanceSB = min(map(operator.sub, map(operator.sub, metrics.advance_widths, metrics.horizontal_offsets_x), metrics.widths), default=0)
+    line_metrics.maxBeforeBL = max(map(operator.add, metrics.heights, metrics.horizontal_offsets_y), default=0)
+    line_metrics.minAfterBL = min(metrics.horizontal_offsets_y, default=0)
     line_metrics.pad1 = 0
     line_metrics.pad2 = 0
     return line_metrics
@@ -32,19 +102,19 @@ def _create_horizontal_sbit_line_metrics(
 
 def _create_vertical_sbit_line_metrics(
         vertical_layout: LineMetric,
-        name_to_glyph: dict[str, Glyph],
+        metrics: _StrikeMetrics,
 ) -> SbitLineMetrics:
     line_metrics = SbitLineMetrics()
     line_metrics.ascender = vertical_layout.ascent
     line_metrics.descender = vertical_layout.descent
-    line_metrics.widthMax = max((glyph.height for glyph in name_to_glyph.values()), default=0)
+    line_metrics.widthMax = max(metrics.heights, default=0)
     line_metrics.caretSlopeNumerator = 0
     line_metrics.caretSlopeDenominator = 1
     line_metrics.caretOffset = 0
-    line_metrics.minOriginSB = min((glyph.vertical_offset_y for glyph in name_to_glyph.values()), default=0)
-    line_metrics.minAdvanceSB = min((glyph.advance_height - glyph.vertical_offset_y - glyph.height for glyph in name_to_glyph.values()), default=0)
-    line_metrics.maxBeforeBL = max((glyph.vertical_offset_x + glyph.width for glyph in name_to_glyph.values()), default=0)
-    line_metrics.minAfterBL = min((glyph.vertical_offset_x for glyph in name_to_glyph.values()), default=0)
+    line_metrics.minOriginSB = min(metrics.vertical_offsets_y, default=0)
+    line_metrics.minAdvanceSB = min(map(operator.sub, map(operator.sub, metrics.advance_heights, metrics.vertical_offsets_y), metrics.heights), default=0)
+    line_metrics.maxBeforeBL = max(map(operator.add, metrics.vertical_offsets_x, metrics.widths), default=0)
+    line_metrics.minAfterBL = min(metrics.vertical_offsets_x, default=0)
     line_metrics.pad1 = 0
     line_metrics.pad2 = 0
     return line_metrics
@@ -53,12 +123,12 @@ def _create_vertical_sbit_line_metrics(
 def _create_bitmap_size_table(
         font_metric: FontMetric,
         has_vertical_metrics: bool,
-        name_to_glyph: dict[str, Glyph],
+        metrics: _StrikeMetrics,
 ) -> BitmapSizeTable:
     bitmap_size_table = BitmapSizeTable()
     bitmap_size_table.colorRef = 0
-    bitmap_size_table.hori = _create_horizontal_sbit_line_metrics(font_metric.horizontal_layout, name_to_glyph)
-    bitmap_size_table.vert = _create_vertical_sbit_line_metrics(font_metric.vertical_layout, name_to_glyph)
+    bitmap_size_table.hori = _create_horizontal_sbit_line_metrics(font_metric.horizontal_layout, metrics)
+    bitmap_size_table.vert = _create_vertical_sbit_line_metrics(font_metric.vertical_layout, metrics)
     bitmap_size_table.ppemX = font_metric.font_size
     bitmap_size_table.ppemY = font_metric.font_size
     bitmap_size_table.bitDepth = 1
@@ -66,191 +136,322 @@ def _create_bitmap_size_table(
     return bitmap_size_table
 
 
-def _create_big_metrics(glyph: Glyph) -> BigGlyphMetrics:
+def _create_big_metrics(signature: BigMetricsSignature) -> BigGlyphMetrics:
     metrics = BigGlyphMetrics()
-    metrics.height = glyph.height
-    metrics.width = glyph.width
-    metrics.horiBearingX = glyph.horizontal_offset_x
-    metrics.horiBearingY = glyph.height + glyph.horizontal_offset_y
-    metrics.horiAdvance = glyph.advance_width
-    metrics.vertBearingX = glyph.vertical_offset_x
-    metrics.vertBearingY = glyph.vertical_offset_y
-    metrics.vertAdvance = glyph.advance_height
+    (metrics.height,
+     metrics.width,
+     metrics.horiBearingX,
+     metrics.horiBearingY,
+     metrics.horiAdvance,
+     metrics.vertBearingX,
+     metrics.vertBearingY,
+     metrics.vertAdvance) = signature
     return metrics
 
 
-def _create_small_metrics(glyph: Glyph) -> SmallGlyphMetrics:
+def _create_small_metrics(signature: SmallMetricsSignature) -> SmallGlyphMetrics:
     metrics = SmallGlyphMetrics()
-    metrics.height = glyph.height
-    metrics.width = glyph.width
-    metrics.BearingX = glyph.horizontal_offset_x
-    metrics.BearingY = glyph.height + glyph.horizontal_offset_y
-    metrics.Advance = glyph.advance_width
+    (metrics.height,
+     metrics.width,
+     metrics.BearingX,
+     metrics.BearingY,
+     metrics.Advance) = signature
     return metrics
 
 
-def _pack_bitmap_row(bitmap_row: list[int]) -> bytes:
-    data = bytearray()
-    b = 0
-    bit_count = 0
-
-    for pixel in bitmap_row:
-        b = (b << 1) | (1 if pixel != 0 else 0)
-        bit_count += 1
-        if bit_count == 8:
-            data.append(b)
-            b = 0
-            bit_count = 0
+def _pack_byte_aligned_image_data(packed_bitmap: PackedBitmap) -> bytes:
+    row_size = (packed_bitmap.width + 7) // 8
+    if packed_bitmap.stride == row_size:
+        return packed_bitmap.data
+    return b''.join(row[:row_size] for row in packed_bitmap.rows())
 
-    if bit_count > 0:
-        data.append(b << (8 - bit_count))
 
-    return bytes(data)
+def _pack_bit_aligned_image_data(packed_bitmap: PackedBitmap) -> bytes:
+    value = 0
+    for row_value in packed_bitmap.row_values():
+        value = (value << packed_bitmap.width) | row_value
+    bit_count = packed_bitmap.width * packed_bitmap.height
+    byte_count = (bit_count + 7) // 8
+    return (value << (byte_count * 8 - bit_count)).to_bytes(byte_count, 'big')
 
 
-def _pack_bitmap_rows(glyph: Glyph) -> list[bytes]:
-    return [_pack_bitmap_row(bitmap_row) for bitmap_row in glyph.bitmap]
-
-
-def _create_bitmap_format(glyph: Glyph, image_format: int) -> GlyphBitmapFormat:
+def _create_bitmap_format(glyph: Glyph, image_format: int, signature: BigMetricsSignature | SmallMetricsSignature) -> GlyphBitmapFormat:
     match image_format:
         case 1:
             bitmap_glyph = ebdt_bitmap_format_1(None, None)
-            bitmap_glyph.metrics = _create_small_metrics(glyph)
+            bitmap_glyph.metrics = _create_small_metrics(signature)
         case 2:
             bitmap_glyph = ebdt_bitmap_format_2(None, None)
-            bitmap_glyph.metrics = _create_small_metrics(glyph)
+            bitmap_glyph.metrics = _create_small_metrics(signature)
         case 6:
             bitmap_glyph = ebdt_bitmap_format_6(None, None)
-            bitmap_glyph.metrics = _create_big_metrics(glyph)
+            bitmap_glyph.metrics = _create_big_metrics(signature)
         case 7:
             bitmap_glyph = ebdt_bitmap_format_7(None, None)
-            bitmap_glyph.metrics = _create_big_metrics(glyph)
+            bitmap_glyph.metrics = _create_big_metrics(signature)
         case _:
             bitmap_glyph = ebdt_bitmap_format_5(None, None)
-    bitmap_glyph.setRows(_pack_bitmap_rows(glyph), bitDepth=1, metrics=_create_big_metrics(glyph))
-    return bitmap_glyph
-
-
-def _select_image_format(glyphs: list[Glyph], use_big_metrics: bool) -> int:
-    byte_aligned = all(glyph.width % 8 == 0 for glyph in glyphs)
-    if use_big_metrics:
-        return 6 if byte_aligned else 7
-    return 1 if byte_aligned else 2
-
-
-def _bitmap_data_size(glyph: Glyph, image_format: int) -> int:
+    packed_bitmap = glyph.packed_bitmap
     if image_format in (1, 6):
-        return ((glyph.width + 7) // 8) * glyph.height
-    return (glyph.width * glyph.height + 7) // 8
-
-
-def _big_metrics_signature(glyph: Glyph) -> BigMetricsSignature:
-    metrics = _create_big_metrics(glyph)
-    return (
-        metrics.height,
-        metrics.width,
-        metrics.horiBearingX,
-        metrics.horiBearingY,
-        metrics.horiAdvance,
-        metrics.vertBearingX,
-        metrics.vertBearingY,
-        metrics.vertAdvance,
-    )
+        bitmap_glyph.imageData = _pack_byte_aligned_image_data(packed_bitmap)
+    else:
+        bitmap_glyph.imageData = _pack_bit_aligned_image_data(packed_bitmap)
+    return bitmap_glyph
 
 
-def _group_signature(glyph: Glyph, use_big_metrics: bool) -> GroupSignature:
-    image_format = _select_image_format([glyph], use_big_metrics)
-    return use_big_metrics, image_format
+def _choose_index_format(
+        use_big_metrics: bool,
+        metrics: _StrikeMetrics,
+        start: int,
+        end: int,
+) -> int:
+    signatures = metrics.signatures[start:end]
+    # The image size only depends on the image format and the dimensions, which are part of the signatures.
+    if use_big_metrics and end - start > 1 and signatures.count(signatures[0]) == len(signatures):
+        return 2
+    return 1
 
 
-def _uses_consecutive_glyph_ids(glyph_names: list[str], name_to_glyph_id: dict[str, int]) -> bool:
-    glyph_ids = [name_to_glyph_id[glyph_name] for glyph_name in glyph_names]
-    return glyph_ids == list(range(glyph_ids[0], glyph_ids[-1] + 1))
+def _plan_index_sub_tables(
+        use_big_metrics: bool,
+        metrics: _StrikeMetrics,
+        start: int,
+        end: int,
+) -> list[tuple[int, int, int]]:
+    count = end - start
+    metrics_size = 8 if use_big_metrics else 5
+    data_offsets = [0]
+    for image_size in metrics.image_sizes[start:end]:
+        data_offsets.append(data_offsets[-1] + metrics_size + image_size)
+
+    # The smallest size of the glyphs before each position, with the last index subtable.
+    sizes = [0] + [math.inf] * count
+    choices = [(0, 0)] * (count + 1)
+
+    # The size of an index subtable is a constant plus a size per glyph, so the candidates of its start position
+    # are ranked by the size before them, minus the size per glyph before them.
+    # Index format 1 has 32-bit offsets.
+    best_1 = math.inf, 0
+    # Index format 3 has 16-bit offsets, padded to 32 bits, and its image data must fit in them.
+    candidates_3 = deque(), deque()
+    # Index format 2 has the image size and metrics of all glyphs, which must be the same.
+    best_2 = math.inf, 0
+
+    for j in range(1, count + 1):
+        i = j - 1
+        position = start + i
+        image_size = metrics.image_sizes[position]
+
+        value = sizes[i] - _INDEX_SUB_TABLE_OFFSET_SIZE * i - data_offsets[i]
+        if value < best_1[0]:
+            best_1 = value, i
+
+        value = sizes[i] - 2 * i - data_offsets[i]
+        candidates = candidates_3[i % 2]
+        while len(candidates) > 0 and candidates[-1][0] >= value:
+            candidates.pop()
+        candidates.append((value, i))
+
+        # Blank glyphs are left to index subtables with metrics, since they would have no image data.
+        if i == 0 or image_size == 0 or metrics.fixed_signatures[position] != metrics.fixed_signatures[position - 1]:
+            best_2 = math.inf, i
+        if image_size > 0:
+            value = sizes[i] - image_size * i
+            if value < best_2[0]:
+                best_2 = value, i
+
+        size, i = best_1
+        choice = size + _INDEX_SUB_TABLE_SIZE + _INDEX_SUB_TABLE_OFFSET_SIZE * (j + 1) + data_offsets[j], 1, i
+        for candidates in candidates_3:
+            while len(candidates) > 0 and data_offsets[j] - data_offsets[candidates[0][1]] > _MAX_SHORT_OFFSET:
+                candidates.popleft()
+            if len(candidates) > 0:
+                size, i = candidates[0]
+                size += _INDEX_SUB_TABLE_SIZE + 2 * (j + 1) + data_offsets[j] + (2 if (j - i) % 2 == 0 else 0)
+                if size < choice[0]:
+                    choice = size, 3, i
+        if best_2[0] < math.inf:
+            size, i = best_2
+            size += _FIXED_INDEX_SUB_TABLE_SIZE + image_size * j
+            if size < choice[0]:
+                choice = size, 2, i
+        sizes[j], index_format, i = choice
+        choices[j] = index_format, i
+
+    plan = []
+    j = count
+    while j > 0:
+        index_format, i = choices[j]
+        plan.append((start + i, start + j, index_format))
+        j = i
+    plan.reverse()
+    return plan
 
 
 def _append_index_sub_table(
         strike: Strike,
-        use_big_metrics: bool,
-        glyphs: list[Glyph],
-        glyph_names: list[str],
-        name_to_glyph_id: dict[str, int],
+        index_format: int,
+        metrics: _StrikeMetrics,
+        glyph_order: list[str],
+        start: int,
+        end: int,
 ) -> int:
-    image_format = _select_image_format(glyphs, use_big_metrics)
-    if use_big_metrics:
-        first_big_metrics_signature = _big_metrics_signature(glyphs[0])
-        can_share_big_metrics = all(_big_metrics_signature(glyph) == first_big_metrics_signature for glyph in glyphs[1:])
-        first_image_size = _bitmap_data_size(glyphs[0], image_format)
-        can_share_image_size = can_share_big_metrics and all(_bitmap_data_size(glyph, image_format) == first_image_size for glyph in glyphs[1:])
-        if len(glyphs) > 1 and can_share_image_size:
-            if _uses_consecutive_glyph_ids(glyph_names, name_to_glyph_id):
-                index_sub_table = eblc_index_sub_table_2(None, None)
-                index_sub_table.indexFormat = 2
-            else:
-                index_sub_table = eblc_index_sub_table_5(None, None)
-                index_sub_table.indexFormat = 5
+    match index_format:
+        case 2:
+            index_sub_table = eblc_index_sub_table_2(None, None)
             index_sub_table.imageFormat = 5
-            index_sub_table.imageDataOffset = 0
-            index_sub_table.names = glyph_names
-            index_sub_table.metrics = _create_big_metrics(glyphs[0])
-            index_sub_table.imageSize = first_image_size
-        else:
+            index_sub_table.metrics = _create_big_metrics(metrics.fixed_signatures[start])
+            index_sub_table.imageSize = metrics.image_sizes[start]
+        case 3:
+            index_sub_table = eblc_index_sub_table_3(None, None)
+            index_sub_table.imageFormat = metrics.image_formats[start]
+        case _:
             index_sub_table = eblc_index_sub_table_1(None, None)
-            index_sub_table.indexFormat = 1
-            index_sub_table.imageFormat = image_format
-            index_sub_table.imageDataOffset = 0
-            index_sub_table.names = glyph_names
-    else:
-        index_sub_table = eblc_index_sub_table_1(None, None)
-        index_sub_table.indexFormat = 1
-        index_sub_table.imageFormat = image_format
-        index_sub_table.imageDataOffset = 0
-        index_sub_table.names = glyph_names
+            index_sub_table.imageFormat = metrics.image_formats[start]
+    index_sub_table.indexFormat = index_format
+    index_sub_table.imageDataOffset = 0
+    index_sub_table.names = glyph_order[start:end]
 
     strike.indexSubTables.append(index_sub_table)
     return index_sub_table.imageFormat
 
 
+def _find_duplicate_runs(
+        metrics: _StrikeMetrics,
+        glyph_order: list[str],
+        name_to_glyph: dict[str, Glyph],
+) -> list[tuple[int, int, list[int]]]:
+    image_formats = metrics.image_formats
+    signature_to_position = {}
+    original_positions = []
+    for position, (glyph_name, width, height, signature) in enumerate(zip(glyph_order, metrics.widths, metrics.heights, metrics.signatures)):
+        if width == 0 or height == 0:
+            original_positions.append(None)
+            continue
+        original_position = signature_to_position.setdefault((signature, name_to_glyph[glyph_name].packed_bitmap), position)
+        original_positions.append(original_position if original_position != position else None)
+
+    runs = []
+    previous_is_duplicate = False
+    position = 0
+    while position < len(glyph_order):
+        if original_positions[position] is None:
+            previous_is_duplicate = False
+            position += 1
+            continue
+
+        end_position = position + 1
+        while (end_position < len(glyph_order) and
+               original_positions[end_position] is not None and
+               original_positions[end_position] == original_positions[end_position - 1] + 1 and
+               image_formats[end_position] == image_formats[position]):
+            end_position += 1
+
+        saved_size = sum(metrics.image_sizes[position:end_position])
+        added_size = _INDEX_SUB_TABLE_SIZE + _INDEX_SUB_TABLE_OFFSET_SIZE * (end_position - position + 1)
+        if (position > 0 and
+                end_position < len(glyph_order) and
+                not previous_is_duplicate and
+                original_positions[end_position] is None and
+                image_formats[position - 1] == image_formats[end_position]):
+            # The run splits an index subtable in two.
+            added_size += _INDEX_SUB_TABLE_SIZE + _INDEX_SUB_TABLE_OFFSET_SIZE
+
+        previous_is_duplicate = saved_size > added_size
+        if previous_is_duplicate:
+            runs.append((position, end_position, original_positions[position:end_position]))
+        position = end_position
+    return runs
+
+
+def _append_duplicate_index_sub_table(
+        strike: Strike,
+        original_index_sub_table: eblc_index_sub_table_1 | eblc_index_sub_table_2 | eblc_index_sub_table_3,
+        glyph_names: list[str],
+):
+    match original_index_sub_table.indexFormat:
+        case 2:
+            index_sub_table = eblc_index_sub_table_2(None, None)
+            index_sub_table.metrics = original_index_sub_table.metrics
+            index_sub_table.imageSize = original_index_sub_table.imageSize
+        case 3:
+            index_sub_table = eblc_index_sub_table_3(None, None)
+        case _:
+            index_sub_table = eblc_index_sub_table_1(None, None)
+    index_sub_table.indexFormat = original_index_sub_table.indexFormat
+    index_sub_table.imageFormat = original_index_sub_table.imageFormat
+    index_sub_table.imageDataOffset = 0
+    index_sub_table.names = glyph_names
+    strike.indexSubTables.append(index_sub_table)
+
+
+def sort_glyph_order_by_metrics(glyph_order: list[str], name_to_glyph: dict[str, Glyph]) -> list[str]:
+    groups = {}
+    for glyph_name in glyph_order[1:]:
+        glyph = name_to_glyph[glyph_name]
+        key = glyph.dimensions, glyph.horizontal_offset, glyph.advance_width, glyph.vertical_offset, glyph.advance_height
+        groups.setdefault(key, []).append(glyph_name)
+    return [glyph_order[0], *itertools.chain.from_iterable(groups.values())]
+
+
 def create_bitmap_strike_data(
         font_metric: FontMetric,
         has_vertical_metrics: bool,
         glyph_order: list[str],
         name_to_glyph: dict[str, Glyph],
+        bitmap_formats_cache: dict[str, tuple[int, GlyphBitmapFormat]] | None = None,
+        deduplicate: bool = False,
+        optimize_index: bool = False,
 ) -> tuple[Strike, dict[str, GlyphBitmapFormat]]:
     use_big_metrics = has_vertical_metrics
-    name_to_glyph_id = {glyph_name: glyph_id for glyph_id, glyph_name in enumerate(glyph_order)}
+    metrics = _StrikeMetrics([name_to_glyph[glyph_name] for glyph_name in glyph_order], use_big_metrics, optimize_index)
+    duplicate_runs = _find_duplicate_runs(metrics, glyph_order, name_to_glyph) if deduplicate else []
+    original_positions: list[int | None] = [None] * len(glyph_order)
+    for start, end, run_original_positions in duplicate_runs:
+        original_positions[start:end] = run_original_positions
 
     strike = Strike()
-    strike.bitmapSizeTable = _create_bitmap_size_table(font_metric, has_vertical_metrics, name_to_glyph)
+    strike.bitmapSizeTable = _create_bitmap_size_table(font_metric, has_vertical_metrics, metrics)
+
+    # Glyphs with the same image format share index subtables, while index subtables of duplicates must not overlap the others.
+    image_formats = [None] * len(glyph_order)
+    position = 0
+    for group_image_format, group in itertools.groupby(range(len(glyph_order)), key=lambda x: metrics.image_formats[x] if original_positions[x] is None else None):
+        size = len(list(group))
+        if group_image_format is not None:
+            if optimize_index:
+                plan = _plan_index_sub_tables(use_big_metrics, metrics, position, position + size)
+            else:
+                plan = [(position, position + size, _choose_index_format(use_big_metrics, metrics, position, position + size))]
+            for start, end, index_format in plan:
+                image_formats[start:end] = [_append_index_sub_table(strike, index_format, metrics, glyph_order, start, end)] * (end - start)
+        position += size
+
+    if len(duplicate_runs) > 0:
+        name_to_index_sub_table = {name: index_sub_table for index_sub_table in strike.indexSubTables for name in index_sub_table.names}
+        for start, end, run_original_positions in duplicate_runs:
+            # Originals of a run may be split into several index subtables by the plan.
+            for _, group in itertools.groupby(zip(glyph_order[start:end], run_original_positions), key=lambda x: id(name_to_index_sub_table[glyph_order[x[1]]])):
+                group = list(group)
+                _append_duplicate_index_sub_table(strike, name_to_index_sub_table[glyph_order[group[0][1]]], [glyph_name for glyph_name, _ in group])
+
+        # The image data is written in the order of index subtables, so originals are written before their duplicates.
+        name_to_glyph_id = {glyph_name: glyph_id for glyph_id, glyph_name in enumerate(glyph_order)}
+        strike.indexSubTables.sort(key=lambda index_sub_table: name_to_glyph_id[index_sub_table.names[0]])
 
     strike_data = {}
-
-    current_glyphs = []
-    current_names = []
-    current_signature = None
-    name_to_image_format = {}
-
-    for glyph_name in glyph_order:
-        glyph = name_to_glyph[glyph_name]
-        signature = _group_signature(glyph, use_big_metrics)
-        if current_signature is None or current_signature == signature:
-            current_glyphs.append(glyph)
-            current_names.append(glyph_name)
+    for glyph_name, original_position, image_format, signature in zip(glyph_order, original_positions, image_formats, metrics.signatures):
+        if original_position is not None:
+            strike_data[glyph_name] = strike_data[glyph_order[original_position]]
+            continue
+        # Entries of changed glyphs must be removed from the cache by the caller.
+        if bitmap_formats_cache is not None:
+            cached_image_format, bitmap_format = bitmap_formats_cache.get(glyph_name, (None, None))
+            if cached_image_format != image_format:
+                bitmap_format = _create_bitmap_format(name_to_glyph[glyph_name], image_format, signature)
+                bitmap_formats_cache[glyph_name] = image_format, bitmap_format
         else:
-            image_format = _append_index_sub_table(strike, use_big_metrics, current_glyphs, current_names, name_to_glyph_id)
-            for name in current_names:
-                name_to_image_format[name] = image_format
-            current_glyphs = [glyph]
-            current_names = [glyph_name]
-        current_signature = signature
-
-    if current_names:
-        image_format = _append_index_sub_table(strike, use_big_metrics, current_glyphs, current_names, name_to_glyph_id)
-        for name in current_names:
-            name_to_image_format[name] = image_format
-
-    for glyph_name in glyph_order:
-        glyph = name_to_glyph[glyph_name]
-        strike_data[glyph_name] = _create_bitmap_format(glyph, name_to_image_format[glyph_name])
+            bitmap_format = _create_bitmap_format(name_to_glyph[glyph_name], image_format, signature)
+        strike_data[glyph_name] = bitmap_format
 
     return strike, strike_data
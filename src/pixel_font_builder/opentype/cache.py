@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from fontTools.misc.psCharStrings import T2CharString as OtfGlyph
+from fontTools.ttLib.tables.E_B_L_C_ import Strike
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TtfGlyph
+
+import pixel_font_builder
+from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.opentype.bitmap import GlyphBitmapFormat, sort_glyph_order_by_metrics, create_bitmap_strike_data
+from pixel_font_builder.opentype.name import create_name_strings
+from pixel_font_builder.opentype.outline.common import create_normal_xtf_glyphs, create_blank_xtf_glyphs
+
+XtfGlyphsData = tuple[dict[str, OtfGlyph | TtfGlyph], dict[str, tuple[int, int]], dict[str, tuple[int, int]]]
+BitmapStrikeData = tuple[Strike, dict[str, GlyphBitmapFormat]]
+
+
+def _pack_glyph(glyph: Glyph) -> Glyph:
+    if glyph.is_packed:
+        return glyph
+    packed_glyph = glyph.copy()
+    packed_glyph.pack_bitmap()
+    return packed_glyph
+
+
+class BuildCache:
+    # The `FontBuilder` must not be modified while the cache is in use.
+
+    context: pixel_font_builder.FontBuilder
+    _prepared_glyphs: tuple[list[str], dict[str, Glyph]] | None
+    _name_strings: dict[str, str] | None
+    _xtf_glyphs: dict[tuple[bool, bool], XtfGlyphsData]
+    _bitmap_strike_data: BitmapStrikeData | None
+
+    def __init__(self, context: pixel_font_builder.FontBuilder):
+        self.context = context
+        self._prepared_glyphs = None
+        self._name_strings = None
+        self._xtf_glyphs = {}
+        self._bitmap_strike_data = None
+
+    def prepare_glyphs(self) -> tuple[list[str], dict[str, Glyph]]:
+        if self._prepared_glyphs is None:
+            glyph_order, name_to_glyph = self.context.prepare_glyphs()
+            # Glyphs of lists are packed once here, instead of on every access by the metrics, outlines and bitmaps.
+            name_to_glyph = {glyph_name: _pack_glyph(glyph) for glyph_name, glyph in name_to_glyph.items()}
+            if self.context.opentype_config.sort_glyphs_by_metrics:
+                glyph_order = sort_glyph_order_by_metrics(glyph_order, name_to_glyph)
+            self._prepared_glyphs = glyph_order, name_to_glyph
+        return self._prepared_glyphs
+
+    def get_name_strings(self) -> dict[str, str]:
+        if self._name_strings is None:
+            self._name_strings = create_name_strings(self.context.meta_info)
+        return self._name_strings
+
+    def get_xtf_glyphs(self, is_ttf: bool, is_blank: bool) -> XtfGlyphsData:
+        key = is_ttf, is_blank
+        if key not in self._xtf_glyphs:
+            config = self.context.opentype_config
+            _, name_to_glyph = self.prepare_glyphs()
+            if is_blank:
+                self._xtf_glyphs[key] = create_blank_xtf_glyphs(is_ttf, name_to_glyph, config.px_to_units)
+            else:
+                self._xtf_glyphs[key] = create_normal_xtf_glyphs(is_ttf, config.outlines_painter, name_to_glyph, config.px_to_units, config.max_workers, config.outlines_cache)
+        return self._xtf_glyphs[key]
+
+    def get_bitmap_strike_data(self) -> BitmapStrikeData:
+        if self._bitmap_strike_data is None:
+            config = self.context.opentype_config
+            glyph_order, name_to_glyph = self.prepare_glyphs()
+            self._bitmap_strike_data = create_bitmap_strike_data(self.context.font_metric, config.has_vertical_metrics, glyph_order, name_to_glyph, deduplicate=config.deduplicate_bitmaps, optimize_index=config.optimize_bitmap_index)
+        return self._bitmap_strike_data
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from collections.abc import Hashable
+
+import pixel_font_builder
+from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.opentype.cache import XtfGlyphsData, BuildCache
+from pixel_font_builder.opentype.outline.common import XtfGlyphResult, create_normal_xtf_glyphs
+
+
+def _create_glyph_key(glyph: Glyph, is_ttf: bool, has_bitmaps: bool) -> Hashable:
+    # TrueType outlines do not contain the advances, but CFF charstrings contain the advance width, and bitmaps all metrics.
+    if is_ttf and not has_bitmaps:
+        return glyph.horizontal_offset, glyph.packed_bitmap
+    return glyph.horizontal_offset, glyph.advance_width, glyph.vertical_offset, glyph.advance_height, glyph.packed_bitmap
+
+
+def _rename_glyph(glyph: Glyph, name: str) -> Glyph:
+    if glyph.name == name:
+        return glyph
+    glyph = glyph.copy()
+    glyph.name = name
+    return glyph
+
+
+def plan_shared_glyphs(
+        contexts: list[pixel_font_builder.FontBuilder],
+        is_ttf: bool,
+        has_bitmaps: bool,
+) -> list[pixel_font_builder.FontBuilder]:
+    prepared_glyphs = [context.prepare_glyphs() for context in contexts]
+    used_names = {glyph_name for glyph_order, _ in prepared_glyphs for glyph_name in glyph_order}
+
+    unified_glyphs: list[Glyph] = []
+    key_to_unified_glyphs: dict[Hashable, list[Glyph]] = {}
+    unified_names: set[str] = set()
+    name_mappings = []
+    for context, (glyph_order, name_to_glyph) in zip(contexts, prepared_glyphs):
+        name_mapping = {}
+        font_unified_names = set()
+        for glyph_name in glyph_order:
+            glyph = name_to_glyph[glyph_name]
+            # Characters mapped to '.notdef' would be dropped from cmap, so other glyphs are never merged into it.
+            key = glyph_name == '.notdef', _create_glyph_key(glyph, is_ttf, has_bitmaps)
+            # Glyphs are only merged with glyphs of other fonts, and preferably with the one of the same name,
+            # since the glyphs of a font may have the same key but different metrics.
+            candidates = [unified_glyph for unified_glyph in key_to_unified_glyphs.get(key, []) if unified_glyph.name not in font_unified_names]
+            unified_glyph = next((candidate for candidate in candidates if candidate.name == glyph_name), candidates[0] if len(candidates) > 0 else None)
+            if unified_glyph is None:
+                unified_name = glyph_name
+                suffix = 0
+                while unified_name in unified_names or (unified_name != glyph_name and unified_name in used_names):
+                    suffix += 1
+                    unified_name = f'{glyph_name}.{suffix}'
+                unified_glyph = _rename_glyph(glyph, unified_name)
+                unified_glyphs.append(unified_glyph)
+                key_to_unified_glyphs.setdefault(key, []).append(unified_glyph)
+                unified_names.add(unified_name)
+            if glyph_name == '.notdef' and unified_glyph.name != '.notdef':
+                raise ValueError(f"the '.notdef' glyph of font '{context.meta_info.family_name}' has different outlines or metrics from the one of the first font, so it cannot be shared")
+            name_mapping[glyph_name] = unified_glyph.name
+            font_unified_names.add(unified_glyph.name)
+        if len(context.opentype_config.feature_files) > 0 and any(glyph_name != unified_name for glyph_name, unified_name in name_mapping.items()):
+            raise ValueError(f"glyphs of font '{context.meta_info.family_name}' are renamed to share glyphs, but its feature files use the original names")
+        name_mappings.append(name_mapping)
+
+    members = []
+    for context, (_, name_to_glyph), name_mapping in zip(contexts, prepared_glyphs, name_mappings):
+        own_glyphs = {name_mapping[glyph_name]: _rename_glyph(glyph, name_mapping[glyph_name]) for glyph_name, glyph in name_to_glyph.items()}
+        member = context.copy()
+        member.glyphs = [own_glyphs.get(unified_glyph.name, unified_glyph) for unified_glyph in unified_glyphs]
+        # Sorting by the metrics of a font would break the shared glyph order.
+        if member.opentype_config.sort_glyphs_by_metrics:
+            member.opentype_config = member.opentype_config.copy()
+            member.opentype_config.sort_glyphs_by_metrics = False
+        member.character_mapping = {code_point: name_mapping[glyph_name] for code_point, glyph_name in context.character_mapping.items()}
+        member.kerning_values = {(name_mapping[left_glyph_name], name_mapping[right_glyph_name]): offset for (left_glyph_name, right_glyph_name), offset in context.kerning_values.items()}
+        members.append(member)
+    return members
+
+
+class SharedGlyphsBuildCache(BuildCache):
+    _shared_results: dict[bool, dict[str, XtfGlyphResult]]
+    _shared_glyphs: dict[str, Glyph]
+
+    def __init__(self, context: pixel_font_builder.FontBuilder, shared_build_cache: SharedGlyphsBuildCache | None = None):
+        super().__init__(context)
+        if shared_build_cache is None:
+            self._shared_results = {}
+            _, self._shared_glyphs = self.prepare_glyphs()
+        else:
+            config = context.opentype_config
+            shared_config = shared_build_cache.context.opentype_config
+            if config.px_to_units == shared_config.px_to_units and config.outlines_painter == shared_config.outlines_painter:
+                self._shared_results = shared_build_cache._shared_results
+            else:
+                self._shared_results = {}
+            self._shared_glyphs = shared_build_cache._shared_glyphs
+
+    def get_xtf_glyphs(self, is_ttf: bool, is_blank: bool) -> XtfGlyphsData:
+        key = is_ttf, is_blank
+        if is_blank or key in self._xtf_glyphs:
+            return super().get_xtf_glyphs(is_ttf, is_blank)
+
+        config = self.context.opentype_config
+        shared_results = self._shared_results.get(is_ttf)
+        if shared_results is None:
+            xtf_glyphs, horizontal_metrics, vertical_metrics = create_normal_xtf_glyphs(is_ttf, config.outlines_painter, self._shared_glyphs, config.px_to_units, config.max_workers, config.outlines_cache)
+            shared_results = {glyph_name: (xtf_glyphs[glyph_name], horizontal_metrics[glyph_name], vertical_metrics[glyph_name]) for glyph_name in xtf_glyphs}
+            self._shared_results[is_ttf] = shared_results
+
+        _, name_to_glyph = self.prepare_glyphs()
+        xtf_glyphs = {}
+        horizontal_metrics = {}
+        vertical_metrics = {}
+        for glyph_name, glyph in name_to_glyph.items():
+            xtf_glyph, (_, left_side_bearing), (_, top_side_bearing) = shared_results[glyph_name]
+            shared_glyph = self._shared_glyphs[glyph_name]
+            xtf_glyphs[glyph_name] = xtf_glyph
+            # The bitmap and the horizontal offset are the same, so only the vertical offset may move the top side bearing.
+            horizontal_metrics[glyph_name] = glyph.advance_width * config.px_to_units, left_side_bearing
+            vertical_metrics[glyph_name] = glyph.advance_height * config.px_to_units, top_side_bearing + (glyph.vertical_offset_y - shared_glyph.vertical_offset_y) * config.px_to_units
+        self._xtf_glyphs[key] = xtf_glyphs, horizontal_metrics, vertical_metrics
+        return self._xtf_glyphs[key]
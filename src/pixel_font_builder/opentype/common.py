@@ -1,24 +1,32 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import StrEnum, unique
+from io import BytesIO
 
 from fontTools.fontBuilder import FontBuilder
 from fontTools.misc import timeTools
-from fontTools.misc.arrayTools import intRect
-from fontTools.ttLib import TTCollection
+from fontTools.ttLib import TTCollection, TTFont
+from fontTools.ttLib.sfnt import SFNTReader, SFNTWriter
+from fontTools.ttLib.ttFont import sortedTagList
 from fontTools.ttLib.tables.E_B_D_T_ import table_E_B_D_T_
 from fontTools.ttLib.tables.E_B_L_C_ import table_E_B_L_C_
 
 import pixel_font_builder
-from pixel_font_builder.opentype.bitmap import create_bitmap_strike_data
-from pixel_font_builder.opentype.feature import build_kern_feature
-from pixel_font_builder.opentype.name import create_name_strings
-from pixel_font_builder.opentype.outline.common import create_normal_xtf_glyphs, create_blank_xtf_glyphs
+from pixel_font_builder.instrumentation import Instrumentation, measure_stage
+from pixel_font_builder.opentype.aggregate import apply_aggregate_metrics, verify_aggregate_metrics
+from pixel_font_builder.opentype.cache import BuildCache
+from pixel_font_builder.opentype.collection import SharedGlyphsBuildCache, plan_shared_glyphs
+from pixel_font_builder.opentype.feature import build_kern_feature, build_kern_lookup, add_kern_lookup
+from pixel_font_builder.opentype.feature_cache import add_features
+from pixel_font_builder.opentype.outline.common import deduplicate_ttf_glyphs
 from pixel_font_builder.opentype.patch.O_S_2f_2 import table_O_S_2f_2_apple
 from pixel_font_builder.opentype.patch._b_d_a_t import table__b_d_a_t
 from pixel_font_builder.opentype.patch._b_h_e_d import table__b_h_e_d
 from pixel_font_builder.opentype.patch._b_l_o_c import table__b_l_o_c
 from pixel_font_builder.opentype.patch._g_l_y_f import table__g_l_y_f_zero_length
+from pixel_font_builder.opentype.subroutine import subroutinize_charstrings
 
 
 @unique
@@ -66,34 +74,51 @@ def create_font_builder(
         outline_table_mode: OutlineTableMode = OutlineTableMode.NORMAL,
         bitmap_table_mode: BitmapTableMode = BitmapTableMode.NONE,
         flavor: Flavor | None = None,
+        build_cache: BuildCache | None = None,
+        instrumentation: Instrumentation | None = None,
 ) -> FontBuilder:
+    if build_cache is None:
+        build_cache = BuildCache(context)
+    elif build_cache.context is not context:
+        raise ValueError('build cache belongs to another context')
+
     config = context.opentype_config
     font_metric = context.font_metric * config.px_to_units
     meta_info = context.meta_info
-    glyph_order, name_to_glyph = context.prepare_glyphs()
+    with measure_stage(instrumentation, 'opentype.prepare_glyphs'):
+        glyph_order, name_to_glyph = build_cache.prepare_glyphs()
+    glyph_count = len(glyph_order)
     character_mapping = context.character_mapping
     kerning_values = context.kerning_values
 
     builder = FontBuilder(font_metric.font_size, isTTF=is_ttf)
 
-    name_strings = create_name_strings(meta_info)
-    builder.setupNameTable(name_strings)
+    with measure_stage(instrumentation, 'opentype.name'):
+        name_strings = build_cache.get_name_strings()
+        builder.setupNameTable(name_strings)
 
-    if outline_table_mode == OutlineTableMode.NORMAL:
-        xtf_glyphs, horizontal_metrics, vertical_metrics = create_normal_xtf_glyphs(is_ttf, config.outlines_painter, name_to_glyph, config.px_to_units)
-    else:
-        xtf_glyphs, horizontal_metrics, vertical_metrics = create_blank_xtf_glyphs(is_ttf, name_to_glyph, config.px_to_units)
+    with measure_stage(instrumentation, 'opentype.outlines', glyph_count):
+        xtf_glyphs, horizontal_metrics, vertical_metrics = build_cache.get_xtf_glyphs(is_ttf, outline_table_mode != OutlineTableMode.NORMAL)
     builder.setupGlyphOrder(glyph_order)
     if is_ttf:
-        builder.setupGlyf(xtf_glyphs)
+        with measure_stage(instrumentation, 'opentype.setup_glyf', glyph_count):
+            if outline_table_mode == OutlineTableMode.NORMAL and config.deduplicate_outlines:
+                xtf_glyphs = deduplicate_ttf_glyphs(glyph_order, xtf_glyphs)
+            builder.setupGlyf(xtf_glyphs)
     else:
-        builder.setupCFF('', {}, xtf_glyphs, {})
-    builder.setupHorizontalMetrics(horizontal_metrics)
-    if config.has_vertical_metrics:
-        builder.setupVerticalMetrics(vertical_metrics)
+        with measure_stage(instrumentation, 'opentype.setup_cff', glyph_count):
+            builder.setupCFF('', {}, xtf_glyphs, {})
+        if outline_table_mode == OutlineTableMode.NORMAL and config.subroutinize_charstrings:
+            with measure_stage(instrumentation, 'opentype.subroutinize', glyph_count):
+                subroutinize_charstrings(builder.font)
+    with measure_stage(instrumentation, 'opentype.setup_metrics', glyph_count):
+        builder.setupHorizontalMetrics(horizontal_metrics)
+        if config.has_vertical_metrics:
+            builder.setupVerticalMetrics(vertical_metrics)
 
     if bitmap_table_mode in (BitmapTableMode.STANDARD, BitmapTableMode.APPLE):
-        strike, strike_data = create_bitmap_strike_data(context.font_metric, config.has_vertical_metrics, glyph_order, name_to_glyph)
+        with measure_stage(instrumentation, 'opentype.bitmap_strike', glyph_count):
+            strike, strike_data = build_cache.get_bitmap_strike_data()
 
         if bitmap_table_mode == BitmapTableMode.STANDARD:
             tb_eblc = table_E_B_L_C_()
@@ -110,7 +135,8 @@ def create_font_builder(
         tb_ebdt.strikeData = [strike_data]
         builder.font[tb_ebdt.tableTag] = tb_ebdt
 
-    builder.setupCharacterMap(character_mapping)
+    with measure_stage(instrumentation, 'opentype.setup_cmap', len(character_mapping)):
+        builder.setupCharacterMap(character_mapping)
 
     builder.setupHorizontalHeader(
         ascent=font_metric.horizontal_layout.ascent,
@@ -152,16 +178,12 @@ def create_font_builder(
         tb_head.modified = timeTools.timestampSinceEpoch(meta_info.modified_time.timestamp())
 
     builder.font.recalcBBoxes = False
-    if is_ttf:
-        builder.font['maxp'].recalc(builder.font)
-    else:
-        cff = builder.font["CFF "].cff
-        for top_dict in cff.topDictIndex:
-            top_dict.recalcFontBBox()
-        tb_head.xMin, tb_head.yMin, tb_head.xMax, tb_head.yMax = intRect(cff.topDictIndex[0].FontBBox)
-    builder.font['hhea'].recalc(builder.font)
-    if config.has_vertical_metrics:
-        builder.font['vhea'].recalc(builder.font)
+    with measure_stage(instrumentation, 'opentype.aggregate_metrics', glyph_count):
+        outlines_painter = config.outlines_painter if outline_table_mode == OutlineTableMode.NORMAL else None
+        apply_aggregate_metrics(builder.font, is_ttf, glyph_order, name_to_glyph, outlines_painter, config.px_to_units)
+    if config.verify_aggregate_metrics:
+        with measure_stage(instrumentation, 'opentype.verify_aggregate_metrics', glyph_count):
+            verify_aggregate_metrics(builder.font, is_ttf)
 
     if config.is_monospaced:
         if is_ttf:
@@ -178,7 +200,8 @@ def create_font_builder(
         tb_head.yMax = config.fields_override.head_y_max * config.px_to_units
 
     if config.fields_override.os2_x_avg_char_width is None:
-        tb_os2.recalcAvgCharWidth(builder.font)
+        with measure_stage(instrumentation, 'opentype.os2_recalc_avg_char_width', glyph_count):
+            tb_os2.recalcAvgCharWidth(builder.font)
     else:
         tb_os2.xAvgCharWidth = config.fields_override.os2_x_avg_char_width * config.px_to_units
 
@@ -215,11 +238,25 @@ def create_font_builder(
 
             del builder.font[tb_head.tableTag]
 
-    if outline_table_mode == OutlineTableMode.NORMAL and len(kerning_values) > 0:
-        builder.addOpenTypeFeatures(build_kern_feature(glyph_order, kerning_values, config.px_to_units))
+    has_kerning = outline_table_mode == OutlineTableMode.NORMAL and len(kerning_values) > 0
+    features = []
+    if has_kerning and not config.direct_kerning:
+        with measure_stage(instrumentation, 'opentype.kern_feature', glyph_count):
+            features.append((build_kern_feature(glyph_order, kerning_values, config.px_to_units, config.kerning_mode), None))
+    features.extend((feature_file.text, feature_file.file_path) for feature_file in config.feature_files)
 
-    for feature_file in config.feature_files:
-        builder.addOpenTypeFeatures(feature_file.text, feature_file.file_path)
+    if config.features_cache is not None and len(features) > 0:
+        with measure_stage(instrumentation, 'opentype.features', glyph_count):
+            add_features(builder.font, glyph_order, features, config.features_cache)
+    else:
+        for text, file_path in features:
+            with measure_stage(instrumentation, 'opentype.features', glyph_count):
+                builder.addOpenTypeFeatures(text, file_path)
+
+    # The kern lookup is merged into the GPOS table built from feature files, so it is added last.
+    if has_kerning and config.direct_kerning:
+        with measure_stage(instrumentation, 'opentype.kern_lookup', glyph_count):
+            add_kern_lookup(builder.font, build_kern_lookup(glyph_order, kerning_values, config.px_to_units, config.kerning_mode))
 
     if flavor is not None:
         builder.font.flavor = flavor.value
@@ -227,15 +264,97 @@ def create_font_builder(
     return builder
 
 
+def _compile_font(
+        context: pixel_font_builder.FontBuilder,
+        is_ttf: bool,
+        outline_table_mode: OutlineTableMode,
+        bitmap_table_mode: BitmapTableMode,
+) -> bytes:
+    stream = BytesIO()
+    create_font_builder(context, is_ttf, outline_table_mode, bitmap_table_mode).save(stream)
+
+    # The checksum adjustment is written for the single font, it would stop the head table from being shared in the collection.
+    # It is cleared in the raw data, since decompiling the head table may change its timestamps.
+    reader = SFNTReader(stream)
+    if 'head' in reader:
+        stream.seek(reader.tables['head'].offset + 8)
+        stream.write(b'\0\0\0\0')
+    return stream.getvalue()
+
+
+def _wrap_sfnt_data(sfnt_data: bytes, flavor: Flavor) -> bytes:
+    reader = SFNTReader(BytesIO(sfnt_data))
+    stream = BytesIO()
+    writer = SFNTWriter(stream, len(reader.tables), reader.sfntVersion, flavor.value)
+    for tag in sortedTagList(list(reader.keys())):
+        writer[tag] = reader[tag]
+    writer.close()
+    return stream.getvalue()
+
+
+def compile_font_flavors(
+        font: TTFont,
+        flavors: Iterable[Flavor | None],
+        instrumentation: Instrumentation | None = None,
+) -> dict[Flavor | None, bytes]:
+    flavors = list(dict.fromkeys(Flavor(flavor) if flavor is not None else None for flavor in flavors))
+
+    flavor_backup = font.flavor
+    font.flavor = None
+    try:
+        with measure_stage(instrumentation, 'opentype.compile'):
+            stream = BytesIO()
+            font.save(stream)
+            sfnt_data = stream.getvalue()
+    finally:
+        font.flavor = flavor_backup
+
+    wrapped_flavors = [flavor for flavor in flavors if flavor is not None]
+    with measure_stage(instrumentation, 'opentype.compress'):
+        if len(wrapped_flavors) < 2:
+            wrapped_data = [_wrap_sfnt_data(sfnt_data, flavor) for flavor in wrapped_flavors]
+        else:
+            with ThreadPoolExecutor(len(wrapped_flavors)) as executor:
+                wrapped_data = list(executor.map(_wrap_sfnt_data, [sfnt_data] * len(wrapped_flavors), wrapped_flavors))
+    flavor_to_data = dict(zip(wrapped_flavors, wrapped_data))
+    flavor_to_data[None] = sfnt_data
+    return {flavor: flavor_to_data[flavor] for flavor in flavors}
+
+
 def create_font_collection_builder(
         contexts: pixel_font_builder.FontCollectionBuilder,
         is_ttf: bool,
         outline_table_mode: OutlineTableMode = OutlineTableMode.NORMAL,
         bitmap_table_mode: BitmapTableMode = BitmapTableMode.NONE,
+        max_workers: int | None = 1,
+        share_glyphs: bool = False,
 ) -> TTCollection:
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f'max workers must be greater than 0: {max_workers}')
+
+    if share_glyphs:
+        contexts = plan_shared_glyphs(list(contexts), is_ttf, bitmap_table_mode != BitmapTableMode.NONE)
+
     collection_builder = TTCollection()
-    collection_builder.fonts.extend(
-        create_font_builder(context, is_ttf, outline_table_mode, bitmap_table_mode).font
-        for context in contexts
-    )
+    if max_workers == 1 or len(contexts) < 2:
+        shared_build_cache = None
+        for context in contexts:
+            if share_glyphs:
+                build_cache = SharedGlyphsBuildCache(context, shared_build_cache)
+                if shared_build_cache is None:
+                    shared_build_cache = build_cache
+            else:
+                build_cache = None
+            collection_builder.fonts.append(create_font_builder(context, is_ttf, outline_table_mode, bitmap_table_mode, build_cache=build_cache, instrumentation=context.instrumentation).font)
+    else:
+        # Stages in worker processes are not recorded.
+        worker_contexts = []
+        for context in contexts:
+            worker_context = context.copy()
+            worker_context.instrumentation = None
+            worker_contexts.append(worker_context)
+        count = len(worker_contexts)
+        with ProcessPoolExecutor(max_workers) as executor:
+            for data in executor.map(_compile_font, worker_contexts, [is_ttf] * count, [outline_table_mode] * count, [bitmap_table_mode] * count):
+                collection_builder.fonts.append(TTFont(BytesIO(data), recalcBBoxes=False, recalcTimestamp=False))
     return collection_builder
@@ -2,7 +2,9 @@ from __future__ import annotations
 
 from typing import Any, Final
 
-from pixel_font_builder.opentype.feature import FeatureFile
+from pixel_font_builder.opentype.feature import KerningMode, FeatureFile
+from pixel_font_builder.opentype.feature_cache import FeaturesCache
+from pixel_font_builder.opentype.outline.cache import OutlinesCache
 from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter
 from pixel_font_builder.opentype.outline.painter.solid import SolidOutlinesPainter
 
@@ -65,6 +67,17 @@ class Config:
     is_monospaced: bool
     fields_override: FieldsOverride
     feature_files: list[FeatureFile]
+    max_workers: int | None
+    outlines_cache: OutlinesCache | None
+    deduplicate_bitmaps: bool
+    deduplicate_outlines: bool
+    kerning_mode: KerningMode
+    direct_kerning: bool
+    features_cache: FeaturesCache | None
+    optimize_bitmap_index: bool
+    sort_glyphs_by_metrics: bool
+    verify_aggregate_metrics: bool
+    subroutinize_charstrings: bool
 
     def __init__(
             self,
@@ -74,6 +87,17 @@ class Config:
             is_monospaced: bool = False,
             fields_override: FieldsOverride | None = None,
             feature_files: list[FeatureFile] | None = None,
+            max_workers: int | None = 1,
+            outlines_cache: OutlinesCache | None = None,
+            deduplicate_bitmaps: bool = False,
+            deduplicate_outlines: bool = False,
+            kerning_mode: KerningMode = KerningMode.GLYPH_PAIRS,
+            direct_kerning: bool = False,
+            features_cache: FeaturesCache | None = None,
+            optimize_bitmap_index: bool = False,
+            sort_glyphs_by_metrics: bool = False,
+            verify_aggregate_metrics: bool = False,
+            subroutinize_charstrings: bool = False,
     ):
         self.px_to_units = px_to_units
         self.outlines_painter = outlines_painter if outlines_painter is not None else Config.DEFAULT_OUTLINES_PAINTER
@@ -81,6 +105,17 @@ class Config:
         self.is_monospaced = is_monospaced
         self.fields_override = fields_override if fields_override is not None else FieldsOverride()
         self.feature_files = feature_files if feature_files is not None else []
+        self.max_workers = max_workers
+        self.outlines_cache = outlines_cache
+        self.deduplicate_bitmaps = deduplicate_bitmaps
+        self.deduplicate_outlines = deduplicate_outlines
+        self.kerning_mode = kerning_mode
+        self.direct_kerning = direct_kerning
+        self.features_cache = features_cache
+        self.optimize_bitmap_index = optimize_bitmap_index
+        self.sort_glyphs_by_metrics = sort_glyphs_by_metrics
+        self.verify_aggregate_metrics = verify_aggregate_metrics
+        self.subroutinize_charstrings = subroutinize_charstrings
 
     def __copy__(self) -> Config:
         return self.copy()
@@ -96,7 +131,18 @@ class Config:
                 self.has_vertical_metrics == other.has_vertical_metrics and
                 self.is_monospaced == other.is_monospaced and
                 self.fields_override == other.fields_override and
-                self.feature_files == other.feature_files)
+                self.feature_files == other.feature_files and
+                self.max_workers == other.max_workers and
+                self.outlines_cache == other.outlines_cache and
+                self.deduplicate_bitmaps == other.deduplicate_bitmaps and
+                self.deduplicate_outlines == other.deduplicate_outlines and
+                self.kerning_mode == other.kerning_mode and
+                self.direct_kerning == other.direct_kerning and
+                self.features_cache == other.features_cache and
+                self.optimize_bitmap_index == other.optimize_bitmap_index and
+                self.sort_glyphs_by_metrics == other.sort_glyphs_by_metrics and
+                self.verify_aggregate_metrics == other.verify_aggregate_metrics and
+                self.subroutinize_charstrings == other.subroutinize_charstrings)
 
     def copy(self) -> Config:
         return Config(
@@ -106,6 +152,17 @@ class Config:
             self.is_monospaced,
             self.fields_override,
             self.feature_files,
+            self.max_workers,
+            self.outlines_cache,
+            self.deduplicate_bitmaps,
+            self.deduplicate_outlines,
+            self.kerning_mode,
+            self.direct_kerning,
+            self.features_cache,
+            self.optimize_bitmap_index,
+            self.sort_glyphs_by_metrics,
+            self.verify_aggregate_metrics,
+            self.subroutinize_charstrings,
         )
 
     def deepcopy(self) -> Config:
@@ -116,4 +173,15 @@ class Config:
             self.is_monospaced,
             self.fields_override.deepcopy(),
             [feature_file.deepcopy() for feature_file in self.feature_files],
+            self.max_workers,
+            self.outlines_cache.deepcopy() if self.outlines_cache is not None else None,
+            self.deduplicate_bitmaps,
+            self.deduplicate_outlines,
+            self.kerning_mode,
+            self.direct_kerning,
+            self.features_cache.deepcopy() if self.features_cache is not None else None,
+            self.optimize_bitmap_index,
+            self.sort_glyphs_by_metrics,
+            self.verify_aggregate_metrics,
+            self.subroutinize_charstrings,
         )
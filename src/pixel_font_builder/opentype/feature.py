@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+from enum import StrEnum, unique
 from io import StringIO
 from os import PathLike
 from typing import Any
 
+from fontTools.otlLib.builder import buildLookup, buildPairPosClassesSubtable, buildPairPosGlyphs, buildValue
+from fontTools.otlLib.maxContextCalc import maxCtxFont
+from fontTools.ttLib import TTFont, newTable
+from fontTools.ttLib.tables import otTables
+
+
+@unique
+class KerningMode(StrEnum):
+    # Write a position rule for each kerning pair.
+    GLYPH_PAIRS = 'Glyph Pairs'
+
+    # Group glyphs with the same kerning values into glyph classes, and write position rules for class pairs.
+    # Glyphs that cannot be grouped still use glyph pair rules.
+    GLYPH_CLASSES = 'Glyph Classes'
+
 
 class FeatureFile:
     @staticmethod
@@ -44,12 +60,190 @@ class FeatureFile:
         return self.copy()
 
 
-def build_kern_feature(glyph_order: list[str], kerning_values: dict[tuple[str, str], int], px_to_units: int) -> str:
+def _sort_kerning_values(glyph_order: list[str], kerning_values: dict[tuple[str, str], int]) -> list[tuple[tuple[str, str], int]]:
+    glyph_ids = {glyph_name: glyph_id for glyph_id, glyph_name in enumerate(glyph_order)}
+    return sorted(kerning_values.items(), key=lambda item: (glyph_ids[item[0][0]], glyph_ids[item[0][1]]))
+
+
+def _cluster_glyphs(sorted_kerning_values: list[tuple[tuple[str, str], int]]) -> tuple[dict[str, int], dict[str, int], list[list[str]], list[list[str]]]:
+    rows = {}
+    columns = {}
+    for (left_glyph_name, right_glyph_name), offset in sorted_kerning_values:
+        rows.setdefault(left_glyph_name, []).append((right_glyph_name, offset))
+        columns.setdefault(right_glyph_name, []).append((left_glyph_name, offset))
+
+    left_classes = {}
+    for left_glyph_name, row in rows.items():
+        left_classes.setdefault(frozenset(row), []).append(left_glyph_name)
+    right_classes = {}
+    for right_glyph_name, column in columns.items():
+        right_classes.setdefault(frozenset(column), []).append(right_glyph_name)
+
+    left_class_glyphs = list(left_classes.values())
+    right_class_glyphs = list(right_classes.values())
+    left_class_ids = {glyph_name: class_id for class_id, glyph_names in enumerate(left_class_glyphs) for glyph_name in glyph_names}
+    right_class_ids = {glyph_name: class_id for class_id, glyph_names in enumerate(right_class_glyphs) for glyph_name in glyph_names}
+    return left_class_ids, right_class_ids, left_class_glyphs, right_class_glyphs
+
+
+def _split_kerning_rules(
+        sorted_kerning_values: list[tuple[tuple[str, str], int]],
+        kerning_mode: KerningMode,
+) -> tuple[list[tuple[str, str, int]], dict[tuple[tuple[str, ...], tuple[str, ...]], int]]:
+    if kerning_mode != KerningMode.GLYPH_CLASSES:
+        return [(left_glyph_name, right_glyph_name, offset) for (left_glyph_name, right_glyph_name), offset in sorted_kerning_values], {}
+
+    left_class_ids, right_class_ids, left_class_glyphs, right_class_glyphs = _cluster_glyphs(sorted_kerning_values)
+    pair_rules = []
+    class_rules = {}
+    for (left_glyph_name, right_glyph_name), offset in sorted_kerning_values:
+        left_class_id = left_class_ids[left_glyph_name]
+        right_class_id = right_class_ids[right_glyph_name]
+        # Classes of single glyphs stay glyph pairs, which do not enlarge the class matrix.
+        if len(left_class_glyphs[left_class_id]) == 1 and len(right_class_glyphs[right_class_id]) == 1:
+            pair_rules.append((left_glyph_name, right_glyph_name, offset))
+        else:
+            class_rules.setdefault((tuple(left_class_glyphs[left_class_id]), tuple(right_class_glyphs[right_class_id])), offset)
+    return pair_rules, class_rules
+
+
+def build_kern_feature(
+        glyph_order: list[str],
+        kerning_values: dict[tuple[str, str], int],
+        px_to_units: int,
+        kerning_mode: KerningMode = KerningMode.GLYPH_PAIRS,
+) -> str:
+    sorted_kerning_values = _sort_kerning_values(glyph_order, kerning_values)
+    pair_rules, class_rules = _split_kerning_rules(sorted_kerning_values, kerning_mode)
+
     text = StringIO()
     text.write('languagesystem DFLT dflt;\n')
     text.write('\n')
+
+    left_class_names = {}
+    right_class_names = {}
+    for left_class_glyphs, right_class_glyphs in class_rules:
+        left_class_names.setdefault(left_class_glyphs, f'@kern_left_{len(left_class_names)}')
+        right_class_names.setdefault(right_class_glyphs, f'@kern_right_{len(right_class_names)}')
+    for class_names in (left_class_names, right_class_names):
+        for class_glyphs, class_name in class_names.items():
+            glyph_names = ' '.join(class_glyphs)
+            text.write(f'{class_name} = [{glyph_names}];\n')
+    if len(class_rules) > 0:
+        text.write('\n')
+
     text.write('feature kern {\n')
-    for (left_glyph_name, right_glyph_name), offset in sorted(kerning_values.items(), key=lambda x: (glyph_order.index(x[0][0]), glyph_order.index(x[0][1]))):
+    for left_glyph_name, right_glyph_name, offset in pair_rules:
         text.write(f'    position {left_glyph_name} {right_glyph_name} {offset * px_to_units};\n')
+    for (left_class_glyphs, right_class_glyphs), offset in class_rules.items():
+        text.write(f'    position {left_class_names[left_class_glyphs]} {right_class_names[right_class_glyphs]} {offset * px_to_units};\n')
     text.write('} kern;\n')
     return text.getvalue()
+
+
+def build_kern_lookup(
+        glyph_order: list[str],
+        kerning_values: dict[tuple[str, str], int],
+        px_to_units: int,
+        kerning_mode: KerningMode = KerningMode.GLYPH_PAIRS,
+) -> otTables.Lookup:
+    sorted_kerning_values = _sort_kerning_values(glyph_order, kerning_values)
+    pair_rules, class_rules = _split_kerning_rules(sorted_kerning_values, kerning_mode)
+    glyph_ids = {glyph_name: glyph_id for glyph_id, glyph_name in enumerate(glyph_order)}
+
+    subtables = []
+    if len(pair_rules) > 0:
+        glyph_pairs = {(left_glyph_name, right_glyph_name): (buildValue({'XAdvance': offset * px_to_units}), None) for left_glyph_name, right_glyph_name, offset in pair_rules}
+        subtables.extend(buildPairPosGlyphs(glyph_pairs, glyph_ids))
+    if len(class_rules) > 0:
+        class_pairs = {class_pair: (buildValue({'XAdvance': offset * px_to_units}), None) for class_pair, offset in class_rules.items()}
+        subtables.append(buildPairPosClassesSubtable(class_pairs, glyph_ids))
+    return buildLookup(subtables)
+
+
+def _create_lang_sys(feature_indices: list[int]) -> otTables.LangSys:
+    lang_sys = otTables.LangSys()
+    lang_sys.LookupOrder = None
+    lang_sys.ReqFeatureIndex = 0xFFFF
+    lang_sys.FeatureIndex = feature_indices
+    lang_sys.FeatureCount = len(feature_indices)
+    return lang_sys
+
+
+def add_kern_lookup(font: TTFont, lookup: otTables.Lookup):
+    if 'GPOS' not in font:
+        table = otTables.GPOS()
+        table.Version = 0x00010000
+        table.ScriptList = otTables.ScriptList()
+        table.ScriptList.ScriptRecord = []
+        table.FeatureList = otTables.FeatureList()
+        table.FeatureList.FeatureRecord = []
+        table.LookupList = otTables.LookupList()
+        table.LookupList.Lookup = []
+        font['GPOS'] = newTable('GPOS')
+        font['GPOS'].table = table
+    table = font['GPOS'].table
+
+    lookup_index = len(table.LookupList.Lookup)
+    table.LookupList.Lookup.append(lookup)
+    table.LookupList.LookupCount = len(table.LookupList.Lookup)
+    if 'OS/2' in font:
+        font['OS/2'].usMaxContext = maxCtxFont(font)
+
+    feature_records = table.FeatureList.FeatureRecord
+    kern_feature_indices = set()
+    for feature_index, feature_record in enumerate(feature_records):
+        if feature_record.FeatureTag == 'kern':
+            feature_record.Feature.LookupListIndex.append(lookup_index)
+            feature_record.Feature.LookupCount = len(feature_record.Feature.LookupListIndex)
+            kern_feature_indices.add(feature_index)
+
+    script_records = table.ScriptList.ScriptRecord
+    if not any(script_record.ScriptTag == 'DFLT' for script_record in script_records):
+        script_record = otTables.ScriptRecord()
+        script_record.ScriptTag = 'DFLT'
+        script_record.Script = otTables.Script()
+        script_record.Script.DefaultLangSys = _create_lang_sys([])
+        script_record.Script.LangSysRecord = []
+        script_record.Script.LangSysCount = 0
+        script_records.append(script_record)
+        script_records.sort(key=lambda record: record.ScriptTag)
+        table.ScriptList.ScriptCount = len(script_records)
+
+    lang_sys_list = []
+    for script_record in script_records:
+        if script_record.Script.DefaultLangSys is not None:
+            lang_sys_list.append(script_record.Script.DefaultLangSys)
+        lang_sys_list.extend(lang_sys_record.LangSys for lang_sys_record in script_record.Script.LangSysRecord)
+    lang_sys_list = [lang_sys for lang_sys in lang_sys_list if lang_sys.ReqFeatureIndex not in kern_feature_indices and kern_feature_indices.isdisjoint(lang_sys.FeatureIndex)]
+    if len(lang_sys_list) == 0:
+        return
+
+    feature_record = otTables.FeatureRecord()
+    feature_record.FeatureTag = 'kern'
+    feature_record.Feature = otTables.Feature()
+    feature_record.Feature.FeatureParams = None
+    feature_record.Feature.LookupListIndex = [lookup_index]
+    feature_record.Feature.LookupCount = 1
+    for lang_sys in lang_sys_list:
+        lang_sys.FeatureIndex.append(len(feature_records))
+
+    # Feature records are sorted by tag, so feature indices are remapped after inserting the new one.
+    feature_records.append(feature_record)
+    sorted_feature_indices = sorted(range(len(feature_records)), key=lambda feature_index: feature_records[feature_index].FeatureTag)
+    index_mapping = {old_feature_index: new_feature_index for new_feature_index, old_feature_index in enumerate(sorted_feature_indices)}
+    feature_records[:] = [feature_records[feature_index] for feature_index in sorted_feature_indices]
+    table.FeatureList.FeatureCount = len(feature_records)
+
+    for script_record in script_records:
+        for lang_sys in [script_record.Script.DefaultLangSys, *(lang_sys_record.LangSys for lang_sys_record in script_record.Script.LangSysRecord)]:
+            if lang_sys is None:
+                continue
+            if lang_sys.ReqFeatureIndex != 0xFFFF:
+                lang_sys.ReqFeatureIndex = index_mapping[lang_sys.ReqFeatureIndex]
+            lang_sys.FeatureIndex = sorted(index_mapping[feature_index] for feature_index in lang_sys.FeatureIndex)
+            lang_sys.FeatureCount = len(lang_sys.FeatureIndex)
+    if getattr(table, 'FeatureVariations', None) is not None:
+        for feature_variation_record in table.FeatureVariations.FeatureVariationRecord:
+            for substitution_record in feature_variation_record.FeatureTableSubstitution.SubstitutionRecord:
+                substitution_record.FeatureIndex = index_mapping[substitution_record.FeatureIndex]
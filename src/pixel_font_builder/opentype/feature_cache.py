@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import sqlite3
+import time
+from io import StringIO
+from os import PathLike
+from pathlib import Path
+from typing import Any
+
+import fontTools
+from fontTools.feaLib.builder import Builder as FeaBuilder
+from fontTools.ttLib import TTFont, newTable
+
+# Changes whenever the cached data is no longer compatible.
+_KEY_VERSION = 1
+
+# Tables built by feaLib only from the feature text and the glyph order.
+_LAYOUT_TABLE_TAGS = ('BASE', 'GDEF', 'GPOS', 'GSUB')
+
+# Included files are not part of the key, so features including other files are never cached.
+_INCLUDE_PATTERN = re.compile(r'\binclude\s*\(')
+
+FeaturesCacheEntry = tuple[dict[str, bytes], int | None]
+
+
+class FeaturesCache:
+    # Features that also change other tables, such as `table OS/2` blocks, are never cached.
+
+    @staticmethod
+    def create_key(
+            glyph_order: list[str],
+            features: list[tuple[str, str | PathLike[str] | None]],
+    ) -> bytes:
+        header = (
+            _KEY_VERSION,
+            fontTools.version,
+            [(text, str(file_path) if file_path is not None else None) for text, file_path in features],
+        )
+        return hashlib.sha256(repr(header).encode() + '\n'.join(glyph_order).encode()).digest()
+
+    file_path: Path | None
+    max_size: int | None
+    _entries: dict[bytes, FeaturesCacheEntry]
+
+    def __init__(
+            self,
+            file_path: str | PathLike[str] | None = None,
+            max_size: int | None = 64 * 1024 * 1024,
+    ):
+        if max_size is not None and max_size < 0:
+            raise ValueError(f'max size must be greater than or equal to 0: {max_size}')
+        self.file_path = Path(file_path) if file_path is not None else None
+        self.max_size = max_size
+        self._entries = {}
+
+    def __copy__(self) -> FeaturesCache:
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> FeaturesCache:
+        return self.deepcopy()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, FeaturesCache):
+            return NotImplemented
+        return (self.file_path == other.file_path and
+                self.max_size == other.max_size)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.file_path, timeout=60)
+        connection.execute('CREATE TABLE IF NOT EXISTS features (key BLOB PRIMARY KEY, base BLOB, gdef BLOB, gpos BLOB, gsub BLOB, max_context INTEGER, size INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS features_last_used ON features (last_used)')
+        return connection
+
+    def get(self, key: bytes) -> FeaturesCacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None or self.file_path is None:
+            return entry
+
+        connection = self._connect()
+        try:
+            with connection:
+                row = connection.execute('SELECT base, gdef, gpos, gsub, max_context FROM features WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    return None
+                connection.execute('UPDATE features SET last_used = ? WHERE key = ?', (time.time_ns(), key))
+        finally:
+            connection.close()
+        *tables_data, max_context = row
+        entry = {tag: data for tag, data in zip(_LAYOUT_TABLE_TAGS, tables_data) if data is not None}, max_context
+        self._entries[key] = entry
+        return entry
+
+    def put(self, key: bytes, entry: FeaturesCacheEntry):
+        self._entries[key] = entry
+        if self.file_path is None:
+            return
+
+        tables_data, max_context = entry
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO features VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, *(tables_data.get(tag) for tag in _LAYOUT_TABLE_TAGS), max_context, sum(len(data) for data in tables_data.values()), time.time_ns()),
+                )
+                self._evict(connection)
+        finally:
+            connection.close()
+
+    def _evict(self, connection: sqlite3.Connection):
+        if self.max_size is None:
+            return
+        size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM features').fetchone()[0]
+        if size <= self.max_size:
+            return
+        evicted_keys = []
+        for key, data_size in connection.execute('SELECT key, size FROM features ORDER BY last_used'):
+            if size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            size -= data_size
+        connection.executemany('DELETE FROM features WHERE key = ?', evicted_keys)
+
+    def clear(self):
+        self._entries.clear()
+        if self.file_path is None:
+            return
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute('DELETE FROM features')
+        finally:
+            connection.close()
+
+    def __len__(self) -> int:
+        if self.file_path is None:
+            return len(self._entries)
+        connection = self._connect()
+        try:
+            return connection.execute('SELECT COUNT(*) FROM features').fetchone()[0]
+        finally:
+            connection.close()
+
+    @property
+    def size(self) -> int:
+        if self.file_path is None:
+            return sum(len(data) for tables_data, _ in self._entries.values() for data in tables_data.values())
+        connection = self._connect()
+        try:
+            return connection.execute('SELECT COALESCE(SUM(size), 0) FROM features').fetchone()[0]
+        finally:
+            connection.close()
+
+    def copy(self) -> FeaturesCache:
+        features_cache = FeaturesCache(self.file_path, self.max_size)
+        features_cache._entries = self._entries
+        return features_cache
+
+    def deepcopy(self) -> FeaturesCache:
+        return self.copy()
+
+
+def _build_features(font: TTFont, text: str, file_path: str | PathLike[str] | None) -> bool:
+    stream = StringIO(text)
+    if file_path:
+        stream.name = file_path
+    builder = FeaBuilder(font, stream)
+    builder.build()
+    return not (builder.fontRevision_ or
+                builder.names_ or
+                builder.os2_ or
+                builder.hhea_ or
+                builder.vhea_ or
+                builder.stat_ or
+                builder.featureNames_ or
+                builder.cv_parameters_ or
+                builder.size_parameters_)
+
+
+def add_features(
+        font: TTFont,
+        glyph_order: list[str],
+        features: list[tuple[str, str | PathLike[str] | None]],
+        features_cache: FeaturesCache,
+):
+    cacheable = not any(_INCLUDE_PATTERN.search(text) for text, _ in features)
+    key = FeaturesCache.create_key(glyph_order, features) if cacheable else None
+    entry = features_cache.get(key) if cacheable else None
+    if entry is not None:
+        tables_data, max_context = entry
+        for tag in _LAYOUT_TABLE_TAGS:
+            if tag in tables_data:
+                table = newTable(tag)
+                table.decompile(tables_data[tag], font)
+                font[tag] = table
+            elif tag in font:
+                del font[tag]
+        if max_context is not None:
+            font['OS/2'].usMaxContext = max_context
+        return
+
+    for text, file_path in features:
+        if not _build_features(font, text, file_path):
+            cacheable = False
+
+    if cacheable:
+        tables_data = {tag: font[tag].compile(font) for tag in _LAYOUT_TABLE_TAGS if tag in font}
+        max_context = font['OS/2'].usMaxContext if 'OS/2' in font else None
+        features_cache.put(key, (tables_data, max_context))
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+import time
+from collections.abc import Iterable
+from os import PathLike
+from pathlib import Path
+from typing import Any
+
+from pixel_font_builder.glyph import Glyph, PackedBitmap
+
+# Changes whenever the cached data is no longer compatible.
+_KEY_VERSION = 2
+
+# Limits the number of parameters in one query.
+_QUERY_CHUNK_SIZE = 500
+
+
+class OutlinesCache:
+    @staticmethod
+    def create_key(
+            is_ttf: bool,
+            painter_key: str,
+            glyph: Glyph,
+            px_to_units: int,
+    ) -> bytes:
+        packed_bitmap = glyph.packed_bitmap
+        if packed_bitmap.stride != (packed_bitmap.width + 7) // 8:
+            packed_bitmap = PackedBitmap.from_row_values(packed_bitmap.width, packed_bitmap.row_values())
+        header = (
+            _KEY_VERSION,
+            is_ttf,
+            painter_key,
+            px_to_units,
+            glyph.horizontal_offset,
+            glyph.advance_width,
+            glyph.vertical_offset,
+            glyph.advance_height,
+            packed_bitmap.dimensions,
+        )
+        return hashlib.sha256(repr(header).encode() + packed_bitmap.data).digest()
+
+    file_path: Path
+    max_size: int | None
+
+    def __init__(
+            self,
+            file_path: str | PathLike[str],
+            max_size: int | None = 256 * 1024 * 1024,
+    ):
+        if max_size is not None and max_size < 0:
+            raise ValueError(f'max size must be greater than or equal to 0: {max_size}')
+        self.file_path = Path(file_path)
+        self.max_size = max_size
+
+    def __copy__(self) -> OutlinesCache:
+        return self.copy()
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> OutlinesCache:
+        return self.deepcopy()
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, OutlinesCache):
+            return NotImplemented
+        return (self.file_path == other.file_path and
+                self.max_size == other.max_size)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.file_path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.file_path, timeout=60)
+        connection.execute('CREATE TABLE IF NOT EXISTS outlines (key BLOB PRIMARY KEY, data BLOB NOT NULL, advance_width INTEGER NOT NULL, left_side_bearing INTEGER NOT NULL, advance_height INTEGER NOT NULL, top_side_bearing INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS outlines_last_used ON outlines (last_used)')
+        return connection
+
+    def get(self, keys: Iterable[bytes]) -> dict[bytes, tuple[bytes, tuple[int, int], tuple[int, int]]]:
+        keys = list(dict.fromkeys(keys))
+        results = {}
+        connection = self._connect()
+        try:
+            with connection:
+                last_used = time.time_ns()
+                for i in range(0, len(keys), _QUERY_CHUNK_SIZE):
+                    chunk = keys[i:i + _QUERY_CHUNK_SIZE]
+                    placeholders = ', '.join('?' * len(chunk))
+                    for key, data, advance_width, left_side_bearing, advance_height, top_side_bearing in connection.execute(
+                            f'SELECT key, data, advance_width, left_side_bearing, advance_height, top_side_bearing FROM outlines WHERE key IN ({placeholders})',
+                            chunk,
+                    ):
+                        results[key] = data, (advance_width, left_side_bearing), (advance_height, top_side_bearing)
+                    connection.execute(f'UPDATE outlines SET last_used = ? WHERE key IN ({placeholders})', [last_used, *chunk])
+        finally:
+            connection.close()
+        return results
+
+    def put(self, entries: dict[bytes, tuple[bytes, tuple[int, int], tuple[int, int]]]):
+        connection = self._connect()
+        try:
+            with connection:
+                last_used = time.time_ns()
+                connection.executemany(
+                    'INSERT OR REPLACE INTO outlines VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(key, data, advance_width, left_side_bearing, advance_height, top_side_bearing, last_used) for key, (data, (advance_width, left_side_bearing), (advance_height, top_side_bearing)) in entries.items()],
+                )
+                self._evict(connection)
+        finally:
+            connection.close()
+
+    def _evict(self, connection: sqlite3.Connection):
+        if self.max_size is None:
+            return
+        size = connection.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM outlines').fetchone()[0]
+        if size <= self.max_size:
+            return
+        evicted_keys = []
+        for key, data_size in connection.execute('SELECT key, LENGTH(data) FROM outlines ORDER BY last_used'):
+            if size <= self.max_size:
+                break
+            evicted_keys.append((key,))
+            size -= data_size
+        connection.executemany('DELETE FROM outlines WHERE key = ?', evicted_keys)
+
+    def clear(self):
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute('DELETE FROM outlines')
+        finally:
+            connection.close()
+
+    def __len__(self) -> int:
+        connection = self._connect()
+        try:
+            return connection.execute('SELECT COUNT(*) FROM outlines').fetchone()[0]
+        finally:
+            connection.close()
+
+    @property
+    def size(self) -> int:
+        connection = self._connect()
+        try:
+            return connection.execute('SELECT COALESCE(SUM(LENGTH(data)), 0) FROM outlines').fetchone()[0]
+        finally:
+            connection.close()
+
+    def copy(self) -> OutlinesCache:
+        return OutlinesCache(self.file_path, self.max_size)
+
+    def deepcopy(self) -> OutlinesCache:
+        return self.copy()
@@ -0,0 +1,120 @@
+from math import floor
+
+from fontTools.misc.psCharStrings import T2CharString as OtfGlyph, encodeIntT2
+from fontTools.misc.roundTools import otRound
+
+# The argument stack limit of Type 2 charstrings.
+_MAX_STACK = 48
+
+_OPERATOR_BYTES = {operator: bytes(OtfGlyph.opcodes[operator]) for operator in (
+    'rmoveto', 'hmoveto', 'vmoveto',
+    'rlineto', 'hlineto', 'vlineto',
+    'rrcurveto', 'hhcurveto', 'vvcurveto', 'hvcurveto', 'vhcurveto', 'rcurveline', 'rlinecurve',
+    'endchar',
+)}
+
+
+def _create_commands(polygons: list[list[tuple[float, float]]]) -> list[tuple[str, list[int]]]:
+    commands = []
+    last_x = 0
+    last_y = 0
+    previous_polygon_size = 0
+    for polygon in polygons:
+        for index, (x, y) in enumerate(polygon):
+            # Same as `otRound`, inlined.
+            x = floor(x + 0.5)
+            y = floor(y + 0.5)
+            dx = x - last_x
+            dy = y - last_y
+            last_x = x
+            last_y = y
+
+            if index == 0:
+                # A polygon of one point only moves, and the move is combined with the next one.
+                if previous_polygon_size == 1:
+                    _, (last_dx, last_dy) = commands[-1]
+                    commands[-1] = 'rmoveto', [last_dx + dx, last_dy + dy]
+                else:
+                    commands.append(('rmoveto', [dx, dy]))
+                mergeable = False
+            elif dy == 0:
+                if dx == 0:
+                    mergeable = False
+                elif mergeable and commands[-1][0] == 'hlineto':
+                    commands[-1][1][0] += dx
+                else:
+                    commands.append(('hlineto', [dx]))
+                    mergeable = True
+            elif dx == 0:
+                if mergeable and commands[-1][0] == 'vlineto':
+                    commands[-1][1][0] += dy
+                else:
+                    commands.append(('vlineto', [dy]))
+                    mergeable = True
+            else:
+                commands.append(('rlineto', [dx, dy]))
+                mergeable = True
+        previous_polygon_size = len(polygon)
+    return commands
+
+
+def _create_program(polygons: list[list[tuple[float, float]]], advance_width: int) -> list[int | str]:
+    commands = _create_commands(polygons)
+
+    # A single horizontal or vertical line between relative lines is cheaper as a relative line.
+    for index in range(1, len(commands) - 1):
+        operator, arguments = commands[index]
+        if operator in ('hlineto', 'vlineto') and commands[index - 1][0] == commands[index + 1][0] == 'rlineto':
+            commands[index] = 'rlineto', [0, arguments[0]] if operator == 'vlineto' else [arguments[0], 0]
+
+    # Combine lines from the end, keeping the stack depth below the limit.
+    stack_use = len(commands[-1][1]) if len(commands) > 0 else 0
+    for index in range(len(commands) - 1, 0, -1):
+        operator_1, arguments_1 = commands[index - 1]
+        operator_2, arguments_2 = commands[index]
+        if operator_1 == operator_2 == 'rlineto' or (operator_1 != operator_2 and operator_1 in ('hlineto', 'vlineto') and operator_2 in ('hlineto', 'vlineto')):
+            combined_stack_use = len(arguments_1) + stack_use
+            if combined_stack_use < _MAX_STACK:
+                commands[index - 1] = operator_1, arguments_1 + arguments_2
+                del commands[index]
+                stack_use = combined_stack_use
+                continue
+        stack_use = len(arguments_1)
+
+    program = [otRound(advance_width)]
+    for operator, arguments in commands:
+        if operator == 'rmoveto':
+            dx, dy = arguments
+            if dx == 0 and dy != 0:
+                program.extend((dy, 'vmoveto'))
+            elif dy == 0:
+                program.extend((dx, 'hmoveto'))
+            else:
+                program.extend((dx, dy, 'rmoveto'))
+        else:
+            program.extend(arguments)
+            program.append(operator)
+    program.append('endchar')
+    return program
+
+
+def create_otf_glyph(polygons: list[list[tuple[float, float]]], advance_width: int) -> OtfGlyph:
+    return OtfGlyph(program=_create_program(polygons, advance_width))
+
+
+def compile_otf_glyph(polygons: list[list[tuple[float, float]]], advance_width: int) -> bytes:
+    return compile_otf_program(_create_program(polygons, advance_width))
+
+
+def compile_otf_program(program: list[int | str]) -> bytes | None:
+    data = []
+    for token in program:
+        if isinstance(token, str):
+            if token not in _OPERATOR_BYTES:
+                return None
+            data.append(_OPERATOR_BYTES[token])
+        elif isinstance(token, int):
+            data.append(encodeIntT2(token))
+        else:
+            return None
+    return b''.join(data)
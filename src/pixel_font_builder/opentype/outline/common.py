@@ -1,33 +1,174 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from fontTools.misc.psCharStrings import T2CharString as OtfGlyph
-from fontTools.ttLib.tables._g_l_y_f import Glyph as TtfGlyph
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TtfGlyph, GlyphComponent
 
 from pixel_font_builder.glyph import Glyph
-from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter
+from pixel_font_builder.opentype.outline.cache import OutlinesCache
+from pixel_font_builder.opentype.outline.charstring import create_otf_glyph, compile_otf_glyph
+from pixel_font_builder.opentype.outline.glyf import create_ttf_glyph, compile_ttf_glyph
+from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter, get_optional_method
 from pixel_font_builder.opentype.outline.pen.otf import OtfOutlinesPen
 from pixel_font_builder.opentype.outline.pen.ttf import TtfOutlinesPen
 
+XtfGlyphResult = tuple[OtfGlyph | TtfGlyph, tuple[int, int], tuple[int, int]]
+CompiledXtfGlyphResult = tuple[bytes, tuple[int, int], tuple[int, int]]
+
+_CHUNKS_PER_WORKER = 4
+
+
+def _create_xtf_glyph_metrics(glyph: Glyph, px_to_units: int) -> tuple[tuple[int, int], tuple[int, int]]:
+    advance_width = glyph.advance_width * px_to_units
+    left_side_bearing = (glyph.horizontal_offset_x + glyph.calculate_bitmap_left_padding()) * px_to_units
+
+    advance_height = glyph.advance_height * px_to_units
+    top_side_bearing = (glyph.vertical_offset_y + glyph.calculate_bitmap_top_padding()) * px_to_units
+
+    return (advance_width, left_side_bearing), (advance_height, top_side_bearing)
+
+
+def _create_polygons(outlines_painter: OutlinesPainter, glyph: Glyph, px_to_units: int) -> list[list[tuple[float, float]]] | None:
+    # Closed polygons of on-curve points, in the order `draw_outlines` draws them.
+    create_polygons = get_optional_method(outlines_painter, 'create_polygons')
+    if create_polygons is None:
+        return None
+    try:
+        return create_polygons(glyph, px_to_units)
+    except NotImplementedError:
+        return None
+
+
+def _create_normal_xtf_glyph(
+        is_ttf: bool,
+        outlines_painter: OutlinesPainter,
+        glyph: Glyph,
+        px_to_units: int,
+) -> XtfGlyphResult:
+    horizontal_metric, vertical_metric = _create_xtf_glyph_metrics(glyph, px_to_units)
+
+    # Polygons skip the pen and are written to the glyph directly.
+    polygons = _create_polygons(outlines_painter, glyph, px_to_units)
+    if polygons is not None:
+        xtf_glyph = create_ttf_glyph(polygons) if is_ttf else create_otf_glyph(polygons, horizontal_metric[0])
+        return xtf_glyph, horizontal_metric, vertical_metric
+
+    pen = TtfOutlinesPen() if is_ttf else OtfOutlinesPen(horizontal_metric[0])
+    outlines_painter.draw_outlines(glyph, pen, px_to_units)
+    return pen.to_glyph(), horizontal_metric, vertical_metric
+
+
+def _compile_xtf_glyph(is_ttf: bool, xtf_glyph: OtfGlyph | TtfGlyph) -> bytes:
+    if is_ttf:
+        return xtf_glyph.compile(None)
+    xtf_glyph.compile()
+    return xtf_glyph.bytecode
+
+
+def _decompile_xtf_glyph(is_ttf: bool, data: bytes) -> OtfGlyph | TtfGlyph:
+    if is_ttf:
+        xtf_glyph = TtfGlyph(data)
+        xtf_glyph.expand(None)
+        return xtf_glyph
+    return OtfGlyph(bytecode=data)
+
+
+def _create_compiled_normal_xtf_glyphs(
+        is_ttf: bool,
+        outlines_painter: OutlinesPainter,
+        glyphs: list[Glyph],
+        px_to_units: int,
+) -> list[CompiledXtfGlyphResult]:
+    results = []
+    for glyph in glyphs:
+        polygons = _create_polygons(outlines_painter, glyph, px_to_units)
+        if polygons is not None:
+            horizontal_metric, vertical_metric = _create_xtf_glyph_metrics(glyph, px_to_units)
+            data = compile_ttf_glyph(polygons) if is_ttf else compile_otf_glyph(polygons, horizontal_metric[0])
+            results.append((data, horizontal_metric, vertical_metric))
+            continue
+
+        xtf_glyph, horizontal_metric, vertical_metric = _create_normal_xtf_glyph(is_ttf, outlines_painter, glyph, px_to_units)
+        results.append((_compile_xtf_glyph(is_ttf, xtf_glyph), horizontal_metric, vertical_metric))
+    return results
+
+
+def _create_normal_xtf_glyphs_parallel(
+        is_ttf: bool,
+        outlines_painter: OutlinesPainter,
+        glyphs: list[Glyph],
+        px_to_units: int,
+        max_workers: int | None,
+) -> list[CompiledXtfGlyphResult]:
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    chunk_size = max(math.ceil(len(glyphs) / (max_workers * _CHUNKS_PER_WORKER)), 1)
+    chunks = [glyphs[i:i + chunk_size] for i in range(0, len(glyphs), chunk_size)]
+
+    results = []
+    with ProcessPoolExecutor(max_workers) as executor:
+        for chunk_results in executor.map(
+                _create_compiled_normal_xtf_glyphs,
+                [is_ttf] * len(chunks),
+                [outlines_painter] * len(chunks),
+                chunks,
+                [px_to_units] * len(chunks),
+        ):
+            results.extend(chunk_results)
+    return results
+
 
 def create_normal_xtf_glyphs(
         is_ttf: bool,
         outlines_painter: OutlinesPainter,
         name_to_glyph: dict[str, Glyph],
         px_to_units: int,
+        max_workers: int | None = 1,
+        outlines_cache: OutlinesCache | None = None,
 ) -> tuple[dict[str, OtfGlyph | TtfGlyph], dict[str, tuple[int, int]], dict[str, tuple[int, int]]]:
+    if max_workers is not None and max_workers < 1:
+        raise ValueError(f'max workers must be greater than 0: {max_workers}')
+
+    glyphs = list(name_to_glyph.values())
+    results: list[XtfGlyphResult | None] = [None] * len(glyphs)
+
+    cache_keys = None
+    painter_key = None
+    if outlines_cache is not None:
+        cache_key = get_optional_method(outlines_painter, 'cache_key')
+        if cache_key is not None:
+            painter_key = cache_key()
+    if painter_key is not None:
+        cache_keys = [OutlinesCache.create_key(is_ttf, painter_key, glyph, px_to_units) for glyph in glyphs]
+        cached_results = outlines_cache.get(cache_keys)
+        for index, cache_key in enumerate(cache_keys):
+            if cache_key in cached_results:
+                data, horizontal_metric, vertical_metric = cached_results[cache_key]
+                results[index] = _decompile_xtf_glyph(is_ttf, data), horizontal_metric, vertical_metric
+
+    missing_indices = [index for index, result in enumerate(results) if result is None]
+    missing_glyphs = [glyphs[index] for index in missing_indices]
+    if max_workers == 1 or len(missing_glyphs) < 2:
+        missing_results = [_create_normal_xtf_glyph(is_ttf, outlines_painter, glyph, px_to_units) for glyph in missing_glyphs]
+        if cache_keys is not None:
+            compiled_results = [(_compile_xtf_glyph(is_ttf, xtf_glyph), horizontal_metric, vertical_metric) for xtf_glyph, horizontal_metric, vertical_metric in missing_results]
+    else:
+        compiled_results = _create_normal_xtf_glyphs_parallel(is_ttf, outlines_painter, missing_glyphs, px_to_units, max_workers)
+        missing_results = [(_decompile_xtf_glyph(is_ttf, data), horizontal_metric, vertical_metric) for data, horizontal_metric, vertical_metric in compiled_results]
+    for index, result in zip(missing_indices, missing_results):
+        results[index] = result
+
+    if cache_keys is not None and len(missing_indices) > 0:
+        outlines_cache.put({cache_keys[index]: compiled_result for index, compiled_result in zip(missing_indices, compiled_results)})
+
     xtf_glyphs = {}
     horizontal_metrics = {}
     vertical_metrics = {}
-    for glyph_name, glyph in name_to_glyph.items():
-        advance_width = glyph.advance_width * px_to_units
-        left_side_bearing = (glyph.horizontal_offset_x + glyph.calculate_bitmap_left_padding()) * px_to_units
-        horizontal_metrics[glyph_name] = advance_width, left_side_bearing
-
-        advance_height = glyph.advance_height * px_to_units
-        top_side_bearing = (glyph.vertical_offset_y + glyph.calculate_bitmap_top_padding()) * px_to_units
-        vertical_metrics[glyph_name] = advance_height, top_side_bearing
-
-        pen = TtfOutlinesPen() if is_ttf else OtfOutlinesPen(advance_width)
-        outlines_painter.draw_outlines(glyph, pen, px_to_units)
-        xtf_glyphs[glyph_name] = pen.to_glyph()
+    for glyph_name, (xtf_glyph, horizontal_metric, vertical_metric) in zip(name_to_glyph, results):
+        xtf_glyphs[glyph_name] = xtf_glyph
+        horizontal_metrics[glyph_name] = horizontal_metric
+        vertical_metrics[glyph_name] = vertical_metric
     return xtf_glyphs, horizontal_metrics, vertical_metrics
 
 
@@ -51,3 +192,27 @@ def create_blank_xtf_glyphs(
         pen = TtfOutlinesPen() if is_ttf else OtfOutlinesPen(advance_width)
         xtf_glyphs[glyph_name] = pen.to_glyph()
     return xtf_glyphs, horizontal_metrics, vertical_metrics
+
+
+def deduplicate_ttf_glyphs(
+        glyph_order: list[str],
+        xtf_glyphs: dict[str, TtfGlyph],
+) -> dict[str, TtfGlyph]:
+    signature_to_name = {}
+    results = {}
+    for glyph_name in glyph_order:
+        xtf_glyph = xtf_glyphs[glyph_name]
+        if xtf_glyph.numberOfContours > 0:
+            signature = tuple(xtf_glyph.endPtsOfContours), bytes(xtf_glyph.flags), tuple(xtf_glyph.coordinates)
+            original_name = signature_to_name.setdefault(signature, glyph_name)
+            if original_name != glyph_name:
+                component = GlyphComponent()
+                component.glyphName = original_name
+                component.x = 0
+                component.y = 0
+                component.flags = 0
+                xtf_glyph = TtfGlyph()
+                xtf_glyph.numberOfContours = -1
+                xtf_glyph.components = [component]
+        results[glyph_name] = xtf_glyph
+    return results
@@ -0,0 +1,105 @@
+import struct
+import sys
+from array import array
+from math import floor
+
+from fontTools.ttLib.tables import ttProgram
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TtfGlyph, GlyphCoordinates, flagOnCurve, flagXShort, flagYShort, flagRepeat, flagXsame, flagYsame
+
+
+def _flatten_polygons(polygons: list[list[tuple[float, float]]]) -> tuple[list[int], list[int]]:
+    end_points = []
+    coordinates = []
+    for polygon in polygons:
+        # One-point paths are anchors.
+        if len(polygon) < 2:
+            continue
+        if polygon[0] == polygon[-1]:
+            polygon = polygon[:-1]
+        # Same as `otRound`, inlined.
+        coordinates.extend([floor(value + 0.5) for point in polygon for value in point])
+        end_points.append(len(coordinates) // 2 - 1)
+    return end_points, coordinates
+
+
+def create_ttf_glyph(polygons: list[list[tuple[float, float]]]) -> TtfGlyph:
+    end_points, coordinates = _flatten_polygons(polygons)
+    xtf_glyph = TtfGlyph()
+    xtf_glyph.coordinates = GlyphCoordinates()
+    xtf_glyph.coordinates.array.extend(coordinates)
+    xtf_glyph.endPtsOfContours = end_points
+    xtf_glyph.flags = array('B', [flagOnCurve]) * (len(coordinates) // 2)
+    xtf_glyph.numberOfContours = len(end_points)
+    xtf_glyph.program = ttProgram.Program()
+    xtf_glyph.program.fromBytecode(b'')
+    return xtf_glyph
+
+
+def compile_ttf_glyph(polygons: list[list[tuple[float, float]]]) -> bytes:
+    end_points, coordinates = _flatten_polygons(polygons)
+    if len(end_points) == 0:
+        return b''
+
+    xs = coordinates[0::2]
+    ys = coordinates[1::2]
+    data = [struct.pack('>hhhhh', len(end_points), min(xs), min(ys), max(xs), max(ys))]
+    end_points = array('H', end_points)
+    if sys.byteorder != 'big':
+        end_points.byteswap()
+    data.append(end_points.tobytes())
+    # No instructions.
+    data.append(b'\x00\x00')
+
+    compressed_flags = bytearray()
+    compressed_xs = bytearray()
+    compressed_ys = bytearray()
+    last_x = 0
+    last_y = 0
+    last_flag = None
+    repeat = 0
+    for x, y in zip(xs, ys):
+        dx = x - last_x
+        dy = y - last_y
+        last_x = x
+        last_y = y
+
+        flag = flagOnCurve
+        if dx == 0:
+            flag |= flagXsame
+        elif -255 <= dx <= 255:
+            if dx > 0:
+                flag |= flagXShort | flagXsame
+                compressed_xs.append(dx)
+            else:
+                flag |= flagXShort
+                compressed_xs.append(-dx)
+        else:
+            compressed_xs.extend(struct.pack('>h', dx))
+        if dy == 0:
+            flag |= flagYsame
+        elif -255 <= dy <= 255:
+            if dy > 0:
+                flag |= flagYShort | flagYsame
+                compressed_ys.append(dy)
+            else:
+                flag |= flagYShort
+                compressed_ys.append(-dy)
+        else:
+            compressed_ys.extend(struct.pack('>h', dy))
+
+        if flag == last_flag and repeat != 255:
+            repeat += 1
+            if repeat == 1:
+                compressed_flags.append(flag)
+            else:
+                compressed_flags[-2] = flag | flagRepeat
+                compressed_flags[-1] = repeat
+        else:
+            repeat = 0
+            compressed_flags.append(flag)
+        last_flag = flag
+
+    data.append(compressed_flags)
+    data.append(compressed_xs)
+    data.append(compressed_ys)
+    return b''.join(data)
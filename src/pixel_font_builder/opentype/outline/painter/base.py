@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from abc import abstractmethod
+from collections.abc import Callable
 from typing import Any, Protocol, runtime_checkable
 
 from pixel_font_builder.glyph import Glyph
@@ -30,3 +31,23 @@ class OutlinesPainter(Protocol):
     @abstractmethod
     def deepcopy(self) -> OutlinesPainter:
         raise NotImplementedError()
+
+
+def _find_defining_type(painter_type: type, name: str) -> type | None:
+    for defining_type in painter_type.__mro__:
+        if name in vars(defining_type):
+            return defining_type
+    return None
+
+
+def get_optional_method(outlines_painter: OutlinesPainter, name: str) -> Callable[..., Any] | None:
+    # Optional methods, like `cache_key`, are not part of the protocol, so painters may not have them.
+    # They describe the outlines drawn by `draw_outlines`, so they are ignored when a subclass only overrides `draw_outlines`.
+    painter_type = type(outlines_painter)
+    method_type = _find_defining_type(painter_type, name)
+    if method_type is None:
+        return None
+    draw_outlines_type = _find_defining_type(painter_type, 'draw_outlines')
+    if draw_outlines_type is not None and not issubclass(method_type, draw_outlines_type):
+        return None
+    return getattr(outlines_painter, name)
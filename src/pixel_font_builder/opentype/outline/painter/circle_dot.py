@@ -18,14 +18,18 @@ class CircleDotOutlinesPainter(OutlinesPainter):
             return NotImplemented
         return self.radius == other.radius
 
+    def cache_key(self) -> str:
+        return f'{type(self).__module__}.{type(self).__qualname__}:{self.radius!r}'
+
     def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
         radius = self.radius * px_to_units
         c = radius * 4 / 3 * (math.sqrt(2) - 1)
-        for y, bitmap_row in enumerate(glyph.bitmap):
+        packed_bitmap = glyph.packed_bitmap
+        for y, row_value in enumerate(packed_bitmap.row_values()):
             y = (glyph.height + glyph.horizontal_offset_y - y - 0.5) * px_to_units
-            for x, pixel in enumerate(bitmap_row):
-                x = (x + glyph.horizontal_offset_x + 0.5) * px_to_units
-                if pixel != 0:
+            for x in range(packed_bitmap.width):
+                if (row_value >> (packed_bitmap.width - 1 - x)) & 1:
+                    x = (x + glyph.horizontal_offset_x + 0.5) * px_to_units
                     pen.move_to((x, y + radius))
                     pen.cubic_curve_to((x + c, y + radius), (x + radius, y + c), (x + radius, y))
                     pen.cubic_curve_to((x + radius, y - c), (x + c, y - radius), (x, y - radius))
@@ -33,6 +37,19 @@ class CircleDotOutlinesPainter(OutlinesPainter):
                     pen.cubic_curve_to((x - radius, y + c), (x - c, y + radius), (x, y + radius))
                     pen.close_path()
 
+    def calculate_bounds(self, glyph: Glyph, px_to_units: int) -> tuple[float, float, float, float] | None:
+        ink_bbox = glyph.ink_bbox
+        if ink_bbox is None:
+            return None
+        left, top, right, bottom = ink_bbox
+        radius = self.radius * px_to_units
+        return (
+            (left + glyph.horizontal_offset_x + 0.5) * px_to_units - radius,
+            (glyph.height + glyph.horizontal_offset_y - (bottom - 1) - 0.5) * px_to_units - radius,
+            (right - 1 + glyph.horizontal_offset_x + 0.5) * px_to_units + radius,
+            (glyph.height + glyph.horizontal_offset_y - top - 0.5) * px_to_units + radius,
+        )
+
     def copy(self) -> CircleDotOutlinesPainter:
         return CircleDotOutlinesPainter(self.radius)
 
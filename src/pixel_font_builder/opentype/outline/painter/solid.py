@@ -1,81 +1,99 @@
 from __future__ import annotations
 
-from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.glyph import Glyph, PackedBitmap
 from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter
 from pixel_font_builder.opentype.outline.pen.base import OutlinesPen
 
+# Right, down, left, up, in bitmap coordinates.
+_DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
 
-def _is_solid(bitmap: list[list[int]], x: int, y: int) -> bool:
-    return 0 <= y < len(bitmap) and 0 <= x < len(bitmap[y]) and bitmap[y][x] != 0
+# Turn right first, then go straight, then turn left, then turn back.
+_TURN_ORDERS = tuple(((direction + 1) % 4, direction, (direction + 3) % 4, (direction + 2) % 4) for direction in range(4))
 
 
 def _is_collinear(point_1: tuple[int, int], point_2: tuple[int, int], point_3: tuple[int, int]) -> bool:
     return point_1[0] == point_2[0] == point_3[0] or point_1[1] == point_2[1] == point_3[1]
 
 
+def _create_pending_edges(row_values: list[int]) -> list[list[int]]:
+    # In a mask of width `w`, the vertex at `x` is the bit `w - x`.
+    pixel_rows = [0]
+    pixel_rows.extend(row_value << 1 for row_value in row_values)
+    pixel_rows.append(0)
+
+    right_edges = []
+    down_edges = []
+    left_edges = []
+    up_edges = []
+    for y in range(len(row_values) + 1):
+        above = pixel_rows[y]
+        below = pixel_rows[y + 1]
+        right_edges.append(below & ~above)
+        down_edges.append((below & ~(below << 1)) >> 1)
+        left_edges.append((above & ~below) >> 1)
+        up_edges.append(above & ~(above >> 1))
+    return [right_edges, down_edges, left_edges, up_edges]
+
+
+def _trace_outline(pending_edges: list[list[int]], width: int, start_x: int, start_y: int, direction: int) -> list[tuple[int, int]]:
+    pending_edges[direction][start_y] ^= 1 << (width - start_x)
+    dx, dy = _DIRECTIONS[direction]
+    x = start_x + dx
+    y = start_y + dy
+    outline = [(start_x, start_y), (x, y)]
+
+    while x != start_x or y != start_y:
+        bit = 1 << (width - x)
+        for next_direction in _TURN_ORDERS[direction]:
+            edges = pending_edges[next_direction]
+            if edges[y] & bit:
+                edges[y] ^= bit
+
+                dx, dy = _DIRECTIONS[next_direction]
+                x += dx
+                y += dy
+                if (next_direction - direction) % 2 == 0:
+                    outline[-1] = x, y
+                else:
+                    outline.append((x, y))
+
+                direction = next_direction
+                break
+        else:
+            raise AssertionError()
+
+    outline.pop()
+    if _is_collinear(outline[-1], outline[0], outline[1]):
+        outline.pop(0)
+    return outline
+
+
 class SolidOutlinesPainter(OutlinesPainter):
     @staticmethod
-    def create_pixel_outlines(bitmap: list[list[int]]) -> list[list[tuple[int, int]]]:
-        edges = []
-        pending_edges = set()
-        for y, bitmap_row in enumerate(bitmap):
-            for x, pixel in enumerate(bitmap_row):
-                if pixel == 0:
-                    continue
-
-                if not _is_solid(bitmap, x, y - 1):
-                    edge = (x, y), (x + 1, y)
-                    edges.append(edge)
-                    pending_edges.add(edge)
-
-                if not _is_solid(bitmap, x + 1, y):
-                    edge = (x + 1, y), (x + 1, y + 1)
-                    edges.append(edge)
-                    pending_edges.add(edge)
-
-                if not _is_solid(bitmap, x, y + 1):
-                    edge = (x + 1, y + 1), (x, y + 1)
-                    edges.append(edge)
-                    pending_edges.add(edge)
-
-                if not _is_solid(bitmap, x - 1, y):
-                    edge = (x, y + 1), (x, y)
-                    edges.append(edge)
-                    pending_edges.add(edge)
-
+    def create_pixel_outlines(bitmap: list[list[int]] | PackedBitmap) -> list[list[tuple[int, int]]]:
+        if not isinstance(bitmap, PackedBitmap):
+            bitmap = PackedBitmap.from_bitmap(bitmap)
+        width = bitmap.width
+        pending_edges = _create_pending_edges(bitmap.row_values())
+        right_edges, down_edges, left_edges, up_edges = pending_edges
+
+        # Outlines start from pending edges in the order of pixels, and top, right, bottom, left in each pixel.
         outlines = []
-        for start_point, current_point in edges:
-            if (start_point, current_point) not in pending_edges:
-                continue
-            pending_edges.remove((start_point, current_point))
-            outline = [start_point, current_point]
-
-            dx = current_point[0] - start_point[0]
-            dy = current_point[1] - start_point[1]
-
-            while current_point != start_point:
-                x, y = current_point
-                for next_dx, next_dy in ((-dy, dx), (dx, dy), (dy, -dx), (-dx, -dy)):
-                    next_point = x + next_dx, y + next_dy
-                    edge = current_point, next_point
-                    if edge in pending_edges:
-                        pending_edges.remove(edge)
-
-                        if len(outline) >= 2 and _is_collinear(outline[-2], outline[-1], next_point):
-                            outline[-1] = next_point
-                        else:
-                            outline.append(next_point)
-
-                        current_point = next_point
-                        dx, dy = next_dx, next_dy
-                        break
-                else:
-                    raise AssertionError()
-
-            outline.pop()
-            if _is_collinear(outline[-1], outline[0], outline[1]):
-                outline.pop(0)
-            outlines.append(outline)
+        for y in range(bitmap.height):
+            pixels = right_edges[y] | (down_edges[y] << 1) | (left_edges[y + 1] << 1) | up_edges[y + 1]
+            while pixels != 0:
+                bit_index = pixels.bit_length() - 1
+                pixels ^= 1 << bit_index
+                x = width - bit_index
+
+                if right_edges[y] >> bit_index & 1:
+                    outlines.append(_trace_outline(pending_edges, width, x, y, 0))
+                if down_edges[y] >> (bit_index - 1) & 1:
+                    outlines.append(_trace_outline(pending_edges, width, x + 1, y, 1))
+                if left_edges[y + 1] >> (bit_index - 1) & 1:
+                    outlines.append(_trace_outline(pending_edges, width, x + 1, y + 1, 2))
+                if up_edges[y + 1] >> bit_index & 1:
+                    outlines.append(_trace_outline(pending_edges, width, x, y + 1, 3))
         return outlines
 
     def __eq__(self, other: object) -> bool:
@@ -83,19 +101,33 @@ class SolidOutlinesPainter(OutlinesPainter):
             return NotImplemented
         return True
 
+    def cache_key(self) -> str:
+        return f'{type(self).__module__}.{type(self).__qualname__}'
+
     def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
-        outlines = SolidOutlinesPainter.create_pixel_outlines(glyph.bitmap)
-        for outline in outlines:
-            for index, (x, y) in enumerate(outline):
-                x = (x + glyph.horizontal_offset_x) * px_to_units
-                y = (glyph.height + glyph.horizontal_offset_y - y) * px_to_units
-
-                if index == 0:
-                    pen.move_to((x, y))
-                else:
-                    pen.line_to((x, y))
+        for polygon in self.create_polygons(glyph, px_to_units):
+            pen.move_to(polygon[0])
+            for point in polygon[1:]:
+                pen.line_to(point)
             pen.close_path()
 
+    def create_polygons(self, glyph: Glyph, px_to_units: int) -> list[list[tuple[int, int]]]:
+        offset_x = glyph.horizontal_offset_x
+        offset_y = glyph.height + glyph.horizontal_offset_y
+        return [[((x + offset_x) * px_to_units, (offset_y - y) * px_to_units) for x, y in outline] for outline in SolidOutlinesPainter.create_pixel_outlines(glyph.packed_bitmap)]
+
+    def calculate_bounds(self, glyph: Glyph, px_to_units: int) -> tuple[float, float, float, float] | None:
+        ink_bbox = glyph.ink_bbox
+        if ink_bbox is None:
+            return None
+        left, top, right, bottom = ink_bbox
+        return (
+            (glyph.horizontal_offset_x + left) * px_to_units,
+            (glyph.height + glyph.horizontal_offset_y - bottom) * px_to_units,
+            (glyph.horizontal_offset_x + right) * px_to_units,
+            (glyph.height + glyph.horizontal_offset_y - top) * px_to_units,
+        )
+
     def copy(self) -> SolidOutlinesPainter:
         return self
 
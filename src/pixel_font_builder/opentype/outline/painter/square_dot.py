@@ -16,19 +16,41 @@ class SquareDotOutlinesPainter(OutlinesPainter):
             return NotImplemented
         return self.size == other.size
 
+    def cache_key(self) -> str:
+        return f'{type(self).__module__}.{type(self).__qualname__}:{self.size!r}'
+
     def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        for polygon in self.create_polygons(glyph, px_to_units):
+            pen.move_to(polygon[0])
+            for point in polygon[1:]:
+                pen.line_to(point)
+            pen.close_path()
+
+    def create_polygons(self, glyph: Glyph, px_to_units: int) -> list[list[tuple[float, float]]]:
         size = self.size * px_to_units
         offset = (1 - self.size) / 2 * px_to_units
-        for y, bitmap_row in enumerate(glyph.bitmap):
+        packed_bitmap = glyph.packed_bitmap
+        polygons = []
+        for y, row_value in enumerate(packed_bitmap.row_values()):
             y = (glyph.height + glyph.horizontal_offset_y - y) * px_to_units - offset
-            for x, pixel in enumerate(bitmap_row):
-                x = (x + glyph.horizontal_offset_x) * px_to_units + offset
-                if pixel != 0:
-                    pen.move_to((x, y))
-                    pen.line_to((x + size, y))
-                    pen.line_to((x + size, y - size))
-                    pen.line_to((x, y - size))
-                    pen.close_path()
+            for x in range(packed_bitmap.width):
+                if (row_value >> (packed_bitmap.width - 1 - x)) & 1:
+                    x = (x + glyph.horizontal_offset_x) * px_to_units + offset
+                    polygons.append([(x, y), (x + size, y), (x + size, y - size), (x, y - size)])
+        return polygons
+
+    def calculate_bounds(self, glyph: Glyph, px_to_units: int) -> tuple[float, float, float, float] | None:
+        ink_bbox = glyph.ink_bbox
+        if ink_bbox is None:
+            return None
+        left, top, right, bottom = ink_bbox
+        offset = (1 - self.size) / 2 * px_to_units
+        return (
+            (left + glyph.horizontal_offset_x) * px_to_units + offset,
+            (glyph.height + glyph.horizontal_offset_y - bottom + 1) * px_to_units - offset - self.size * px_to_units,
+            (right - 1 + glyph.horizontal_offset_x) * px_to_units + offset + self.size * px_to_units,
+            (glyph.height + glyph.horizontal_offset_y - top) * px_to_units - offset,
+        )
 
     def copy(self) -> SquareDotOutlinesPainter:
         return SquareDotOutlinesPainter(self.size)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TtfGlyph
+
+import pixel_font_builder
+from pixel_font_builder.glyph import Glyph, LazyGlyph
+from pixel_font_builder.opentype.bitmap import GlyphBitmapFormat, create_bitmap_strike_data
+from pixel_font_builder.opentype.cache import XtfGlyphsData, BitmapStrikeData, BuildCache
+from pixel_font_builder.opentype.common import OutlineTableMode, BitmapTableMode, Flavor, create_font_builder
+from pixel_font_builder.opentype.outline.common import XtfGlyphResult, create_normal_xtf_glyphs, create_blank_xtf_glyphs
+from pixel_font_builder.opentype.outline.painter.base import OutlinesPainter
+
+
+class BuildSession(BuildCache):
+    # Fonts from earlier builds share glyph objects with later ones, so they should be saved before the next build.
+
+    changed_glyph_names: set[str]
+    _glyph_snapshots: dict[str, Glyph]
+    _outlines_options: tuple[int, OutlinesPainter] | None
+    _xtf_glyph_results: dict[tuple[bool, bool], dict[str, XtfGlyphResult]]
+    _compiled_ttf_glyphs: dict[bool, dict[str, bytes]]
+    _bitmap_formats: dict[str, tuple[int, GlyphBitmapFormat]]
+
+    def __init__(self, context: pixel_font_builder.FontBuilder):
+        super().__init__(context)
+        self.changed_glyph_names = set()
+        self._glyph_snapshots = {}
+        self._outlines_options = None
+        self._xtf_glyph_results = {}
+        self._compiled_ttf_glyphs = {}
+        self._bitmap_formats = {}
+
+    def update(self):
+        self._prepared_glyphs = None
+        self._name_strings = None
+        self._xtf_glyphs = {}
+        self._bitmap_strike_data = None
+
+        # Glyph data attached by the last build would make fontTools decompile the glyphs again.
+        for xtf_glyph_results in self._xtf_glyph_results.values():
+            for xtf_glyph, _, _ in xtf_glyph_results.values():
+                if isinstance(xtf_glyph, TtfGlyph) and 'data' in xtf_glyph.__dict__:
+                    del xtf_glyph.data
+
+        config = self.context.opentype_config
+        _, name_to_glyph = self.prepare_glyphs()
+
+        outlines_options = config.px_to_units, config.outlines_painter
+        if self._outlines_options != outlines_options:
+            self._outlines_options = config.px_to_units, config.outlines_painter.deepcopy()
+            self._xtf_glyph_results.clear()
+            self._compiled_ttf_glyphs.clear()
+
+        changed_glyph_names = {glyph_name for glyph_name, glyph in name_to_glyph.items() if self._glyph_snapshots.get(glyph_name) != glyph}
+        changed_glyph_names.update(self._glyph_snapshots.keys() - name_to_glyph.keys())
+        for glyph_name in changed_glyph_names:
+            glyph = name_to_glyph.get(glyph_name)
+            if glyph is None:
+                self._glyph_snapshots.pop(glyph_name)
+            elif isinstance(glyph, LazyGlyph) and not glyph.is_loaded:
+                # Copies of lazy glyphs would load the changed source, so the snapshot keeps the packed bitmap.
+                self._glyph_snapshots[glyph_name] = Glyph(glyph.name, glyph.horizontal_offset, glyph.advance_width, glyph.vertical_offset, glyph.advance_height, glyph.packed_bitmap)
+            else:
+                self._glyph_snapshots[glyph_name] = glyph.deepcopy()
+            for xtf_glyph_results in self._xtf_glyph_results.values():
+                xtf_glyph_results.pop(glyph_name, None)
+            for compiled_ttf_glyphs in self._compiled_ttf_glyphs.values():
+                compiled_ttf_glyphs.pop(glyph_name, None)
+            self._bitmap_formats.pop(glyph_name, None)
+        self.changed_glyph_names = changed_glyph_names
+
+    def get_xtf_glyphs(self, is_ttf: bool, is_blank: bool) -> XtfGlyphsData:
+        key = is_ttf, is_blank
+        if key not in self._xtf_glyphs:
+            config = self.context.opentype_config
+            _, name_to_glyph = self.prepare_glyphs()
+            xtf_glyph_results = self._xtf_glyph_results.setdefault(key, {})
+
+            missing_name_to_glyph = {glyph_name: glyph for glyph_name, glyph in name_to_glyph.items() if glyph_name not in xtf_glyph_results}
+            if len(missing_name_to_glyph) > 0:
+                if is_blank:
+                    xtf_glyphs, horizontal_metrics, vertical_metrics = create_blank_xtf_glyphs(is_ttf, missing_name_to_glyph, config.px_to_units)
+                else:
+                    xtf_glyphs, horizontal_metrics, vertical_metrics = create_normal_xtf_glyphs(is_ttf, config.outlines_painter, missing_name_to_glyph, config.px_to_units, config.max_workers, config.outlines_cache)
+                for glyph_name in missing_name_to_glyph:
+                    xtf_glyph_results[glyph_name] = xtf_glyphs[glyph_name], horizontal_metrics[glyph_name], vertical_metrics[glyph_name]
+
+            xtf_glyphs = {}
+            horizontal_metrics = {}
+            vertical_metrics = {}
+            for glyph_name in name_to_glyph:
+                xtf_glyphs[glyph_name], horizontal_metrics[glyph_name], vertical_metrics[glyph_name] = xtf_glyph_results[glyph_name]
+            self._xtf_glyphs[key] = xtf_glyphs, horizontal_metrics, vertical_metrics
+        return self._xtf_glyphs[key]
+
+    def get_bitmap_strike_data(self) -> BitmapStrikeData:
+        if self._bitmap_strike_data is None:
+            config = self.context.opentype_config
+            glyph_order, name_to_glyph = self.prepare_glyphs()
+            self._bitmap_strike_data = create_bitmap_strike_data(self.context.font_metric, config.has_vertical_metrics, glyph_order, name_to_glyph, self._bitmap_formats, config.deduplicate_bitmaps, config.optimize_bitmap_index)
+        return self._bitmap_strike_data
+
+    def to_otf_builder(
+            self,
+            outline_table_mode: OutlineTableMode = OutlineTableMode.NORMAL,
+            bitmap_table_mode: BitmapTableMode = BitmapTableMode.NONE,
+            flavor: Flavor | None = None,
+    ) -> FontBuilder:
+        self.update()
+        return create_font_builder(self.context, False, outline_table_mode, bitmap_table_mode, flavor, self, self.context.instrumentation)
+
+    def to_ttf_builder(
+            self,
+            outline_table_mode: OutlineTableMode = OutlineTableMode.NORMAL,
+            bitmap_table_mode: BitmapTableMode = BitmapTableMode.NONE,
+            flavor: Flavor | None = None,
+    ) -> FontBuilder:
+        self.update()
+        builder = create_font_builder(self.context, True, outline_table_mode, bitmap_table_mode, flavor, self, self.context.instrumentation)
+
+        # When bounding boxes are not recalculated, fontTools writes the data of a glyph as is,
+        # so unchanged glyphs are compiled only once per session.
+        if outline_table_mode in (OutlineTableMode.NORMAL, OutlineTableMode.BLANK_GLYPHS) and not builder.font.recalcBBoxes:
+            compiled_ttf_glyphs = self._compiled_ttf_glyphs.setdefault(outline_table_mode == OutlineTableMode.BLANK_GLYPHS, {})
+            for glyph_name, xtf_glyph in builder.font['glyf'].glyphs.items():
+                # Composite glyphs refer to glyph ids, which may change between builds.
+                if xtf_glyph.isComposite():
+                    continue
+                data = compiled_ttf_glyphs.get(glyph_name)
+                if data is None:
+                    data = xtf_glyph.compile(None)
+                    compiled_ttf_glyphs[glyph_name] = data
+                xtf_glyph.data = data
+        return builder
@@ -0,0 +1,196 @@
+import re
+import sys
+from array import array
+from collections import Counter, defaultdict
+from itertools import count
+
+from fontTools.cffLib import SubrsIndex
+from fontTools.misc.psCharStrings import T2CharString as OtfGlyph, encodeIntT2, calcSubrBias
+from fontTools.ttLib import TTFont
+
+from pixel_font_builder.opentype.outline.charstring import compile_otf_program
+
+_NUMBER = rb'(?:[\x20-\xf6]|[\xf7-\xfe][\x00-\xff]|\x1c[\x00-\xff]{2}|\xff[\x00-\xff]{4})'
+# The operators rlineto, hlineto, vlineto, rrcurveto, rmoveto, hmoveto, rcurveline, rlinecurve, vvcurveto, hhcurveto, vmoveto, vhcurveto and hvcurveto.
+_PATH_OPERATOR = rb'[\x04-\x08\x15\x16\x18-\x1b\x1e\x1f]'
+# A command: the arguments and the operator, where the operator is a path operator or endchar.
+_COMMAND = re.compile(_NUMBER + rb'*(?:' + _PATH_OPERATOR + rb'|\x0e)')
+# The width, which is an extra argument of the first operator.
+_WIDTH = re.compile(_NUMBER + rb'(?=' + _NUMBER + rb'{2}\x15|' + _NUMBER + rb'[\x16\x04]|\x0e)')
+# A charstring without the width, made of path commands and ending with endchar without arguments.
+# Charstrings with other operators, such as hints and subroutine calls, are left as they are.
+_PATH_CHARSTRING = re.compile(rb'(?:' + _NUMBER + rb'*' + _PATH_OPERATOR + rb')*\x0e')
+
+_ENDCHAR = b'\x0e'
+_CALLSUBR = b'\x0a'
+_CALLGSUBR = b'\x1d'
+_RETURN = b'\x0b'
+
+# The subroutine nesting limit of Type 2 charstrings.
+_MAX_NESTING = 10
+# The estimated size of a subroutine call, and the offset of a subroutine in the index.
+_CALL_SIZE = 2.5
+_OFFSET_SIZE = 2
+# Subroutines saving fewer bytes are not worth it, since they make the charstrings compress worse in WOFF2.
+_MIN_SAVING = 16
+# The max number of subroutines in an index, and the max token of the strings.
+_MAX_SUBROUTINES_COUNT = 65535
+_MAX_TOKEN = 0x10FFFF
+
+
+def _count_pairs(text: str) -> Counter[int]:
+    # Pairs are read from the text in UTF-32 as 64-bit integers, which is faster than counting tuples of characters.
+    data = text.encode('utf-32-le', 'surrogatepass')
+    pairs = Counter()
+    for start in (0, 4):
+        values = array('Q')
+        values.frombytes(data[start:start + (len(data) - start) // 8 * 8])
+        if sys.byteorder != 'little':
+            values.byteswap()
+        pairs.update(values)
+    return pairs
+
+
+def subroutinize_charstrings(font: TTFont):
+    # Repeated pairs of path commands are replaced with new tokens round by round, like Re-Pair compression.
+    cff = font['CFF '].cff
+    top_dict = cff.topDictIndex[0]
+    if hasattr(top_dict, 'FDArray') or len(cff.GlobalSubrs) > 0 or hasattr(top_dict.Private, 'Subrs'):
+        return
+    char_strings = top_dict.CharStrings
+
+    glyph_names = []
+    widths = []
+    datas = []
+    for glyph_name in font.getGlyphOrder():
+        char_string = char_strings[glyph_name]
+        data = char_string.bytecode
+        if data is None:
+            data = compile_otf_program(char_string.program)
+            if data is None:
+                continue
+        match = _WIDTH.match(data)
+        width = match.group() if match is not None else b''
+        data = data[len(width):]
+        if _PATH_CHARSTRING.fullmatch(data) is not None:
+            glyph_names.append(glyph_name)
+            widths.append(width)
+            datas.append(data)
+    commands = _COMMAND.findall(b''.join(datas))
+
+    # The tokens of commands, where `endchar` is 0, which is added first.
+    command_to_token = defaultdict(count().__next__)
+    _ = command_to_token[_ENDCHAR]
+    text = ''.join(map(chr, map(command_to_token.__getitem__, commands)))
+    if len(command_to_token) > _MAX_TOKEN:
+        return
+    token_to_data = list(command_to_token)
+    sizes = [len(data) for data in token_to_data]
+    depths = [0] * len(sizes)
+    bodies = {}
+
+    def add_subroutine(body: tuple[int, ...]) -> str:
+        token = len(sizes)
+        sizes.append(_CALL_SIZE)
+        depths.append(max(depths[child] for child in body) + 1)
+        bodies[token] = body
+        return chr(token)
+
+    def calculate_saving(size: float, uses_count: int) -> float:
+        return uses_count * (size - _CALL_SIZE) - (size + len(_RETURN) + _OFFSET_SIZE)
+
+    # Repeated single commands.
+    replacements = {}
+    for char, uses_count in Counter(text).items():
+        token = ord(char)
+        if token != 0 and calculate_saving(sizes[token], uses_count) > _MIN_SAVING:
+            replacements[token] = add_subroutine((token,))
+    text = text.translate(replacements)
+
+    # Pairs of adjacent tokens. In a round, a token is either the first or the second of the chosen pairs,
+    # or a pair of itself only, so the pairs rarely overlap, and all of them are replaced in one pass.
+    while True:
+        candidates = []
+        for pair, uses_count in _count_pairs(text).items():
+            if uses_count < 2:
+                continue
+            token_1 = pair & 0xFFFFFFFF
+            token_2 = pair >> 32
+            if token_1 == 0 or token_2 == 0:
+                continue
+            size = sizes[token_1] + sizes[token_2]
+            saving = calculate_saving(size, uses_count)
+            if saving > _MIN_SAVING and depths[token_1] < _MAX_NESTING and depths[token_2] < _MAX_NESTING:
+                candidates.append((saving, token_1, token_2))
+        candidates.sort(reverse=True)
+
+        first_tokens = set()
+        second_tokens = set()
+        replacements = {}
+        for _, token_1, token_2 in candidates:
+            if token_1 in second_tokens or token_2 in first_tokens or len(sizes) >= _MAX_TOKEN:
+                continue
+            first_tokens.add(token_1)
+            second_tokens.add(token_2)
+            replacements[chr(token_1) + chr(token_2)] = add_subroutine((token_1, token_2))
+        if len(replacements) == 0:
+            break
+        first_chars = re.escape(''.join(map(chr, first_tokens)))
+        second_chars = re.escape(''.join(map(chr, second_tokens)))
+        pattern = re.compile(f'[{first_chars}][{second_chars}]')
+        text = pattern.sub(lambda match: replacements.get(match.group()) or match.group(), text)
+
+    # Keep the subroutines that save space with the number of times they are finally called,
+    # from the outermost, since the calls of an inlined subroutine move to its callers.
+    uses_counts = Counter(map(ord, text))
+    kept_tokens = []
+    for token in sorted(bodies, reverse=True):
+        uses_count = uses_counts[token]
+        if calculate_saving(sum(sizes[child] for child in bodies[token]), uses_count) > _MIN_SAVING:
+            kept_tokens.append(token)
+            for child in bodies[token]:
+                uses_counts[child] += 1
+        else:
+            for child in bodies[token]:
+                uses_counts[child] += uses_count
+    kept_tokens.sort(key=lambda token: uses_counts[token], reverse=True)
+    kept_tokens = kept_tokens[:_MAX_SUBROUTINES_COUNT * 2]
+
+    # The most used subroutines get the shortest numbers, alternating between the local and global subroutines.
+    private = top_dict.Private
+    global_subroutines = cff.GlobalSubrs
+    token_to_call = {}
+    subroutines_tokens = []
+    for tokens, operator in ((kept_tokens[0::2], _CALLSUBR), (kept_tokens[1::2], _CALLGSUBR)):
+        bias = calcSubrBias(tokens)
+        indices = sorted(range(len(tokens)), key=lambda index: len(encodeIntT2(index - bias)))
+        index_to_token = [0] * len(tokens)
+        for token, index in zip(tokens, indices):
+            token_to_call[token] = encodeIntT2(index - bias) + operator
+            index_to_token[index] = token
+        subroutines_tokens.append(index_to_token)
+
+    inlined_token_to_data = {}
+
+    def encode(token: int) -> bytes:
+        if token < len(token_to_data):
+            return token_to_data[token]
+        if token in token_to_call:
+            return token_to_call[token]
+        if token not in inlined_token_to_data:
+            inlined_token_to_data[token] = encode_body(token)
+        return inlined_token_to_data[token]
+
+    def encode_body(token: int) -> bytes:
+        return b''.join(map(encode, bodies[token]))
+
+    local_subroutines = SubrsIndex()
+    for subroutines, tokens in zip((local_subroutines, global_subroutines), subroutines_tokens):
+        for token in tokens:
+            subroutines.append(OtfGlyph(bytecode=encode_body(token) + _RETURN, private=private, globalSubrs=global_subroutines))
+    if len(local_subroutines) > 0:
+        private.Subrs = local_subroutines
+
+    for glyph_name, width, glyph_text in zip(glyph_names, widths, text.split('\0')):
+        data = width + b''.join(map(encode, map(ord, glyph_text))) + _ENDCHAR
+        char_strings[glyph_name] = OtfGlyph(bytecode=data, private=private, globalSubrs=global_subroutines)
@@ -1,2 +1,3 @@
-from pixel_font_builder.pcf.common import create_font_builder
+from pixel_font_builder.pcf.common import create_font_builder, save_font
 from pixel_font_builder.pcf.config import Config
+from pixel_font_builder.pcf.loader import load_glyphs
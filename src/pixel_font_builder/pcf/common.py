@@ -2,17 +2,42 @@ from __future__ import annotations
 
 import math
 import statistics
+from collections.abc import Sequence
+from os import PathLike
 
 from pcffont import PcfFontBuilder, PcfGlyph, PcfBdfEncodings
 
 import pixel_font_builder
-from pixel_font_builder.glyph import Glyph
+from pixel_font_builder.glyph import Glyph, PackedBitmap
+from pixel_font_builder.instrumentation import Instrumentation, measure_stage
 from pixel_font_builder.meta import WeightName, SlantStyle, WidthStyle
 from pixel_font_builder.metric import FontMetric
 from pixel_font_builder.pcf.config import Config
 
 
-def _create_glyphs(glyph: Glyph, encoding: int, font_metric: FontMetric, config: Config) -> PcfGlyph:
+class _PackedBitmapRows(Sequence[list[int]]):
+    glyph: Glyph
+
+    def __init__(self, glyph: Glyph):
+        self.glyph = glyph
+
+    def __len__(self) -> int:
+        return self.glyph.height
+
+    def __getitem__(self, index):
+        packed_bitmap = self.glyph.packed_bitmap
+        if isinstance(index, slice):
+            return [packed_bitmap.to_bitmap_row(y) for y in range(packed_bitmap.height)[index]]
+        return packed_bitmap.to_bitmap_row(range(packed_bitmap.height)[index])
+
+
+def _create_glyphs(glyph: Glyph, encoding: int, font_metric: FontMetric, config: Config, lazy_bitmap: bool = False) -> PcfGlyph:
+    if not glyph.is_packed:
+        bitmap = glyph.bitmap
+    elif lazy_bitmap:
+        bitmap = _PackedBitmapRows(glyph)
+    else:
+        bitmap = glyph.packed_bitmap.to_bitmap()
     return PcfGlyph(
         name=glyph.name,
         encoding=encoding,
@@ -20,15 +45,16 @@ def _create_glyphs(glyph: Glyph, encoding: int, font_metric: FontMetric, config:
         character_width=glyph.advance_width,
         dimensions=glyph.dimensions,
         offset=glyph.horizontal_offset,
-        bitmap=glyph.bitmap,
+        bitmap=bitmap,
     )
 
 
-def create_font_builder(context: pixel_font_builder.FontBuilder) -> PcfFontBuilder:
+def _create_font_builder(context: pixel_font_builder.FontBuilder, lazy_bitmap: bool, instrumentation: Instrumentation | None) -> PcfFontBuilder:
     config = context.pcf_config
     font_metric = context.font_metric
     meta_info = context.meta_info
-    _, name_to_glyph = context.prepare_glyphs()
+    with measure_stage(instrumentation, 'pcf.prepare_glyphs'):
+        _, name_to_glyph = context.prepare_glyphs()
     character_mapping = context.character_mapping
 
     builder = PcfFontBuilder()
@@ -40,11 +66,12 @@ def create_font_builder(context: pixel_font_builder.FontBuilder) -> PcfFontBuild
     builder.config.glyph_pad = config.glyph_pad
     builder.config.scan_unit = config.scan_unit
 
-    builder.glyphs.append(_create_glyphs(name_to_glyph['.notdef'], PcfBdfEncodings.NO_ENCODING, font_metric, config))
-    for code_point, glyph_name in sorted(character_mapping.items()):
-        if code_point > 0xFFFF:
-            break
-        builder.glyphs.append(_create_glyphs(name_to_glyph[glyph_name], code_point, font_metric, config))
+    with measure_stage(instrumentation, 'pcf.glyphs', len(character_mapping) + 1):
+        builder.glyphs.append(_create_glyphs(name_to_glyph['.notdef'], PcfBdfEncodings.NO_ENCODING, font_metric, config, lazy_bitmap))
+        for code_point, glyph_name in sorted(character_mapping.items()):
+            if code_point > 0xFFFF:
+                break
+            builder.glyphs.append(_create_glyphs(name_to_glyph[glyph_name], code_point, font_metric, config, lazy_bitmap))
 
     if meta_info.manufacturer is not None:
         builder.properties.foundry = meta_info.manufacturer.replace('-', '_')
@@ -97,3 +124,20 @@ def create_font_builder(context: pixel_font_builder.FontBuilder) -> PcfFontBuild
     builder.properties['LICENSE'] = meta_info.license_info
 
     return builder
+
+
+def create_font_builder(
+        context: pixel_font_builder.FontBuilder,
+        instrumentation: Instrumentation | None = None,
+) -> PcfFontBuilder:
+    return _create_font_builder(context, False, instrumentation)
+
+
+def save_font(
+        context: pixel_font_builder.FontBuilder,
+        file_path: str | PathLike[str],
+        instrumentation: Instrumentation | None = None,
+):
+    builder = _create_font_builder(context, True, instrumentation)
+    with measure_stage(instrumentation, 'pcf.save', len(builder.glyphs)):
+        builder.save(file_path)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import os
+from array import array
+from os import PathLike
+from pathlib import Path
+
+from pcffont import PcfFont, PcfTableType, PcfMetrics, PcfBdfEncodings, PcfGlyphNames
+from pcffont.error import PcfParseError
+from pcffont.header import PcfHeader
+from pcffont.utils.stream import Stream
+
+from pixel_font_builder.glyph import PackedBitmap, Glyph
+
+_REVERSED_BITS = bytes(int(f'{value:08b}'[::-1], 2) for value in range(256))
+
+_SCAN_UNIT_TYPECODES = {
+    2: 'H',
+    4: 'I',
+}
+
+
+def _swap_bytes(data: bytes, scan_unit: int) -> bytes:
+    if scan_unit <= 1:
+        return data
+    size = len(data) // scan_unit * scan_unit
+    units = array(_SCAN_UNIT_TYPECODES[scan_unit], data[:size])
+    units.byteswap()
+    return units.tobytes() + data[size:]
+
+
+def _parse_packed_bitmaps(stream: Stream, header: PcfHeader, metrics: PcfMetrics) -> list[PackedBitmap]:
+    table_format = header.read_and_check_table_format(stream)
+
+    glyphs_count = stream.read_uint32(table_format.ms_byte_first)
+    bitmap_offsets = stream.read_uint32_list(glyphs_count, table_format.ms_byte_first)
+    stream.seek(16, os.SEEK_CUR)  # bitmaps_size_configs
+    bitmaps_start = stream.tell()
+
+    packed_bitmaps = []
+    for bitmap_offset, metric in zip(bitmap_offsets, metrics):
+        width = metric.right_side_bearing - metric.left_side_bearing
+        height = metric.ascent + metric.descent
+        row_size = (width + table_format.glyph_pad * 8 - 1) // (table_format.glyph_pad * 8) * table_format.glyph_pad
+
+        stream.seek(bitmaps_start + bitmap_offset)
+        data = stream.read(row_size * height)
+        if table_format.ms_byte_first != table_format.ms_bit_first:
+            data = _swap_bytes(data, table_format.scan_unit)
+        if not table_format.ms_bit_first:
+            data = data.translate(_REVERSED_BITS)
+
+        shift = row_size * 8 - width
+        row_values = [int.from_bytes(data[i:i + row_size], 'big') >> shift for i in range(0, len(data), row_size)] if row_size > 0 else [0] * height
+        packed_bitmaps.append(PackedBitmap.from_row_values(width, row_values))
+    return packed_bitmaps
+
+
+def load_glyphs(file_path: str | PathLike[str]) -> tuple[list[Glyph], dict[int, str]]:
+    stream = Stream(Path(file_path).read_bytes())
+    headers = {header.table_type: header for header in PcfHeader.parse(stream)}
+    for table_type in (PcfTableType.METRICS, PcfTableType.BITMAPS, PcfTableType.BDF_ENCODINGS):
+        if table_type not in headers:
+            raise PcfParseError(f"missing table '{table_type.name}'")
+
+    font = PcfFont()
+    metrics = PcfMetrics.parse(stream, headers[PcfTableType.METRICS], font)
+    encodings = PcfBdfEncodings.parse(stream, headers[PcfTableType.BDF_ENCODINGS], font)
+    glyph_names = PcfGlyphNames.parse(stream, headers[PcfTableType.GLYPH_NAMES], font) if PcfTableType.GLYPH_NAMES in headers else None
+    packed_bitmaps = _parse_packed_bitmaps(stream, headers[PcfTableType.BITMAPS], metrics)
+
+    # Unencoded glyphs are stored at `NO_ENCODING`.
+    encoding_to_glyph_index = {encoding: glyph_index for encoding, glyph_index in sorted(encodings.items()) if encoding != PcfBdfEncodings.NO_ENCODING and glyph_index < len(metrics)}
+    glyph_index_to_encoding = {}
+    for encoding, glyph_index in encoding_to_glyph_index.items():
+        glyph_index_to_encoding.setdefault(glyph_index, encoding)
+
+    glyphs = []
+    for glyph_index, (metric, packed_bitmap) in enumerate(zip(metrics, packed_bitmaps)):
+        if glyph_names is not None:
+            glyph_name = glyph_names[glyph_index]
+        elif glyph_index in glyph_index_to_encoding:
+            glyph_name = f'u{glyph_index_to_encoding[glyph_index]:04X}'
+        else:
+            glyph_name = f'glyph{glyph_index}'
+        glyphs.append(Glyph(
+            name=glyph_name,
+            horizontal_offset=(metric.left_side_bearing, -metric.descent),
+            advance_width=metric.character_width,
+            bitmap=packed_bitmap,
+        ))
+
+    character_mapping = {encoding: glyphs[glyph_index].name for encoding, glyph_index in encoding_to_glyph_index.items()}
+
+    if all(glyph.name != '.notdef' for glyph in glyphs):
+        default_glyph_index = encodings.get(encodings.default_char, PcfBdfEncodings.NO_GLYPH_INDEX)
+        if default_glyph_index < len(glyphs):
+            notdef_glyph = glyphs[default_glyph_index].copy()
+            notdef_glyph.name = '.notdef'
+            glyphs.insert(0, notdef_glyph)
+
+    return glyphs, character_mapping
@@ -0,0 +1,59 @@
+import io
+from collections.abc import Callable
+
+import pytest
+from bdffont import BdfFont
+
+from pixel_font_builder import FontBuilder, Glyph, bdf
+
+
+def _add_glyphs(builder: FontBuilder, packed: bool) -> FontBuilder:
+    builder.glyphs.extend([
+        Glyph(
+            name='CAP_LETTER_A',
+            advance_width=10,
+            bitmap=[
+                [0, 1, 1, 1, 1, 1, 1, 1, 1, 0],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+            ],
+        ),
+        Glyph(
+            name='EMOJI',
+            advance_width=4,
+            bitmap=[
+                [0, 1, 1, 0],
+                [1, 1, 1, 1],
+            ],
+        ),
+    ])
+    builder.character_mapping.update({
+        65: 'CAP_LETTER_A',
+        0x1F600: 'EMOJI',
+    })
+    if packed:
+        for glyph in builder.glyphs:
+            glyph.pack_bitmap()
+    return builder
+
+
+@pytest.mark.parametrize('packed', [False, True])
+@pytest.mark.parametrize('only_basic_plane', [False, True])
+def test_dump_font(create_builder: Callable[..., FontBuilder], packed: bool, only_basic_plane: bool):
+    builder = _add_glyphs(create_builder(), packed)
+    builder.bdf_config.only_basic_plane = only_basic_plane
+
+    stream = io.StringIO()
+    bdf.dump_font(builder, stream)
+
+    expected_builder = _add_glyphs(create_builder(), False)
+    expected_builder.bdf_config.only_basic_plane = only_basic_plane
+    assert stream.getvalue() == expected_builder.to_bdf_builder().dump_to_string()
+
+
+def test_dump_font_unexpected_trailer(monkeypatch: pytest.MonkeyPatch, create_builder: Callable[..., FontBuilder]):
+    dump_to_string = BdfFont.dump_to_string
+    monkeypatch.setattr(BdfFont, 'dump_to_string', lambda font: dump_to_string(font).replace('ENDFONT\n', ''))
+    with pytest.raises(RuntimeError):
+        bdf.dump_font(_add_glyphs(create_builder(), False), io.StringIO())
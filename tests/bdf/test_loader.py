@@ -0,0 +1,103 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+from bdffont.error import BdfMissingWordError
+
+from pixel_font_builder import FontBuilder, Glyph, bdf
+
+
+def _add_glyphs(builder: FontBuilder) -> FontBuilder:
+    # The vertical metrics are not saved.
+    builder.glyphs[0].advance_height = 0
+    builder.glyphs.extend([
+        Glyph(
+            name='CAP_LETTER_A',
+            horizontal_offset=(1, -1),
+            advance_width=12,
+            bitmap=[
+                [0, 1, 1, 1, 1, 1, 1, 1, 1, 0],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+            ],
+        ),
+        Glyph(
+            name='space',
+            advance_width=3,
+        ),
+    ])
+    builder.character_mapping.update({
+        32: 'space',
+        65: 'CAP_LETTER_A',
+    })
+    return builder
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_load_glyphs(create_builder: Callable[..., FontBuilder], max_workers: int, tmp_path: Path):
+    builder = _add_glyphs(create_builder())
+    file_path = tmp_path.joinpath('font.bdf')
+    builder.save_bdf(file_path)
+
+    glyphs, character_mapping = bdf.load_glyphs(file_path, max_workers)
+    assert character_mapping == builder.character_mapping
+    assert [glyph.name for glyph in glyphs] == ['.notdef', 'space', 'CAP_LETTER_A']
+    name_to_glyph = {glyph.name: glyph for glyph in glyphs}
+    for glyph in builder.glyphs:
+        assert name_to_glyph[glyph.name] == glyph
+        assert name_to_glyph[glyph.name].is_packed
+
+
+def test_load_glyphs_default_char(tmp_path: Path):
+    file_path = tmp_path.joinpath('font.bdf')
+    file_path.write_text('\n'.join([
+        'STARTFONT 2.1',
+        'FONT -Test-Test-Medium-R-Normal--4-40-75-75-P-40-ISO10646-1',
+        'SIZE 4 75 75',
+        'FONTBOUNDINGBOX 4 4 0 0',
+        'STARTPROPERTIES 1',
+        'DEFAULT_CHAR 63',
+        'ENDPROPERTIES',
+        'CHARS 1',
+        'STARTCHAR question',
+        'ENCODING 63',
+        'SWIDTH 1000 0',
+        'DWIDTH 4 0',
+        'BBX 3 2 0 1',
+        'BITMAP',
+        'E0',
+        '2',
+        'ENDCHAR',
+        'ENDFONT',
+        '',
+    ]))
+
+    glyphs, character_mapping = bdf.load_glyphs(file_path)
+    assert character_mapping == {63: 'question'}
+    assert [glyph.name for glyph in glyphs] == ['.notdef', 'question']
+    for glyph in glyphs:
+        assert glyph.horizontal_offset == (0, 1)
+        assert glyph.advance_width == 4
+        assert glyph.bitmap == [
+            [1, 1, 1],
+            [0, 0, 1],
+        ]
+
+
+def test_load_glyphs_missing_word(tmp_path: Path):
+    file_path = tmp_path.joinpath('font.bdf')
+    file_path.write_text('\n'.join([
+        'STARTFONT 2.1',
+        'STARTCHAR A',
+        'ENCODING 65',
+        'BBX 1 1 0 0',
+        'BITMAP',
+        '80',
+        'ENDCHAR',
+        'ENDFONT',
+    ]))
+
+    with pytest.raises(BdfMissingWordError) as info:
+        bdf.load_glyphs(file_path)
+    assert info.value.word == 'DWIDTH'
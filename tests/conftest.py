@@ -0,0 +1,26 @@
+from collections.abc import Callable
+
+import pytest
+
+from pixel_font_builder import FontBuilder, Glyph
+
+
+def _create_builder(font_size: int = 4) -> FontBuilder:
+    builder = FontBuilder()
+    builder.font_metric.font_size = font_size
+    builder.font_metric.horizontal_layout.ascent = font_size
+    builder.font_metric.vertical_layout.ascent = font_size // 2
+    builder.font_metric.vertical_layout.descent = -(font_size // 2)
+    builder.meta_info.family_name = 'Test'
+    builder.glyphs.append(Glyph(
+        name='.notdef',
+        advance_width=font_size,
+        advance_height=font_size,
+        bitmap=[[1 if x in (0, font_size - 1) or y in (0, font_size - 1) else 0 for x in range(font_size)] for y in range(font_size)],
+    ))
+    return builder
+
+
+@pytest.fixture
+def create_builder() -> Callable[..., FontBuilder]:
+    return _create_builder
@@ -0,0 +1,137 @@
+from copy import copy, deepcopy
+from pathlib import Path
+
+from pixel_font_builder import Glyph
+from pixel_font_builder.opentype import OutlinesPen, SolidOutlinesPainter, SquareDotOutlinesPainter, OutlinesCache
+from pixel_font_builder.opentype.outline.common import create_normal_xtf_glyphs
+
+
+def _create_name_to_glyph() -> dict[str, Glyph]:
+    name_to_glyph = {}
+    for index in range(8):
+        name = f'glyph_{index}'
+        name_to_glyph[name] = Glyph(
+            name=name,
+            horizontal_offset=(0, -1),
+            advance_width=4,
+            vertical_offset=(-2, 0),
+            advance_height=5,
+            bitmap=[[(index >> (x + y)) & 1 for x in range(4)] for y in range(5)],
+        )
+    return name_to_glyph
+
+
+def test_create_key():
+    glyph_1 = Glyph(name='A', advance_width=2, bitmap=[[1, 0], [0, 1]])
+    glyph_2 = Glyph(name='B', advance_width=2, bitmap=[[1, 0], [0, 1]])
+    glyph_3 = Glyph(name='A', advance_width=3, bitmap=[[1, 0], [0, 1]])
+    glyph_4 = Glyph(name='A', advance_width=2, bitmap=[[0, 1], [1, 0]])
+
+    key = OutlinesCache.create_key(True, 'solid', glyph_1, 100)
+    assert key == OutlinesCache.create_key(True, 'solid', glyph_2, 100)
+    assert key != OutlinesCache.create_key(False, 'solid', glyph_1, 100)
+    assert key != OutlinesCache.create_key(True, 'square_dot:0.8', glyph_1, 100)
+    assert key != OutlinesCache.create_key(True, 'solid', glyph_1, 50)
+    assert key != OutlinesCache.create_key(True, 'solid', glyph_3, 100)
+    assert key != OutlinesCache.create_key(True, 'solid', glyph_4, 100)
+
+
+def test_create_normal_xtf_glyphs(tmp_path: Path):
+    name_to_glyph = _create_name_to_glyph()
+    outlines_cache = OutlinesCache(tmp_path.joinpath('outlines.db'))
+    for is_ttf in (True, False):
+        for outlines_painter in (SolidOutlinesPainter(), SquareDotOutlinesPainter()):
+            results = create_normal_xtf_glyphs(is_ttf, outlines_painter, name_to_glyph, 100)
+            cold_results = create_normal_xtf_glyphs(is_ttf, outlines_painter, name_to_glyph, 100, outlines_cache=outlines_cache)
+            warm_results = create_normal_xtf_glyphs(is_ttf, outlines_painter, name_to_glyph, 100, outlines_cache=outlines_cache)
+
+            for xtf_glyphs, horizontal_metrics, vertical_metrics in (cold_results, warm_results):
+                assert list(xtf_glyphs) == list(results[0])
+                assert horizontal_metrics == results[1]
+                assert vertical_metrics == results[2]
+                for glyph_name, xtf_glyph in xtf_glyphs.items():
+                    if is_ttf:
+                        assert xtf_glyph.compile(None) == results[0][glyph_name].compile(None)
+                    else:
+                        xtf_glyph.compile()
+                        results[0][glyph_name].compile()
+                        assert xtf_glyph.bytecode == results[0][glyph_name].bytecode
+    assert len(outlines_cache) == 2 * 2 * len(name_to_glyph)
+
+
+class _StructuralOutlinesPainter:
+    """
+    A painter implementing the protocol structurally, without `cache_key`.
+    """
+
+    def __copy__(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def __deepcopy__(self, memo: dict) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _StructuralOutlinesPainter)
+
+    def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        SolidOutlinesPainter().draw_outlines(glyph, pen, px_to_units)
+
+    def copy(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def deepcopy(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+
+class _InheritedSolidOutlinesPainter(SolidOutlinesPainter):
+    pass
+
+
+class _RedrawnSolidOutlinesPainter(SolidOutlinesPainter):
+    def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        pen.move_to((0, 0))
+        pen.line_to((50, 0))
+        pen.line_to((50, 50))
+        pen.line_to((0, 50))
+        pen.close_path()
+
+
+def test_painter_cache_key():
+    assert SolidOutlinesPainter().cache_key() != _InheritedSolidOutlinesPainter().cache_key()
+    assert SquareDotOutlinesPainter().cache_key() != SquareDotOutlinesPainter(0.5).cache_key()
+
+
+def test_uncacheable_painter(tmp_path: Path):
+    name_to_glyph = _create_name_to_glyph()
+    outlines_cache = OutlinesCache(tmp_path.joinpath('outlines.db'))
+    for is_ttf in (True, False):
+        for outlines_painter in (_StructuralOutlinesPainter(), _RedrawnSolidOutlinesPainter()):
+            xtf_glyphs, _, _ = create_normal_xtf_glyphs(is_ttf, outlines_painter, name_to_glyph, 100, outlines_cache=outlines_cache)
+            assert list(xtf_glyphs) == list(name_to_glyph)
+    assert len(outlines_cache) == 0
+
+
+def test_evict(tmp_path: Path):
+    outlines_cache = OutlinesCache(tmp_path.joinpath('outlines.db'), max_size=10)
+    outlines_cache.put({b'a': (b'1234', (1, 2), (3, 4))})
+    outlines_cache.put({b'b': (b'1234', (1, 2), (3, 4))})
+    assert outlines_cache.get([b'a']) == {b'a': (b'1234', (1, 2), (3, 4))}
+    outlines_cache.put({b'c': (b'1234', (1, 2), (3, 4))})
+
+    assert len(outlines_cache) == 2
+    assert outlines_cache.size == 8
+    assert set(outlines_cache.get([b'a', b'b', b'c'])) == {b'a', b'c'}
+
+    outlines_cache.clear()
+    assert len(outlines_cache) == 0
+
+
+def test_copy():
+    outlines_cache_1 = OutlinesCache('outlines.db', max_size=1024)
+    outlines_cache_2 = copy(outlines_cache_1)
+    outlines_cache_3 = deepcopy(outlines_cache_1)
+
+    assert outlines_cache_1 == outlines_cache_2
+    assert outlines_cache_1 == outlines_cache_3
+    assert outlines_cache_1 is not outlines_cache_2
+    assert outlines_cache_1 is not outlines_cache_3
@@ -1,5 +1,6 @@
 from copy import copy, deepcopy
 
+from pixel_font_builder import PackedBitmap
 from pixel_font_builder.opentype import SolidOutlinesPainter
 
 
@@ -96,6 +97,19 @@ def test_create_pixel_outlines():
     ]
 
 
+def test_create_pixel_outlines_order():
+    bitmap = [
+        [0, 1, 1, 0, 1],
+        [1, 1, 0, 0, 1],
+        [1, 0, 1, 1, 1],
+        [1, 1, 1, 0, 0],
+    ]
+    assert SolidOutlinesPainter.create_pixel_outlines(bitmap) == [
+        [(1, 0), (3, 0), (3, 1), (2, 1), (2, 2), (1, 2), (1, 3), (2, 3), (2, 2), (4, 2), (4, 0), (5, 0), (5, 3), (3, 3), (3, 4), (0, 4), (0, 1), (1, 1)],
+    ]
+    assert SolidOutlinesPainter.create_pixel_outlines(PackedBitmap.from_bitmap(bitmap)) == SolidOutlinesPainter.create_pixel_outlines(bitmap)
+
+
 def test_copy():
     painter_1 = SolidOutlinesPainter()
     painter_2 = copy(painter_1)
@@ -0,0 +1,229 @@
+from fontTools.misc.psCharStrings import T2CharString as OtfGlyph
+from fontTools.ttLib.tables._g_l_y_f import Glyph as TtfGlyph
+
+from pixel_font_builder import Glyph
+from pixel_font_builder.opentype import OutlinesPainter, OutlinesPen, SolidOutlinesPainter, SquareDotOutlinesPainter
+from pixel_font_builder.opentype.outline.charstring import create_otf_glyph, compile_otf_glyph, compile_otf_program
+from pixel_font_builder.opentype.outline.common import create_normal_xtf_glyphs, deduplicate_ttf_glyphs
+from pixel_font_builder.opentype.outline.glyf import create_ttf_glyph, compile_ttf_glyph
+from pixel_font_builder.opentype.outline.pen.otf import OtfOutlinesPen
+from pixel_font_builder.opentype.outline.pen.ttf import TtfOutlinesPen
+
+
+def _create_name_to_glyph() -> dict[str, Glyph]:
+    name_to_glyph = {}
+    for index in range(16):
+        name = f'glyph_{index}'
+        name_to_glyph[name] = Glyph(
+            name=name,
+            horizontal_offset=(0, -1),
+            advance_width=4,
+            vertical_offset=(-2, 0),
+            advance_height=5,
+            bitmap=[[(index >> (x + y)) & 1 for x in range(4)] for y in range(5)],
+        )
+    return name_to_glyph
+
+
+class _StructuralOutlinesPainter:
+    """
+    A painter implementing the protocol structurally, without `create_polygons`.
+    """
+
+    def __copy__(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def __deepcopy__(self, memo: dict) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _StructuralOutlinesPainter)
+
+    def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        SolidOutlinesPainter().draw_outlines(glyph, pen, px_to_units)
+
+    def copy(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def deepcopy(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+
+def test_create_normal_xtf_glyphs_structural_painter():
+    name_to_glyph = _create_name_to_glyph()
+    for is_ttf in (True, False):
+        glyphs_1, horizontal_metrics_1, vertical_metrics_1 = create_normal_xtf_glyphs(is_ttf, SolidOutlinesPainter(), name_to_glyph, 100)
+        glyphs_2, horizontal_metrics_2, vertical_metrics_2 = create_normal_xtf_glyphs(is_ttf, _StructuralOutlinesPainter(), name_to_glyph, 100)
+
+        assert list(glyphs_1) == list(glyphs_2)
+        assert horizontal_metrics_1 == horizontal_metrics_2
+        assert vertical_metrics_1 == vertical_metrics_2
+        for glyph_name, glyph_1 in glyphs_1.items():
+            glyph_2 = glyphs_2[glyph_name]
+            if is_ttf:
+                assert glyph_1.compile(None) == glyph_2.compile(None)
+            else:
+                glyph_1.compile()
+                glyph_2.compile()
+                assert glyph_1.bytecode == glyph_2.bytecode
+
+
+class _RedrawnSolidOutlinesPainter(SolidOutlinesPainter):
+    def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        pen.move_to((0, 0))
+        pen.line_to((50, 0))
+        pen.line_to((50, 50))
+        pen.line_to((0, 50))
+        pen.close_path()
+
+
+def test_create_normal_xtf_glyphs_redrawn_painter():
+    assert isinstance(_StructuralOutlinesPainter(), OutlinesPainter)
+
+    outlines_painter = _RedrawnSolidOutlinesPainter()
+    name_to_glyph = _create_name_to_glyph()
+    for is_ttf in (True, False):
+        for max_workers in (1, 2):
+            xtf_glyphs, horizontal_metrics, _ = create_normal_xtf_glyphs(is_ttf, outlines_painter, name_to_glyph, 100, max_workers)
+            for glyph_name, xtf_glyph in xtf_glyphs.items():
+                if is_ttf:
+                    pen = TtfOutlinesPen()
+                    outlines_painter.draw_outlines(name_to_glyph[glyph_name], pen, 100)
+                    assert xtf_glyph.compile(None) == pen.to_glyph().compile(None)
+                else:
+                    pen = OtfOutlinesPen(horizontal_metrics[glyph_name][0])
+                    outlines_painter.draw_outlines(name_to_glyph[glyph_name], pen, 100)
+                    expected_glyph = pen.to_glyph()
+                    expected_glyph.compile()
+                    xtf_glyph.compile()
+                    assert xtf_glyph.bytecode == expected_glyph.bytecode
+
+
+def test_create_normal_xtf_glyphs_parallel():
+    name_to_glyph = _create_name_to_glyph()
+    for is_ttf in (True, False):
+        serial_glyphs, serial_horizontal_metrics, serial_vertical_metrics = create_normal_xtf_glyphs(is_ttf, SolidOutlinesPainter(), name_to_glyph, 100)
+        parallel_glyphs, parallel_horizontal_metrics, parallel_vertical_metrics = create_normal_xtf_glyphs(is_ttf, SolidOutlinesPainter(), name_to_glyph, 100, 2)
+
+        assert list(serial_glyphs) == list(parallel_glyphs)
+        assert serial_horizontal_metrics == parallel_horizontal_metrics
+        assert serial_vertical_metrics == parallel_vertical_metrics
+        for glyph_name, serial_glyph in serial_glyphs.items():
+            parallel_glyph = parallel_glyphs[glyph_name]
+            if is_ttf:
+                assert serial_glyph.compile(None) == parallel_glyph.compile(None)
+            else:
+                serial_glyph.compile()
+                assert serial_glyph.bytecode == parallel_glyph.bytecode
+
+
+def test_deduplicate_ttf_glyphs():
+    name_to_glyph = _create_name_to_glyph()
+    name_to_glyph['glyph_16'] = name_to_glyph['glyph_5'].deepcopy()
+    name_to_glyph['glyph_17'] = name_to_glyph['glyph_0'].deepcopy()
+    glyph_order = list(name_to_glyph)
+    xtf_glyphs, _, _ = create_normal_xtf_glyphs(True, SolidOutlinesPainter(), name_to_glyph, 100)
+
+    deduplicated_glyphs = deduplicate_ttf_glyphs(glyph_order, xtf_glyphs)
+
+    assert list(deduplicated_glyphs) == glyph_order
+    assert deduplicated_glyphs['glyph_16'].isComposite()
+    assert [component.glyphName for component in deduplicated_glyphs['glyph_16'].components] == ['glyph_5']
+    assert deduplicated_glyphs['glyph_17'] is xtf_glyphs['glyph_17']
+    for glyph_name in glyph_order[:16]:
+        assert deduplicated_glyphs[glyph_name] is xtf_glyphs[glyph_name]
+
+
+def test_create_ttf_glyph_from_polygons():
+    name_to_glyph = _create_name_to_glyph()
+    name_to_glyph['space'] = Glyph(name='space', advance_width=4, advance_height=5)
+    name_to_glyph['wide'] = Glyph(name='wide', horizontal_offset=(-3, -2), advance_width=8, bitmap=[[1] * 300, [1, 0] * 150])
+    for outlines_painter in (SolidOutlinesPainter(), SquareDotOutlinesPainter(), SquareDotOutlinesPainter(0.77)):
+        for px_to_units in (1, 7, 100):
+            for glyph in name_to_glyph.values():
+                pen = TtfOutlinesPen()
+                outlines_painter.draw_outlines(glyph, pen, px_to_units)
+                expected_glyph = pen.to_glyph()
+                polygons = outlines_painter.create_polygons(glyph, px_to_units)
+                xtf_glyph = create_ttf_glyph(polygons)
+
+                assert xtf_glyph.numberOfContours == expected_glyph.numberOfContours
+                assert xtf_glyph.endPtsOfContours == expected_glyph.endPtsOfContours
+                assert xtf_glyph.flags == expected_glyph.flags
+                assert xtf_glyph.coordinates == expected_glyph.coordinates
+                assert compile_ttf_glyph(polygons) == xtf_glyph.compile(None) == expected_glyph.compile(None)
+
+
+def test_compile_ttf_glyph():
+    assert compile_ttf_glyph([]) == b''
+    assert compile_ttf_glyph([[(1, 1)]]) == b''
+    data = compile_ttf_glyph([[(0, 0), (0.5, 1000), (-1000, 1000), (0, 0)]])
+    assert data == create_ttf_glyph([[(0, 0), (0.5, 1000), (-1000, 1000)]]).compile(None)
+    xtf_glyph = TtfGlyph(data)
+    xtf_glyph.expand(None)
+    assert list(xtf_glyph.coordinates) == [(0, 0), (1, 1000), (-1000, 1000)]
+    assert (xtf_glyph.xMin, xtf_glyph.yMin, xtf_glyph.xMax, xtf_glyph.yMax) == (-1000, 0, 1, 1000)
+
+
+def test_create_otf_glyph_from_polygons():
+    name_to_glyph = _create_name_to_glyph()
+    name_to_glyph['space'] = Glyph(name='space', advance_width=4, advance_height=5)
+    name_to_glyph['wide'] = Glyph(name='wide', horizontal_offset=(-3, -2), advance_width=8, bitmap=[[1] * 300, [1, 0] * 150])
+    for outlines_painter in (SolidOutlinesPainter(), SquareDotOutlinesPainter(), SquareDotOutlinesPainter(0.77)):
+        for px_to_units in (1, 7, 100):
+            for glyph in name_to_glyph.values():
+                pen = OtfOutlinesPen(glyph.advance_width * px_to_units)
+                outlines_painter.draw_outlines(glyph, pen, px_to_units)
+                expected_glyph = pen.to_glyph()
+                polygons = outlines_painter.create_polygons(glyph, px_to_units)
+                otf_glyph = create_otf_glyph(polygons, glyph.advance_width * px_to_units)
+
+                assert otf_glyph.program == expected_glyph.program
+                otf_glyph.compile()
+                expected_glyph.compile()
+                assert compile_otf_glyph(polygons, glyph.advance_width * px_to_units) == otf_glyph.bytecode == expected_glyph.bytecode
+
+
+def test_compile_otf_glyph():
+    staircase = [(0, 30)]
+    for index in range(30):
+        staircase.extend([(index, index), (index + 1, index)])
+    staircase.append((30, 30))
+    cases = [
+        [],
+        [[(1, 1)]],
+        [[(1, 1)], [(2, 2), (2, 2)], [(3, 3)]],
+        [[(0, 0), (0, 100), (100, 100), (100, 0)], [(100, 200), (100, 300), (200, 300), (200, 200), (100, 200)]],
+        [[(0, 0), (50, 100), (100, 100), (100, 0)]],
+        [[(0, 0), (10, 0), (10, 0), (20, 0), (30, 0), (30, 10), (30, 20), (0, 20), (0, 20)]],
+        [[(0, 0), (10, 10), (20, 10), (30, 20), (30, 30), (40, 40), (40, 0)]],
+        [[(0.5, -0.5), (1.49, 0.5), (1.5, 2000.2), (-1.5, 2000.2)]],
+        [staircase],
+        [staircase, staircase[::-1], [(x, y * 2) for x, y in staircase]],
+    ]
+    for polygons in cases:
+        pen = OtfOutlinesPen(500)
+        for polygon in polygons:
+            pen.move_to(polygon[0])
+            for point in polygon[1:]:
+                pen.line_to(point)
+            pen.close_path()
+        expected_glyph = pen.to_glyph()
+        assert create_otf_glyph(polygons, 500).program == expected_glyph.program
+        expected_glyph.compile()
+        assert compile_otf_glyph(polygons, 500) == expected_glyph.bytecode
+
+
+def test_compile_otf_program():
+    programs = [
+        [500, 'endchar'],
+        [500, 100, -200, 'rmoveto', 1000, 'hlineto', -108, 108, 1131, -1132, 32767, -32768, 'rlineto', 'endchar'],
+        [10, 20, 'rmoveto', 1, 2, 3, 4, 5, 6, 'rrcurveto', 1, 2, 3, 4, 'hvcurveto', 1, 2, 3, 4, 'vhcurveto', 1, 2, 3, 4, 5, 'hhcurveto', 'endchar'],
+    ]
+    for program in programs:
+        expected_glyph = OtfGlyph(program=program)
+        expected_glyph.compile()
+        assert compile_otf_program(program) == expected_glyph.bytecode
+
+    assert compile_otf_program([0, 100, 'hstem', 'endchar']) is None
+    assert compile_otf_program([0.5, 0, 'rmoveto', 'endchar']) is None
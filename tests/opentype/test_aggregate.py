@@ -0,0 +1,107 @@
+from collections.abc import Callable
+
+import pytest
+
+from pixel_font_builder import FontBuilder, Glyph
+from pixel_font_builder.opentype import OutlinesPainter, OutlinesPen, SolidOutlinesPainter, SquareDotOutlinesPainter, CircleDotOutlinesPainter
+
+
+class _MeasuredOutlinesPainter(SolidOutlinesPainter):
+    def calculate_bounds(self, glyph: Glyph, px_to_units: int) -> tuple[float, float, float, float] | None:
+        raise NotImplementedError()
+
+
+class _WrongBoundsOutlinesPainter(SolidOutlinesPainter):
+    def calculate_bounds(self, glyph: Glyph, px_to_units: int) -> tuple[float, float, float, float] | None:
+        bounds = super().calculate_bounds(glyph, px_to_units)
+        if bounds is None:
+            return None
+        x_min, y_min, x_max, y_max = bounds
+        return x_min, y_min, x_max + px_to_units, y_max
+
+
+class _RedrawnOutlinesPainter(SolidOutlinesPainter):
+    def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        if glyph.ink_bbox is None:
+            return
+        pen.move_to((0, 0))
+        pen.line_to((px_to_units, 0))
+        pen.line_to((px_to_units, px_to_units))
+        pen.line_to((0, px_to_units))
+        pen.close_path()
+
+
+class _StructuralOutlinesPainter:
+    """
+    A painter implementing the protocol structurally, without the optional methods.
+    """
+
+    def __init__(self):
+        self._painter = SolidOutlinesPainter()
+
+    def __copy__(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def __deepcopy__(self, memo: dict) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _StructuralOutlinesPainter)
+
+    def draw_outlines(self, glyph: Glyph, pen: OutlinesPen, px_to_units: int):
+        self._painter.draw_outlines(glyph, pen, px_to_units)
+
+    def copy(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+    def deepcopy(self) -> '_StructuralOutlinesPainter':
+        return _StructuralOutlinesPainter()
+
+
+def _add_glyphs(builder: FontBuilder, outlines_painter: OutlinesPainter, px_to_units: int) -> FontBuilder:
+    builder.font_metric.horizontal_layout.ascent = 7
+    builder.font_metric.horizontal_layout.descent = -1
+    builder.opentype_config.outlines_painter = outlines_painter
+    builder.opentype_config.px_to_units = px_to_units
+    builder.opentype_config.verify_aggregate_metrics = True
+    builder.glyphs.append(Glyph(name='space', advance_width=4, advance_height=8))
+    builder.glyphs.append(Glyph(
+        name='A',
+        horizontal_offset=(1, -1),
+        advance_width=7,
+        vertical_offset=(-3, 1),
+        advance_height=8,
+        bitmap=[
+            [0, 0, 0, 0, 0],
+            [0, 0, 1, 0, 0],
+            [0, 1, 0, 1, 0],
+            [0, 1, 1, 1, 0],
+            [1, 0, 0, 0, 1],
+            [0, 0, 0, 0, 0],
+        ],
+    ))
+    builder.glyphs.append(Glyph(name='dot', horizontal_offset=(-1, 3), advance_width=2, advance_height=8, bitmap=[[1]]))
+    builder.character_mapping.update({0x20: 'space', 0x41: 'A', 0x2E: 'dot'})
+    return builder
+
+
+@pytest.mark.parametrize('outlines_painter', [SolidOutlinesPainter(), SquareDotOutlinesPainter(), SquareDotOutlinesPainter(0.77), CircleDotOutlinesPainter(), CircleDotOutlinesPainter(0.33), _MeasuredOutlinesPainter(), _RedrawnOutlinesPainter(), _StructuralOutlinesPainter()])
+@pytest.mark.parametrize('px_to_units', [1, 7, 100])
+@pytest.mark.parametrize('has_vertical_metrics', [True, False])
+def test_verify_aggregate_metrics(outlines_painter: OutlinesPainter, px_to_units: int, has_vertical_metrics: bool, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(8), outlines_painter, px_to_units)
+    builder.opentype_config.has_vertical_metrics = has_vertical_metrics
+    builder.to_otf_builder()
+    builder.to_ttf_builder()
+    builder.opentype_config.deduplicate_outlines = True
+    builder.to_ttf_builder()
+
+
+def test_verify_aggregate_metrics_mismatch(create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(8), _WrongBoundsOutlinesPainter(), 100)
+    with pytest.raises(RuntimeError):
+        builder.to_otf_builder()
+
+    builder.opentype_config.verify_aggregate_metrics = False
+    font = builder.to_otf_builder().font
+    assert font['head'].xMax == 900
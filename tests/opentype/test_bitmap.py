@@ -0,0 +1,100 @@
+from collections.abc import Callable
+from io import BytesIO
+
+import pytest
+from fontTools.ttLib import TTFont
+
+from pixel_font_builder import FontBuilder, Glyph
+from pixel_font_builder.opentype import OutlineTableMode, BitmapTableMode
+
+
+def _add_glyphs(builder: FontBuilder, has_vertical_metrics: bool, deduplicate_bitmaps: bool) -> FontBuilder:
+    builder.font_metric.horizontal_layout.ascent = 14
+    builder.font_metric.horizontal_layout.descent = -2
+    builder.opentype_config.has_vertical_metrics = has_vertical_metrics
+    builder.opentype_config.deduplicate_bitmaps = deduplicate_bitmaps
+    for index in range(4):
+        builder.glyphs.append(Glyph(
+            name=f'glyph_{index}',
+            advance_width=16,
+            advance_height=16,
+            bitmap=[[(x * y + index) % 5 == 0 for x in range(16)] for y in range(16)],
+        ))
+    for index in (1, 2, 3, 0):
+        glyph = builder.glyphs[1 + index].deepcopy()
+        glyph.name = f'duplicate_{index}'
+        builder.glyphs.append(glyph)
+    for code_point, glyph in enumerate(builder.glyphs[1:], 0x41):
+        builder.character_mapping[code_point] = glyph.name
+    return builder
+
+
+def _load_font(builder: FontBuilder) -> TTFont:
+    stream = BytesIO()
+    builder.to_ttf_builder(OutlineTableMode.NORMAL, BitmapTableMode.STANDARD).save(stream)
+    stream.seek(0)
+    return TTFont(stream)
+
+
+def _load_bitmaps(builder: FontBuilder) -> tuple[int, dict[str, list[bytes]]]:
+    font = _load_font(builder)
+
+    bitmaps = {}
+    glyph_ids = []
+    for index_sub_table in font['EBLC'].strikes[0].indexSubTables:
+        glyph_ids.extend(range(index_sub_table.firstGlyphIndex, index_sub_table.lastGlyphIndex + 1))
+        for glyph_name in index_sub_table.names:
+            bitmap_glyph = font['EBDT'].strikeData[0][glyph_name]
+            metrics = getattr(bitmap_glyph, 'metrics', None) or index_sub_table.metrics
+            bitmaps[glyph_name] = [bitmap_glyph.getRow(y, bitDepth=1, metrics=metrics) for y in range(metrics.height)]
+    assert len(glyph_ids) == len(set(glyph_ids))
+    return len(font.getTableData('EBDT')), bitmaps
+
+
+@pytest.mark.parametrize('has_vertical_metrics', [True, False])
+def test_deduplicate_bitmaps(has_vertical_metrics: bool, create_builder: Callable[..., FontBuilder]):
+    size, bitmaps = _load_bitmaps(_add_glyphs(create_builder(16), has_vertical_metrics, False))
+    deduplicated_size, deduplicated_bitmaps = _load_bitmaps(_add_glyphs(create_builder(16), has_vertical_metrics, True))
+
+    assert deduplicated_bitmaps == bitmaps
+    assert deduplicated_size == size - 32 * 4 - (0 if has_vertical_metrics else 5 * 4)
+
+
+def _add_mixed_glyphs(builder: FontBuilder, has_vertical_metrics: bool, optimize_bitmap_index: bool, sort_glyphs_by_metrics: bool) -> FontBuilder:
+    builder = _add_glyphs(builder, has_vertical_metrics, False)
+    builder.opentype_config.optimize_bitmap_index = optimize_bitmap_index
+    builder.opentype_config.sort_glyphs_by_metrics = sort_glyphs_by_metrics
+    for index in range(24):
+        width = 5 + index % 3 * 3
+        builder.glyphs.append(Glyph(
+            name=f'mixed_{index}',
+            horizontal_offset=(0, -2 + index % 2),
+            advance_width=width + 1,
+            advance_height=16,
+            bitmap=[[(x * (index + 1) + y) % 7 == 0 for x in range(width)] for y in range(12)],
+        ))
+    builder.glyphs.append(Glyph(name='space', advance_width=4, advance_height=16))
+    builder.character_mapping[0x20] = 'space'
+    return builder
+
+
+@pytest.mark.parametrize('has_vertical_metrics', [True, False])
+def test_optimize_bitmap_index(has_vertical_metrics: bool, create_builder: Callable[..., FontBuilder]):
+    sizes = []
+    glyph_bitmaps = None
+    for optimize_bitmap_index, sort_glyphs_by_metrics in ((False, False), (True, False), (True, True)):
+        builder = _add_mixed_glyphs(create_builder(16), has_vertical_metrics, optimize_bitmap_index, sort_glyphs_by_metrics)
+        font = _load_font(builder)
+        size, bitmaps = _load_bitmaps(builder)
+        if glyph_bitmaps is None:
+            glyph_bitmaps = bitmaps
+        assert bitmaps == glyph_bitmaps
+        sizes.append(size + len(font.getTableData('EBLC')))
+
+        index_formats = {index_sub_table.indexFormat for index_sub_table in font['EBLC'].strikes[0].indexSubTables}
+        if optimize_bitmap_index:
+            assert 2 in index_formats and 3 in index_formats
+        else:
+            assert 3 not in index_formats
+
+    assert sizes[0] > sizes[1] >= sizes[2]
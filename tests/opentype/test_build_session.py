@@ -0,0 +1,74 @@
+import datetime
+from collections.abc import Callable
+from io import BytesIO
+
+import fontTools.fontBuilder
+
+from pixel_font_builder import FontBuilder, Glyph, GlyphBitmapLoader, LazyGlyph
+from pixel_font_builder.opentype import OutlineTableMode, BitmapTableMode, BuildSession
+
+
+def _add_glyphs(builder: FontBuilder) -> FontBuilder:
+    builder.meta_info.created_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    builder.meta_info.modified_time = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    for index in range(8):
+        name = f'glyph_{index}'
+        builder.glyphs.append(Glyph(
+            name=name,
+            advance_width=4,
+            advance_height=4,
+            bitmap=[[(index >> (x + y)) & 1 for x in range(4)] for y in range(4)],
+        ))
+        builder.character_mapping[0x41 + index] = name
+    return builder
+
+
+def _to_bytes(builder: fontTools.fontBuilder.FontBuilder) -> bytes:
+    builder.font.recalcTimestamp = False
+    stream = BytesIO()
+    builder.save(stream)
+    return stream.getvalue()
+
+
+def test_update(create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder())
+    session = BuildSession(builder)
+
+    session.update()
+    assert session.changed_glyph_names == {glyph.name for glyph in builder.glyphs}
+
+    session.update()
+    assert session.changed_glyph_names == set()
+
+    builder.glyphs[1].bitmap[0][0] ^= 1
+    builder.glyphs.pop(2)
+    builder.character_mapping.pop(0x42)
+    builder.kerning_values[('glyph_0', 'glyph_2')] = -1
+    session.update()
+    assert session.changed_glyph_names == {'glyph_0', 'glyph_1'}
+
+
+def test_rebuild(create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder())
+    session = BuildSession(builder)
+    for _ in range(3):
+        assert _to_bytes(session.to_ttf_builder()) == _to_bytes(builder.to_ttf_builder())
+        assert _to_bytes(session.to_otf_builder()) == _to_bytes(builder.to_otf_builder())
+        assert _to_bytes(session.to_ttf_builder(OutlineTableMode.BLANK_GLYPHS, BitmapTableMode.STANDARD)) == _to_bytes(builder.to_ms_bitmap_ttf_builder())
+
+        builder.glyphs[3].bitmap[1][2] ^= 1
+        builder.glyphs[5].advance_width += 1
+
+
+def test_rebuild_lazy_glyph(create_builder: Callable[..., FontBuilder]):
+    bitmaps = {'lazy': [[0, 0, 1, 0], [0, 0, 1, 0]]}
+    loader = GlyphBitmapLoader(bitmaps.__getitem__)
+    builder = _add_glyphs(create_builder())
+    builder.glyphs.append(LazyGlyph('lazy', loader, advance_width=4, advance_height=4))
+    builder.character_mapping[0x61] = 'lazy'
+    session = BuildSession(builder)
+    for _ in range(2):
+        for font in (session.to_ttf_builder().font, builder.to_ttf_builder().font):
+            assert font['hmtx']['lazy'][1] == font['glyf']['lazy'].xMin
+        bitmaps['lazy'] = [[1, 0, 0, 0], [1, 0, 0, 0]]
+        loader.clear()
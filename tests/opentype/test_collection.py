@@ -0,0 +1,98 @@
+from collections.abc import Callable
+
+import pytest
+
+from pixel_font_builder import FontBuilder, Glyph
+from pixel_font_builder.opentype import FeatureFile
+from pixel_font_builder.opentype.collection import plan_shared_glyphs
+
+
+def _add_glyphs(builder: FontBuilder, glyphs: list[Glyph]) -> FontBuilder:
+    builder.glyphs.extend(glyphs)
+    for index, glyph in enumerate(glyphs):
+        builder.character_mapping[0x41 + index] = glyph.name
+    return builder
+
+
+def test_plan_shared_glyphs(create_builder: Callable[..., FontBuilder]):
+    builder_1 = _add_glyphs(create_builder(), [
+        Glyph(name='A', advance_width=4, bitmap=[[1, 0], [0, 1]]),
+        Glyph(name='B', advance_width=4, bitmap=[[1, 1], [0, 1]]),
+        Glyph(name='B.1', advance_width=4, bitmap=[[0, 0], [1, 1]]),
+    ])
+    builder_1.kerning_values[('A', 'B')] = -1
+    builder_2 = _add_glyphs(create_builder(), [
+        Glyph(name='A', advance_width=5, bitmap=[[1, 0], [0, 1]]),
+        Glyph(name='B', advance_width=5, bitmap=[[0, 1], [1, 1]]),
+    ])
+    builder_2.kerning_values[('A', 'B')] = -2
+
+    members = plan_shared_glyphs([builder_1, builder_2], True, False)
+    glyph_orders = [member.prepare_glyphs()[0] for member in members]
+    assert glyph_orders[0] == ['.notdef', 'A', 'B', 'B.1', 'B.2']
+    assert glyph_orders[1] == glyph_orders[0]
+
+    assert members[0].character_mapping == {0x41: 'A', 0x42: 'B', 0x43: 'B.1'}
+    assert members[1].character_mapping == {0x41: 'A', 0x42: 'B.2'}
+    assert members[0].kerning_values == {('A', 'B'): -1}
+    assert members[1].kerning_values == {('A', 'B.2'): -2}
+
+    # Metrics stay per font, and glyphs a font does not have use the metrics of the first font defining them.
+    assert [glyph.advance_width for glyph in members[0].glyphs] == [4, 4, 4, 4, 5]
+    assert [glyph.advance_width for glyph in members[1].glyphs] == [4, 5, 4, 4, 5]
+
+    # Embedded bitmaps contain the advances, so glyphs with other advances are not shared.
+    members = plan_shared_glyphs([builder_1, builder_2], True, True)
+    assert members[1].character_mapping == {0x41: 'A.1', 0x42: 'B.2'}
+
+
+def test_plan_shared_glyphs_in_font(create_builder: Callable[..., FontBuilder]):
+    builder_1 = _add_glyphs(create_builder(), [
+        Glyph(name='space', advance_width=4),
+        Glyph(name='ideographic_space', advance_width=8),
+        Glyph(name='A', advance_width=4, bitmap=[[1, 0], [0, 1]]),
+        Glyph(name='A.fw', advance_width=8, bitmap=[[1, 0], [0, 1]]),
+    ])
+    builder_2 = _add_glyphs(create_builder(), [
+        Glyph(name='A.fw', advance_width=8, bitmap=[[1, 0], [0, 1]]),
+        Glyph(name='A', advance_width=4, bitmap=[[1, 0], [0, 1]]),
+    ])
+
+    members = plan_shared_glyphs([builder_1, builder_2], True, False)
+    glyph_orders = [member.prepare_glyphs()[0] for member in members]
+    assert glyph_orders[0] == ['.notdef', 'space', 'ideographic_space', 'A', 'A.fw']
+    assert glyph_orders[1] == glyph_orders[0]
+    assert members[0].character_mapping == {0x41: 'space', 0x42: 'ideographic_space', 0x43: 'A', 0x44: 'A.fw'}
+    assert members[1].character_mapping == {0x41: 'A.fw', 0x42: 'A'}
+    assert [glyph.advance_width for glyph in members[0].glyphs] == [4, 4, 8, 4, 8]
+    assert [glyph.advance_width for glyph in members[1].glyphs] == [4, 4, 8, 4, 8]
+
+
+def test_plan_shared_glyphs_config(create_builder: Callable[..., FontBuilder]):
+    builder_1 = _add_glyphs(create_builder(), [Glyph(name='A', advance_width=4, bitmap=[[1, 0], [0, 1]])])
+    builder_2 = _add_glyphs(create_builder(), [Glyph(name='A', advance_width=4, bitmap=[[0, 1], [1, 0]])])
+    builder_2.opentype_config.sort_glyphs_by_metrics = True
+
+    members = plan_shared_glyphs([builder_1, builder_2], True, False)
+    assert not members[1].opentype_config.sort_glyphs_by_metrics
+    assert builder_2.opentype_config.sort_glyphs_by_metrics
+
+    builder_1.opentype_config.feature_files.append(FeatureFile('languagesystem DFLT dflt;'))
+    plan_shared_glyphs([builder_1, builder_2], True, False)
+    builder_2.opentype_config.feature_files.append(FeatureFile('languagesystem DFLT dflt;'))
+    with pytest.raises(ValueError):
+        plan_shared_glyphs([builder_1, builder_2], True, False)
+
+
+def test_plan_shared_glyphs_notdef(create_builder: Callable[..., FontBuilder]):
+    builder_1 = _add_glyphs(create_builder(), [Glyph(name='A', advance_width=4, bitmap=[[1, 0], [0, 1]])])
+    builder_2 = _add_glyphs(create_builder(), [Glyph(name='A', advance_width=4, bitmap=[[1, 0], [0, 1]])])
+    builder_2.glyphs[0].advance_width = 6
+
+    # TrueType outlines do not contain the advances, so the '.notdef' glyphs are shared with their own metrics.
+    members = plan_shared_glyphs([builder_1, builder_2], True, False)
+    assert [glyph.advance_width for glyph in members[1].glyphs] == [6, 4]
+
+    for is_ttf, has_bitmaps in ((True, True), (False, False)):
+        with pytest.raises(ValueError):
+            plan_shared_glyphs([builder_1, builder_2], is_ttf, has_bitmaps)
@@ -1,7 +1,7 @@
 from copy import copy, deepcopy
 from pathlib import Path
 
-from pixel_font_builder.opentype import FieldsOverride, FeatureFile, Config, SolidOutlinesPainter
+from pixel_font_builder.opentype import FieldsOverride, KerningMode, FeatureFile, Config, SolidOutlinesPainter, OutlinesCache, FeaturesCache
 
 
 def test_copy():
@@ -23,6 +23,17 @@ def test_copy():
                 file_path=Path('test.fea'),
             ),
         ],
+        max_workers=4,
+        outlines_cache=OutlinesCache('test.db'),
+        deduplicate_bitmaps=True,
+        deduplicate_outlines=True,
+        kerning_mode=KerningMode.GLYPH_CLASSES,
+        direct_kerning=True,
+        features_cache=FeaturesCache('features.db'),
+        optimize_bitmap_index=True,
+        sort_glyphs_by_metrics=True,
+        verify_aggregate_metrics=True,
+        subroutinize_charstrings=True,
     )
     config_2 = copy(config_1)
 
@@ -31,6 +42,7 @@ def test_copy():
     assert config_1.outlines_painter is config_2.outlines_painter
     assert config_1.fields_override is config_2.fields_override
     assert config_1.feature_files is config_2.feature_files
+    assert config_1.outlines_cache is config_2.outlines_cache
 
 
 def test_deepcopy():
@@ -52,6 +64,17 @@ def test_deepcopy():
                 file_path=Path('test.fea'),
             ),
         ],
+        max_workers=4,
+        outlines_cache=OutlinesCache('test.db'),
+        deduplicate_bitmaps=True,
+        deduplicate_outlines=True,
+        kerning_mode=KerningMode.GLYPH_CLASSES,
+        direct_kerning=True,
+        features_cache=FeaturesCache('features.db'),
+        optimize_bitmap_index=True,
+        sort_glyphs_by_metrics=True,
+        verify_aggregate_metrics=True,
+        subroutinize_charstrings=True,
     )
     config_2 = deepcopy(config_1)
 
@@ -59,6 +82,7 @@ def test_deepcopy():
     assert config_1 is not config_2
     assert config_1.fields_override is not config_2.fields_override
     assert config_1.feature_files is not config_2.feature_files
+    assert config_1.outlines_cache is not config_2.outlines_cache
 
     for feature_file_1, feature_file_2 in zip(config_1.feature_files, config_2.feature_files):
         assert feature_file_1 is not feature_file_2
@@ -83,6 +107,17 @@ def test_eq():
                 file_path=Path('test.fea'),
             ),
         ],
+        max_workers=4,
+        outlines_cache=OutlinesCache('test.db'),
+        deduplicate_bitmaps=True,
+        deduplicate_outlines=True,
+        kerning_mode=KerningMode.GLYPH_CLASSES,
+        direct_kerning=True,
+        features_cache=FeaturesCache('features.db'),
+        optimize_bitmap_index=True,
+        sort_glyphs_by_metrics=True,
+        verify_aggregate_metrics=True,
+        subroutinize_charstrings=True,
     )
     config_2 = Config(
         px_to_units=1,
@@ -102,5 +137,16 @@ def test_eq():
                 file_path=Path('test.fea'),
             ),
         ],
+        max_workers=4,
+        outlines_cache=OutlinesCache('test.db'),
+        deduplicate_bitmaps=True,
+        deduplicate_outlines=True,
+        kerning_mode=KerningMode.GLYPH_CLASSES,
+        direct_kerning=True,
+        features_cache=FeaturesCache('features.db'),
+        optimize_bitmap_index=True,
+        sort_glyphs_by_metrics=True,
+        verify_aggregate_metrics=True,
+        subroutinize_charstrings=True,
     )
     assert config_1 == config_2
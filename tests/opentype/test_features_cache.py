@@ -0,0 +1,115 @@
+from collections.abc import Callable
+from copy import copy, deepcopy
+from io import BytesIO
+from pathlib import Path
+
+from fontTools.ttLib import TTFont
+
+from pixel_font_builder import FontBuilder, Glyph
+from pixel_font_builder.opentype import FeatureFile, FeaturesCache
+
+_FEATURE_TEXT = (
+    'languagesystem DFLT dflt;\n'
+    '\n'
+    'feature liga {\n'
+    '    substitute glyph_0 glyph_1 by glyph_2;\n'
+    '} liga;\n'
+    '\n'
+    'feature cpsp {\n'
+    '    position glyph_3 100;\n'
+    '} cpsp;\n'
+)
+
+
+def _add_glyphs(builder: FontBuilder, features_cache: FeaturesCache | None = None) -> FontBuilder:
+    builder.opentype_config.features_cache = features_cache
+    builder.opentype_config.feature_files.append(FeatureFile(_FEATURE_TEXT))
+    for index in range(4):
+        builder.glyphs.append(Glyph(name=f'glyph_{index}', advance_width=4, bitmap=[[1, 0], [0, 1]]))
+        builder.character_mapping[0x41 + index] = f'glyph_{index}'
+    builder.kerning_values[('glyph_0', 'glyph_1')] = -1
+    return builder
+
+
+def _save_otf(builder: FontBuilder) -> bytes:
+    stream = BytesIO()
+    builder.save_otf(stream)
+    return stream.getvalue()
+
+
+def test_create_key():
+    glyph_order = ['.notdef', 'a', 'b']
+    key = FeaturesCache.create_key(glyph_order, [(_FEATURE_TEXT, None)])
+    assert key == FeaturesCache.create_key(list(glyph_order), [(_FEATURE_TEXT, None)])
+    assert key != FeaturesCache.create_key(['.notdef', 'b', 'a'], [(_FEATURE_TEXT, None)])
+    assert key != FeaturesCache.create_key(glyph_order, [(_FEATURE_TEXT, 'features.fea')])
+    assert key != FeaturesCache.create_key(glyph_order, [(_FEATURE_TEXT + '\n', None)])
+    assert key != FeaturesCache.create_key(glyph_order, [(_FEATURE_TEXT, None), (_FEATURE_TEXT, None)])
+
+
+def test_memory_cache(create_builder: Callable[..., FontBuilder]):
+    data = _save_otf(_add_glyphs(create_builder()))
+    features_cache = FeaturesCache()
+    assert _save_otf(_add_glyphs(create_builder(), features_cache)) == data
+    assert len(features_cache) == 1
+    assert _save_otf(_add_glyphs(create_builder(), features_cache)) == data
+    assert len(features_cache) == 1
+
+    font = TTFont(BytesIO(data))
+    assert 'GSUB' in font
+    assert 'GPOS' in font
+    assert font['OS/2'].usMaxContext == 2
+
+
+def test_file_cache(tmp_path: Path, create_builder: Callable[..., FontBuilder]):
+    data = _save_otf(_add_glyphs(create_builder()))
+    file_path = tmp_path.joinpath('features.db')
+    assert _save_otf(_add_glyphs(create_builder(), FeaturesCache(file_path))) == data
+
+    features_cache = FeaturesCache(file_path)
+    assert len(features_cache) == 1
+    assert _save_otf(_add_glyphs(create_builder(), features_cache)) == data
+    assert len(features_cache) == 1
+
+    features_cache.clear()
+    assert len(features_cache) == 0
+
+
+def test_uncacheable_features(create_builder: Callable[..., FontBuilder]):
+    features_cache = FeaturesCache()
+    builder = _add_glyphs(create_builder(), features_cache)
+    builder.opentype_config.feature_files.append(FeatureFile('table OS/2 {\n    WeightClass 700;\n} OS/2;\n'))
+    data = _save_otf(builder)
+    assert len(features_cache) == 0
+    assert TTFont(BytesIO(data))['OS/2'].usWeightClass == 700
+
+    builder.opentype_config.features_cache = None
+    assert _save_otf(builder) == data
+
+
+def test_evict(tmp_path: Path):
+    features_cache = FeaturesCache(tmp_path.joinpath('features.db'), max_size=10)
+    features_cache.put(b'a', ({'GPOS': b'1234'}, 2))
+    features_cache.put(b'b', ({'GSUB': b'1234'}, 2))
+    assert FeaturesCache(features_cache.file_path).get(b'a') == ({'GPOS': b'1234'}, 2)
+    features_cache.put(b'c', ({'GDEF': b'1234'}, None))
+
+    features_cache = FeaturesCache(features_cache.file_path)
+    assert len(features_cache) == 2
+    assert features_cache.size == 8
+    assert features_cache.get(b'b') is None
+    assert features_cache.get(b'c') == ({'GDEF': b'1234'}, None)
+
+
+def test_copy(tmp_path: Path):
+    features_cache_1 = FeaturesCache(tmp_path.joinpath('features.db'), max_size=1024)
+    features_cache_2 = copy(features_cache_1)
+    features_cache_3 = deepcopy(features_cache_1)
+
+    assert features_cache_1 == features_cache_2
+    assert features_cache_1 == features_cache_3
+    assert features_cache_1 is not features_cache_2
+    assert features_cache_1 is not features_cache_3
+
+    features_cache_1.put(b'a', ({'GPOS': b'1234'}, 2))
+    assert features_cache_2.get(b'a') == ({'GPOS': b'1234'}, 2)
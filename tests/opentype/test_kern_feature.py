@@ -0,0 +1,144 @@
+from collections.abc import Callable
+from io import BytesIO
+
+import pytest
+from fontTools.ttLib import TTFont
+
+from pixel_font_builder import FontBuilder, Glyph
+from pixel_font_builder.opentype import KerningMode, FeatureFile
+from pixel_font_builder.opentype.feature import build_kern_feature
+
+
+def _add_glyphs(builder: FontBuilder, kerning_mode: KerningMode) -> FontBuilder:
+    builder.opentype_config.kerning_mode = kerning_mode
+    for index in range(12):
+        builder.glyphs.append(Glyph(name=f'glyph_{index}', advance_width=4, bitmap=[[1, 0], [0, 1]]))
+        builder.character_mapping[0x41 + index] = f'glyph_{index}'
+
+    # Rows of 'glyph_0' to 'glyph_3' are the same, and so are the columns of 'glyph_4' to 'glyph_7'.
+    for left_index in range(4):
+        for right_index in range(4, 8):
+            builder.kerning_values[(f'glyph_{left_index}', f'glyph_{right_index}')] = -1
+        builder.kerning_values[(f'glyph_{left_index}', 'glyph_8')] = 1
+    builder.kerning_values[('glyph_9', 'glyph_10')] = -2
+    builder.kerning_values[('glyph_11', 'glyph_0')] = 2
+    return builder
+
+
+def _load_font(builder: FontBuilder) -> TTFont:
+    stream = BytesIO()
+    builder.save_otf(stream)
+    stream.seek(0)
+    return TTFont(stream)
+
+
+def _load_kerning_values(font: TTFont) -> dict[tuple[str, str], int]:
+    kerning_values = {}
+    for lookup in font['GPOS'].table.LookupList.Lookup:
+        if lookup.LookupType != 2:
+            continue
+        for subtable in lookup.SubTable:
+            if subtable.Format == 1:
+                for left_glyph_name, pair_set in zip(subtable.Coverage.glyphs, subtable.PairSet):
+                    for record in pair_set.PairValueRecord:
+                        kerning_values.setdefault((left_glyph_name, record.SecondGlyph), record.Value1.XAdvance)
+            else:
+                left_class_defs = subtable.ClassDef1.classDefs
+                right_class_defs = subtable.ClassDef2.classDefs
+                for left_glyph_name in subtable.Coverage.glyphs:
+                    left_class = left_class_defs.get(left_glyph_name, 0)
+                    for right_glyph_name, right_class in right_class_defs.items():
+                        value = subtable.Class1Record[left_class].Class2Record[right_class].Value1
+                        if value is not None and value.XAdvance != 0:
+                            kerning_values.setdefault((left_glyph_name, right_glyph_name), value.XAdvance)
+    return kerning_values
+
+
+def test_build_kern_feature_order():
+    glyph_order = ['.notdef', 'b', 'a']
+    kerning_values = {
+        ('a', 'b'): 1,
+        ('b', 'a'): 2,
+        ('b', 'b'): 3,
+    }
+    text = build_kern_feature(glyph_order, kerning_values, 100)
+    assert text == (
+        'languagesystem DFLT dflt;\n'
+        '\n'
+        'feature kern {\n'
+        '    position b b 300;\n'
+        '    position b a 200;\n'
+        '    position a b 100;\n'
+        '} kern;\n'
+    )
+
+
+def test_build_kern_feature_classes(create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(), KerningMode.GLYPH_CLASSES)
+    glyph_order, _ = builder.prepare_glyphs()
+    text = build_kern_feature(glyph_order, builder.kerning_values, 100, KerningMode.GLYPH_CLASSES)
+
+    assert '@kern_left_0 = [glyph_0 glyph_1 glyph_2 glyph_3];\n' in text
+    assert '@kern_right_0 = [glyph_4 glyph_5 glyph_6 glyph_7];\n' in text
+    assert '    position @kern_left_0 @kern_right_0 -100;\n' in text
+    assert '    position glyph_9 glyph_10 -200;\n' in text
+
+
+@pytest.mark.parametrize('kerning_mode', list(KerningMode))
+@pytest.mark.parametrize('direct_kerning', [False, True])
+def test_kerning_values(kerning_mode: KerningMode, direct_kerning: bool, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(), kerning_mode)
+    builder.opentype_config.direct_kerning = direct_kerning
+    expected_kerning_values = {pair: offset * builder.opentype_config.px_to_units for pair, offset in builder.kerning_values.items()}
+    assert _load_kerning_values(_load_font(builder)) == expected_kerning_values
+
+
+@pytest.mark.parametrize('kerning_mode', list(KerningMode))
+def test_direct_kerning_table(kerning_mode: KerningMode, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(), kerning_mode)
+    font = _load_font(builder)
+    builder.opentype_config.direct_kerning = True
+    direct_font = _load_font(builder)
+    assert direct_font.reader['GPOS'] == font.reader['GPOS']
+    assert direct_font['OS/2'].usMaxContext == font['OS/2'].usMaxContext
+
+
+@pytest.mark.parametrize('has_kern_feature', [False, True])
+def test_direct_kerning_with_feature_files(has_kern_feature: bool, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(), KerningMode.GLYPH_CLASSES)
+    builder.opentype_config.direct_kerning = True
+    text = (
+        'languagesystem DFLT dflt;\n'
+        'languagesystem latn dflt;\n'
+        'languagesystem latn TRK;\n'
+        '\n'
+        'feature liga {\n'
+        '    substitute glyph_0 glyph_1 by glyph_2;\n'
+        '} liga;\n'
+        '\n'
+        'feature cpsp {\n'
+        '    position glyph_3 100;\n'
+        '} cpsp;\n'
+    )
+    if has_kern_feature:
+        text += (
+            '\n'
+            'feature kern {\n'
+            '    position glyph_9 glyph_11 -300;\n'
+            '} kern;\n'
+        )
+    builder.opentype_config.feature_files.append(FeatureFile(text))
+    font = _load_font(builder)
+    assert 'GSUB' in font
+
+    table = font['GPOS'].table
+    feature_tags = [feature_record.FeatureTag for feature_record in table.FeatureList.FeatureRecord]
+    assert feature_tags == sorted(feature_tags)
+    for script_record in table.ScriptList.ScriptRecord:
+        for lang_sys in [script_record.Script.DefaultLangSys, *(lang_sys_record.LangSys for lang_sys_record in script_record.Script.LangSysRecord)]:
+            assert sorted(feature_tags[feature_index] for feature_index in lang_sys.FeatureIndex) == ['cpsp', 'kern']
+
+    expected_kerning_values = {pair: offset * builder.opentype_config.px_to_units for pair, offset in builder.kerning_values.items()}
+    if has_kern_feature:
+        expected_kerning_values[('glyph_9', 'glyph_11')] = -300
+    assert _load_kerning_values(font) == expected_kerning_values
@@ -0,0 +1,106 @@
+from collections.abc import Callable
+from io import BytesIO
+
+import pytest
+from fontTools.misc.psCharStrings import T2CharString as OtfGlyph, calcSubrBias
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from pixel_font_builder import FontBuilder, Glyph
+from pixel_font_builder.opentype import OutlinesPainter, SolidOutlinesPainter, SquareDotOutlinesPainter, CircleDotOutlinesPainter
+from pixel_font_builder.opentype import subroutine
+from pixel_font_builder.opentype.subroutine import subroutinize_charstrings
+
+
+def _add_glyphs(builder: FontBuilder, outlines_painter: OutlinesPainter, subroutinize_charstrings: bool) -> FontBuilder:
+    builder.font_metric.horizontal_layout.ascent = 7
+    builder.font_metric.horizontal_layout.descent = -1
+    builder.opentype_config.outlines_painter = outlines_painter
+    builder.opentype_config.verify_aggregate_metrics = True
+    builder.opentype_config.subroutinize_charstrings = subroutinize_charstrings
+    builder.glyphs.append(Glyph(name='space', advance_width=4, advance_height=8))
+    for index in range(256):
+        builder.glyphs.append(Glyph(
+            name=f'glyph_{index}',
+            horizontal_offset=(index % 2, -1),
+            advance_width=8,
+            vertical_offset=(-3, 1),
+            advance_height=8,
+            bitmap=[[1, 1, 1, 1, 1, 1]] + [[(index >> (x + y)) & 1 for x in range(6)] for y in range(5)] + [[1, 0, 1, 0, 1, 0]],
+        ))
+        builder.character_mapping[0x4E00 + index] = f'glyph_{index}'
+    builder.character_mapping[0x20] = 'space'
+    return builder
+
+
+def _save_and_load(font: TTFont) -> TTFont:
+    stream = BytesIO()
+    font.save(stream)
+    stream.seek(0)
+    return TTFont(stream)
+
+
+def _calculate_nesting(char_string: OtfGlyph, local_subroutines: list[OtfGlyph], global_subroutines: list[OtfGlyph]) -> int:
+    char_string.decompile()
+    nesting = 0
+    for index, token in enumerate(char_string.program):
+        if token in ('callsubr', 'callgsubr'):
+            subroutines = local_subroutines if token == 'callsubr' else global_subroutines
+            subroutine = subroutines[char_string.program[index - 1] + calcSubrBias(subroutines)]
+            nesting = max(nesting, _calculate_nesting(subroutine, local_subroutines, global_subroutines) + 1)
+    return nesting
+
+
+@pytest.mark.parametrize('outlines_painter', [SolidOutlinesPainter(), SquareDotOutlinesPainter(), CircleDotOutlinesPainter()])
+def test_subroutinize_charstrings(outlines_painter: OutlinesPainter, create_builder: Callable[..., FontBuilder]):
+    font_1 = _save_and_load(_add_glyphs(create_builder(8), outlines_painter, False).to_otf_builder().font)
+    font_2 = _save_and_load(_add_glyphs(create_builder(8), outlines_painter, True).to_otf_builder().font)
+
+    cff_2 = font_2['CFF '].cff
+    local_subroutines = cff_2.topDictIndex[0].Private.Subrs
+    global_subroutines = cff_2.GlobalSubrs
+    assert len(local_subroutines) > 0
+    assert len(global_subroutines) > 0
+    assert len(font_2.reader['CFF ']) < len(font_1.reader['CFF '])
+
+    glyph_set_1 = font_1.getGlyphSet()
+    glyph_set_2 = font_2.getGlyphSet()
+    for glyph_name in font_1.getGlyphOrder():
+        pen_1 = RecordingPen()
+        glyph_set_1[glyph_name].draw(pen_1)
+        pen_2 = RecordingPen()
+        glyph_set_2[glyph_name].draw(pen_2)
+        assert pen_1.value == pen_2.value
+        assert glyph_set_1[glyph_name].width == glyph_set_2[glyph_name].width
+
+        char_string = cff_2.topDictIndex[0].CharStrings[glyph_name]
+        assert _calculate_nesting(char_string, local_subroutines, global_subroutines) <= 10
+
+
+def _calculate_max_nesting(font: TTFont) -> int:
+    cff = font['CFF '].cff
+    top_dict = cff.topDictIndex[0]
+    return max(_calculate_nesting(char_string, top_dict.Private.Subrs, cff.GlobalSubrs) for char_string in top_dict.CharStrings.values())
+
+
+def test_subroutinize_charstrings_nesting(monkeypatch: pytest.MonkeyPatch, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder(8), SquareDotOutlinesPainter(), True)
+    for glyph in builder.glyphs:
+        if glyph.name.startswith('glyph_'):
+            glyph.bitmap = [[1 if (x * x + y * 3) % 7 == 0 else 0 for x in range(16)] for y in range(16)]
+    assert _calculate_max_nesting(builder.to_otf_builder().font) > 2
+
+    monkeypatch.setattr(subroutine, '_MAX_NESTING', 2)
+    assert _calculate_max_nesting(builder.to_otf_builder().font) <= 2
+
+
+def test_subroutinize_charstrings_keep_other_charstrings(create_builder: Callable[..., FontBuilder]):
+    font = _add_glyphs(create_builder(8), SolidOutlinesPainter(), False).to_otf_builder().font
+    char_strings = font['CFF '].cff.topDictIndex[0].CharStrings
+    hinted_char_string = OtfGlyph(program=[800, 0, 100, 'hstem', 100, 100, 'rmoveto', 100, 0, 0, 100, -100, 'rlineto', 'endchar'])
+    char_strings['glyph_0'] = hinted_char_string
+    subroutinize_charstrings(font)
+
+    assert char_strings['glyph_0'] is hinted_char_string
+    assert char_strings['glyph_1'] is not hinted_char_string
+    assert char_strings['glyph_1'].bytecode is not None
@@ -0,0 +1,61 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from pixel_font_builder import FontBuilder, Glyph, GlyphBitmapLoader, LazyGlyph, pcf
+
+
+def _add_glyphs(builder: FontBuilder, packed: bool) -> FontBuilder:
+    builder.glyphs.extend([
+        Glyph(
+            name='CAP_LETTER_A',
+            advance_width=10,
+            bitmap=[
+                [0, 1, 1, 1, 1, 1, 1, 1, 1, 0],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+            ],
+        ),
+    ])
+    builder.character_mapping.update({
+        65: 'CAP_LETTER_A',
+    })
+    if packed:
+        for glyph in builder.glyphs:
+            glyph.pack_bitmap()
+    return builder
+
+
+@pytest.mark.parametrize('packed', [False, True])
+def test_save_font(create_builder: Callable[..., FontBuilder], packed: bool, tmp_path: Path):
+    builder = _add_glyphs(create_builder(), packed)
+    file_path = tmp_path.joinpath('font.pcf')
+    pcf.save_font(builder, file_path)
+
+    assert all(glyph.is_packed == packed for glyph in builder.glyphs)
+    expected_file_path = tmp_path.joinpath('expected.pcf')
+    _add_glyphs(create_builder(), False).to_pcf_builder().save(expected_file_path)
+    assert file_path.read_bytes() == expected_file_path.read_bytes()
+
+
+def test_save_font_lazy_glyphs(tmp_path: Path, create_builder: Callable[..., FontBuilder]):
+    source_builder = _add_glyphs(create_builder(), False)
+    name_to_bitmap = {glyph.name: glyph.bitmap for glyph in source_builder.glyphs}
+    loaded_names = []
+
+    def load_bitmap(source_name: str) -> list[list[int]]:
+        loaded_names.append(source_name)
+        return name_to_bitmap[source_name]
+
+    builder = _add_glyphs(create_builder(), False)
+    loader = GlyphBitmapLoader(load_bitmap, cache_size=1)
+    builder.glyphs = [LazyGlyph(glyph.name, loader, glyph.horizontal_offset, glyph.advance_width) for glyph in builder.glyphs]
+    file_path = tmp_path.joinpath('font.pcf')
+    pcf.save_font(builder, file_path)
+
+    expected_file_path = tmp_path.joinpath('expected.pcf')
+    source_builder.to_pcf_builder().save(expected_file_path)
+    assert file_path.read_bytes() == expected_file_path.read_bytes()
+    assert set(loaded_names) == set(name_to_bitmap)
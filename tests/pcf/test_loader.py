@@ -0,0 +1,58 @@
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from pixel_font_builder import FontBuilder, Glyph, pcf
+
+
+def _add_glyphs(builder: FontBuilder) -> FontBuilder:
+    # The vertical metrics are not saved.
+    builder.glyphs[0].advance_height = 0
+    builder.glyphs.extend([
+        Glyph(
+            name='CAP_LETTER_A',
+            horizontal_offset=(1, -1),
+            advance_width=12,
+            bitmap=[
+                [0, 1, 1, 1, 1, 1, 1, 1, 1, 0],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+                [1, 1, 1, 1, 1, 1, 1, 1, 1, 1],
+                [1, 0, 0, 0, 0, 0, 0, 0, 0, 1],
+            ],
+        ),
+        Glyph(
+            name='space',
+            advance_width=3,
+        ),
+    ])
+    builder.character_mapping.update({
+        32: 'space',
+        65: 'CAP_LETTER_A',
+        97: 'CAP_LETTER_A',
+    })
+    return builder
+
+
+@pytest.mark.parametrize('ms_byte_first, ms_bit_first, glyph_pad, scan_unit', [
+    (True, True, 1, 1),
+    (False, False, 4, 1),
+    (True, False, 4, 2),
+    (False, True, 4, 4),
+])
+def test_load_glyphs(create_builder: Callable[..., FontBuilder], ms_byte_first: bool, ms_bit_first: bool, glyph_pad: int, scan_unit: int, tmp_path: Path):
+    builder = _add_glyphs(create_builder())
+    builder.pcf_config.ms_byte_first = ms_byte_first
+    builder.pcf_config.ms_bit_first = ms_bit_first
+    builder.pcf_config.glyph_pad = glyph_pad
+    builder.pcf_config.scan_unit = scan_unit
+    file_path = tmp_path.joinpath('font.pcf')
+    builder.save_pcf(file_path)
+
+    glyphs, character_mapping = pcf.load_glyphs(file_path)
+    assert character_mapping == builder.character_mapping
+    name_to_glyph = {glyph.name: glyph for glyph in glyphs}
+    assert name_to_glyph.keys() == {'.notdef', 'CAP_LETTER_A', 'space'}
+    for glyph in builder.glyphs:
+        assert name_to_glyph[glyph.name] == glyph
+        assert name_to_glyph[glyph.name].is_packed
@@ -1,6 +1,30 @@
+from collections.abc import Callable
 from copy import copy, deepcopy
+from pathlib import Path
 
-from pixel_font_builder import FontBuilder, Glyph
+import pytest
+import fontTools.fontBuilder
+from fontTools.ttLib.tables import _h_e_a_d
+
+from pixel_font_builder import FontFormat, FontBuilder, Glyph, PackedBitmap, opentype
+
+
+def _add_glyphs(builder: FontBuilder) -> FontBuilder:
+    builder.glyphs.append(Glyph(
+        name='CAP_LETTER_A',
+        advance_width=4,
+        advance_height=4,
+        bitmap=[
+            [0, 1, 1, 0],
+            [1, 0, 0, 1],
+            [1, 1, 1, 1],
+            [1, 0, 0, 1],
+        ],
+    ))
+    builder.character_mapping.update({
+        65: 'CAP_LETTER_A',
+    })
+    return builder
 
 
 def test_prepare_glyphs():
@@ -140,3 +164,101 @@ def test_eq():
     })
 
     assert builder_1 == builder_2
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_save_all(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, max_workers: int, create_builder: Callable[..., FontBuilder]):
+    monkeypatch.setattr(fontTools.fontBuilder, 'timestampNow', lambda: 0)
+    monkeypatch.setattr(_h_e_a_d, 'timestampNow', lambda: 0)
+    builder = _add_glyphs(create_builder())
+
+    single_dir = tmp_path.joinpath('single')
+    single_dir.mkdir()
+    builder.save_otf(single_dir.joinpath('test.otf'))
+    builder.save_otf_woff(single_dir.joinpath('test.otf.woff'))
+    builder.save_otf_woff2(single_dir.joinpath('test.otf.woff2'))
+    builder.save_ttf(single_dir.joinpath('test.ttf'))
+    builder.save_ttf_woff(single_dir.joinpath('test.ttf.woff'))
+    builder.save_ttf_woff2(single_dir.joinpath('test.ttf.woff2'))
+    builder.save_ms_bitmap_ttf(single_dir.joinpath('test.ms.bitmap.ttf'))
+    builder.save_otb(single_dir.joinpath('test.otb'))
+    builder.save_dfont(single_dir.joinpath('test.dfont'))
+    builder.save_bdf(single_dir.joinpath('test.bdf'))
+    builder.save_pcf(single_dir.joinpath('test.pcf'))
+
+    all_dir = tmp_path.joinpath('all')
+    all_dir.mkdir()
+    builder.save_all(FontFormat, all_dir, 'test', max_workers)
+
+    for font_format in FontFormat:
+        file_name = f'test.{font_format}'
+        assert all_dir.joinpath(file_name).read_bytes() == single_dir.joinpath(file_name).read_bytes()
+
+
+@pytest.mark.parametrize('is_ttf', [False, True])
+def test_compile_flavors(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, is_ttf: bool, create_builder: Callable[..., FontBuilder]):
+    monkeypatch.setattr(fontTools.fontBuilder, 'timestampNow', lambda: 0)
+    monkeypatch.setattr(_h_e_a_d, 'timestampNow', lambda: 0)
+    builder = _add_glyphs(create_builder())
+    kind = 'ttf' if is_ttf else 'otf'
+
+    flavor_to_data = getattr(builder, f'compile_{kind}_flavors')([opentype.Flavor.WOFF2, None, opentype.Flavor.WOFF, None])
+    assert list(flavor_to_data) == [opentype.Flavor.WOFF2, None, opentype.Flavor.WOFF]
+
+    for flavor, data in flavor_to_data.items():
+        file_path = tmp_path.joinpath(f'test.{kind}.{flavor}')
+        getattr(builder, f'save_{kind}')(file_path, flavor=flavor)
+        assert data == file_path.read_bytes()
+
+
+def test_save_all_max_workers(tmp_path: Path, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder())
+    with pytest.raises(ValueError):
+        builder.save_all([FontFormat.OTF], tmp_path, 'test', 0)
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_add_lazy_glyphs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, max_workers: int, create_builder: Callable[..., FontBuilder]):
+    monkeypatch.setattr(fontTools.fontBuilder, 'timestampNow', lambda: 0)
+    monkeypatch.setattr(_h_e_a_d, 'timestampNow', lambda: 0)
+    builder = _add_glyphs(create_builder())
+
+    lazy_builder = _add_glyphs(create_builder())
+    lazy_builder.glyphs.clear()
+    name_to_bitmap = {glyph.name: glyph.bitmap for glyph in builder.glyphs}
+    glyphs = lazy_builder.add_lazy_glyphs([(glyph.name, {
+        'horizontal_offset': glyph.horizontal_offset,
+        'advance_width': glyph.advance_width,
+        'vertical_offset': glyph.vertical_offset,
+        'advance_height': glyph.advance_height,
+    }) for glyph in builder.glyphs], name_to_bitmap.__getitem__, cache_size=1)
+    assert glyphs == builder.glyphs
+    assert lazy_builder == builder
+
+    eager_dir = tmp_path.joinpath('eager')
+    eager_dir.mkdir()
+    builder.save_all(FontFormat, eager_dir, 'test')
+
+    lazy_dir = tmp_path.joinpath('lazy')
+    lazy_dir.mkdir()
+    lazy_builder.save_all(FontFormat, lazy_dir, 'test', max_workers)
+
+    for font_format in FontFormat:
+        file_name = f'test.{font_format}'
+        assert lazy_dir.joinpath(file_name).read_bytes() == eager_dir.joinpath(file_name).read_bytes()
+
+
+def test_save_all_packs_glyphs_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, create_builder: Callable[..., FontBuilder]):
+    builder = _add_glyphs(create_builder())
+    from_bitmap = PackedBitmap.from_bitmap
+    packed_glyphs_count = 0
+
+    def count_from_bitmap(bitmap: list[list[int]]) -> PackedBitmap:
+        nonlocal packed_glyphs_count
+        packed_glyphs_count += 1
+        return from_bitmap(bitmap)
+
+    monkeypatch.setattr(PackedBitmap, 'from_bitmap', count_from_bitmap)
+    builder.save_all([FontFormat.TTF, FontFormat.OTF, FontFormat.OTB], tmp_path, 'test')
+    assert packed_glyphs_count == len(builder.glyphs)
+    assert not any(glyph.is_packed for glyph in builder.glyphs)
@@ -1,6 +1,32 @@
+from collections.abc import Callable
 from copy import copy, deepcopy
+from pathlib import Path
 
-from pixel_font_builder import FontBuilder, FontCollectionBuilder
+import fontTools.fontBuilder
+import pytest
+from fontTools.pens.recordingPen import DecomposingRecordingPen
+from fontTools.ttLib import TTCollection, TTFont
+from fontTools.ttLib.tables import _h_e_a_d
+
+from pixel_font_builder import FontBuilder, FontCollectionBuilder, Glyph
+
+
+def _add_glyphs(builder: FontBuilder, family_name_suffix: str, advance_width: int) -> FontBuilder:
+    builder.meta_info.family_name = f'Test {family_name_suffix}'
+    builder.glyphs[0].advance_width = advance_width
+    builder.glyphs.append(Glyph(name='CAP_LETTER_A', advance_width=advance_width, bitmap=[[0, 1], [1, 1]]))
+    builder.character_mapping[65] = 'CAP_LETTER_A'
+    return builder
+
+
+def _load_glyphs(font: TTFont) -> dict[int, tuple[list, tuple[int, int]]]:
+    glyph_set = font.getGlyphSet()
+    glyphs = {}
+    for code_point, glyph_name in font.getBestCmap().items():
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        glyphs[code_point] = pen.value, font['hmtx'][glyph_name]
+    return glyphs
 
 
 def test_copy():
@@ -41,3 +67,64 @@ def test_eq():
         FontBuilder(),
     ])
     assert collection_builder_1 == collection_builder_2
+
+
+@pytest.mark.parametrize('font_format', ['otc', 'ttc'])
+def test_save_max_workers(tmp_path: Path, monkeypatch: pytest.MonkeyPatch, font_format: str, create_builder: Callable[..., FontBuilder]):
+    monkeypatch.setattr(fontTools.fontBuilder, 'timestampNow', lambda: 0)
+    monkeypatch.setattr(_h_e_a_d, 'timestampNow', lambda: 0)
+    collection_builder = FontCollectionBuilder([
+        _add_glyphs(create_builder(), 'Regular', 4),
+        _add_glyphs(create_builder(), 'Wide', 5),
+        _add_glyphs(create_builder(), 'Wider', 6),
+    ])
+
+    file_path_1 = tmp_path.joinpath(f'test-1.{font_format}')
+    file_path_2 = tmp_path.joinpath(f'test-2.{font_format}')
+    getattr(collection_builder, f'save_{font_format}')(file_path_1)
+    getattr(collection_builder, f'save_{font_format}')(file_path_2, max_workers=2)
+    assert file_path_1.read_bytes() == file_path_2.read_bytes()
+
+    with pytest.raises(ValueError):
+        getattr(collection_builder, f'save_{font_format}')(file_path_2, max_workers=0)
+
+
+@pytest.mark.parametrize('font_format', ['otc', 'ttc'])
+def test_share_glyphs(tmp_path: Path, font_format: str, create_builder: Callable[..., FontBuilder]):
+    builder_1 = _add_glyphs(create_builder(), 'Regular', 4)
+    builder_2 = _add_glyphs(create_builder(), 'Wide', 5)
+    builder_3 = _add_glyphs(create_builder(), 'Bold', 4)
+    builder_3.glyphs[1].bitmap = [[1, 1], [1, 1]]
+    builder_3.glyphs.append(Glyph(name='CAP_LETTER_B', advance_width=4, bitmap=[[1, 0], [1, 1]]))
+    builder_3.character_mapping[66] = 'CAP_LETTER_B'
+    if font_format == 'otc':
+        # CFF charstrings contain the advance widths, so the '.notdef' glyphs must have the same one to be shared.
+        builder_2.glyphs[0].advance_width = 4
+    collection_builder = FontCollectionBuilder([builder_1, builder_2, builder_3])
+
+    file_path_1 = tmp_path.joinpath(f'test-1.{font_format}')
+    file_path_2 = tmp_path.joinpath(f'test-2.{font_format}')
+    getattr(collection_builder, f'save_{font_format}')(file_path_1)
+    getattr(collection_builder, f'save_{font_format}')(file_path_2, share_glyphs=True)
+    fonts_1 = TTCollection(file_path_1).fonts
+    fonts_2 = TTCollection(file_path_2).fonts
+
+    for font_1, font_2 in zip(fonts_1, fonts_2):
+        assert _load_glyphs(font_1) == _load_glyphs(font_2)
+        assert font_1['hmtx']['.notdef'] == font_2['hmtx']['.notdef']
+        assert font_2.getGlyphOrder() == fonts_2[0].getGlyphOrder()
+    if font_format == 'ttc':
+        assert len({font.reader.tables['glyf'].offset for font in fonts_2}) == 1
+    else:
+        # CFF charstrings contain the advance widths.
+        assert fonts_2[0].reader.tables['CFF '].offset == fonts_2[2].reader.tables['CFF '].offset
+    assert file_path_2.stat().st_size < file_path_1.stat().st_size
+
+
+def test_share_glyphs_notdef(tmp_path: Path, create_builder: Callable[..., FontBuilder]):
+    collection_builder = FontCollectionBuilder([
+        _add_glyphs(create_builder(), 'Regular', 4),
+        _add_glyphs(create_builder(), 'Wide', 5),
+    ])
+    with pytest.raises(ValueError):
+        collection_builder.save_otc(tmp_path.joinpath('test.otc'), share_glyphs=True)
@@ -1,6 +1,17 @@
+import pickle
 from copy import copy, deepcopy
 
-from pixel_font_builder import Glyph
+from pixel_font_builder import PackedBitmap, Glyph, GlyphBitmapLoader, LazyGlyph
+
+_LAZY_BITMAPS = {
+    'a': [[1, 0, 0], [0, 1, 0]],
+    'b': [[0, 1, 0], [0, 1, 1]],
+    'c': [[0, 0, 1], [1, 1, 1]],
+}
+
+
+def _load_lazy_bitmap(name: str) -> list[list[int]]:
+    return _LAZY_BITMAPS[name]
 
 
 def test_glyph_1():
@@ -75,6 +86,32 @@ def test_glyph_3():
     assert glyph.calculate_bitmap_right_padding() == 2
     assert glyph.calculate_bitmap_top_padding() == 4
     assert glyph.calculate_bitmap_bottom_padding() == 4
+    assert glyph.ink_bbox is None
+
+
+def test_ink_bbox():
+    glyph = Glyph(
+        name='test',
+        bitmap=PackedBitmap.from_bitmap([
+            [0, 0, 0, 0, 0],
+            [0, 0, 1, 0, 0],
+            [0, 1, 0, 0, 0],
+            [0, 0, 0, 0, 0],
+        ]),
+    )
+    assert glyph.ink_bbox == (1, 1, 3, 3)
+    assert glyph.calculate_bitmap_right_padding() == 2
+    assert glyph.calculate_bitmap_bottom_padding() == 1
+
+    # The cached box is dropped with the packed bitmap.
+    glyph.packed_bitmap = PackedBitmap.from_bitmap([[0, 0, 0, 0, 1]])
+    assert glyph.ink_bbox == (4, 0, 5, 1)
+    glyph.bitmap[0][0] = 1
+    assert glyph.ink_bbox == (0, 0, 5, 1)
+    glyph.bitmap[0][4] = 0
+    assert glyph.ink_bbox == (0, 0, 1, 1)
+    glyph.bitmap = [[0], [1], [0]]
+    assert glyph.ink_bbox == (0, 1, 1, 2)
 
 
 def test_copy():
@@ -130,3 +167,113 @@ def test_eq():
         bitmap=[[1, 0, 0, 1]],
     )
     assert glyph_1 == glyph_2
+
+
+def test_packed_bitmap():
+    bitmap = [
+        [0, 0, 0, 0, 0, 0, 0],
+        [0, 0, 1, 0, 1, 0, 0],
+        [0, 1, 1, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0],
+    ]
+    glyph = Glyph(
+        name='test',
+        bitmap=PackedBitmap.from_bitmap(bitmap),
+    )
+    assert glyph.is_packed
+    assert glyph.dimensions == (7, 4)
+    assert glyph.calculate_bitmap_left_padding() == 1
+    assert glyph.calculate_bitmap_right_padding() == 2
+    assert glyph.calculate_bitmap_top_padding() == 1
+    assert glyph.calculate_bitmap_bottom_padding() == 1
+    assert glyph == Glyph(name='test', bitmap=bitmap)
+
+    assert glyph.bitmap == bitmap
+    assert not glyph.is_packed
+    glyph.bitmap[3][6] = 1
+    assert glyph.calculate_bitmap_right_padding() == 0
+
+    glyph.pack_bitmap()
+    assert glyph.is_packed
+    assert glyph.packed_bitmap.row_values() == [0, 0b_0010100, 0b_0110000, 0b_0000001]
+
+
+def test_packed_bitmap_copy():
+    glyph_1 = Glyph(
+        name='test',
+        bitmap=PackedBitmap.from_bitmap([[1, 0, 0, 1]]),
+    )
+    glyph_2 = copy(glyph_1)
+    glyph_3 = deepcopy(glyph_1)
+
+    assert glyph_1 == glyph_2
+    assert glyph_1 == glyph_3
+    assert glyph_1.packed_bitmap is glyph_2.packed_bitmap
+    assert glyph_1.packed_bitmap is glyph_3.packed_bitmap
+
+
+def test_lazy_glyph():
+    loaded_names = []
+
+    def load_function(name: str) -> list[list[int]]:
+        loaded_names.append(name)
+        return _LAZY_BITMAPS[name]
+
+    loader = GlyphBitmapLoader(load_function, cache_size=2)
+    glyph_a = LazyGlyph('a', loader, advance_width=3, dimensions=(3, 2))
+    glyph_b = LazyGlyph('b', loader, advance_width=3)
+    glyph_c = LazyGlyph('c', loader, advance_width=3)
+
+    assert glyph_a.dimensions == (3, 2)
+    assert loaded_names == []
+
+    assert glyph_a.is_packed
+    assert not glyph_a.is_loaded
+    assert glyph_a.bitmap == _LAZY_BITMAPS['a']
+    assert glyph_a.calculate_bitmap_left_padding() == 0
+    assert glyph_a.calculate_bitmap_right_padding() == 1
+    assert glyph_b.dimensions == (3, 2)
+    assert glyph_c == Glyph('c', advance_width=3, bitmap=_LAZY_BITMAPS['c'])
+    assert loaded_names == ['a', 'b', 'c']
+
+    # Only the two most recent bitmaps are kept.
+    assert glyph_a.packed_bitmap == PackedBitmap.from_bitmap(_LAZY_BITMAPS['a'])
+    assert glyph_c.packed_bitmap == PackedBitmap.from_bitmap(_LAZY_BITMAPS['c'])
+    assert loaded_names == ['a', 'b', 'c', 'a']
+
+    glyph_a.bitmap[0][0] = 0
+    assert glyph_a.bitmap == _LAZY_BITMAPS['a']
+
+    glyph_a.bitmap = [[1]]
+    assert glyph_a.is_loaded
+    assert glyph_a.dimensions == (1, 1)
+    assert glyph_a.bitmap == [[1]]
+
+
+def test_lazy_glyph_copy():
+    loader = GlyphBitmapLoader(_load_lazy_bitmap)
+    glyph_1 = LazyGlyph('test', loader, horizontal_offset=(1, 2), advance_width=3, source_name='b')
+    glyph_2 = copy(glyph_1)
+    glyph_3 = deepcopy(glyph_1)
+    glyph_4 = pickle.loads(pickle.dumps(glyph_1))
+
+    for glyph in (glyph_2, glyph_3, glyph_4):
+        assert isinstance(glyph, LazyGlyph)
+        assert not glyph.is_loaded
+        assert glyph == glyph_1
+    assert glyph_4.packed_bitmap == PackedBitmap.from_bitmap(_LAZY_BITMAPS['b'])
+
+
+def test_lazy_glyph_source_change():
+    bitmaps = {'a': [[0, 0, 1], [0, 0, 1]]}
+    loader = GlyphBitmapLoader(bitmaps.__getitem__)
+    glyph = LazyGlyph('a', loader, advance_width=3)
+    assert glyph.ink_bbox == (2, 0, 3, 2)
+    assert glyph.dimensions == (3, 2)
+
+    bitmaps['a'] = [[1, 0, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]]
+    loader.clear()
+    assert glyph.ink_bbox == (0, 0, 1, 1)
+    assert glyph.calculate_bitmap_left_padding() == 0
+    assert glyph.calculate_bitmap_bottom_padding() == 2
+    assert glyph.dimensions == (4, 3)
@@ -0,0 +1,63 @@
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from pixel_font_builder import FontBuilder, Glyph, Instrumentation, StageRecord
+
+
+def test_stage():
+    callback_records = []
+    instrumentation = Instrumentation(callback_records.append)
+    with instrumentation.stage('outer'):
+        with instrumentation.stage('inner', 10):
+            pass
+
+    assert [record.name for record in instrumentation.records] == ['inner', 'outer']
+    assert [record.depth for record in instrumentation.records] == [1, 0]
+    assert [record.glyph_count for record in instrumentation.records] == [10, None]
+    assert all(record.peak_memory is None for record in instrumentation.records)
+    assert instrumentation.records[1].seconds >= instrumentation.records[0].seconds
+    assert callback_records == instrumentation.records
+
+
+def test_trace_memory():
+    instrumentation = Instrumentation(trace_memory=True)
+    with instrumentation.stage('outer'):
+        with instrumentation.stage('inner'):
+            data = bytearray(1024 * 1024)
+            del data
+        with instrumentation.stage('small'):
+            pass
+
+    records: dict[str, StageRecord] = {record.name: record for record in instrumentation.records}
+    assert records['inner'].peak_memory >= 1024 * 1024
+    assert records['small'].peak_memory < 1024 * 1024
+    assert records['outer'].peak_memory >= 1024 * 1024
+    assert not tracemalloc.is_tracing()
+
+
+def test_font_builder(tmp_path: Path, create_builder: Callable[..., FontBuilder]):
+    builder = create_builder()
+    builder.glyphs.append(Glyph(name='CAP_LETTER_A', advance_width=4, advance_height=4, bitmap=[[0, 1, 1, 0], [1, 0, 0, 1], [1, 1, 1, 1], [1, 0, 0, 1]]))
+    builder.character_mapping[65] = 'CAP_LETTER_A'
+    builder.kerning_values[('CAP_LETTER_A', 'CAP_LETTER_A')] = -1
+    builder.instrumentation = Instrumentation()
+
+    builder.save_ttf(tmp_path.joinpath('font.ttf'))
+    stage_names = [record.name for record in builder.instrumentation.records]
+    for stage_name in ['opentype.prepare_glyphs', 'opentype.outlines', 'opentype.setup_glyf', 'opentype.aggregate_metrics', 'opentype.kern_feature', 'save']:
+        assert stage_name in stage_names
+    assert next(record for record in builder.instrumentation.records if record.name == 'opentype.outlines').glyph_count == 2
+
+    builder.instrumentation.clear()
+    builder.save_bdf(tmp_path.joinpath('font.bdf'))
+    builder.save_pcf(tmp_path.joinpath('font.pcf'))
+    assert [record.name for record in builder.instrumentation.records] == [
+        'bdf.prepare_glyphs',
+        'bdf.dump_glyphs',
+        'save',
+        'pcf.prepare_glyphs',
+        'pcf.glyphs',
+        'pcf.save',
+        'save',
+    ]
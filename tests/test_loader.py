@@ -0,0 +1,157 @@
+import struct
+import zlib
+from pathlib import Path
+
+import pytest
+
+from pixel_font_builder import FontBuilder, loader
+from pixel_font_builder.metric import FontMetric
+
+
+def _create_font_metric() -> FontMetric:
+    font_metric = FontMetric()
+    font_metric.font_size = 4
+    font_metric.horizontal_layout.ascent = 4
+    font_metric.vertical_layout.ascent = 2
+    font_metric.vertical_layout.descent = -2
+    return font_metric
+
+
+def _filter_png_row(filter_type: int, row: bytes, previous_row: bytes, bpp: int) -> bytes:
+    result = bytearray()
+    for i, value in enumerate(row):
+        left = row[i - bpp] if i >= bpp else 0
+        up = previous_row[i]
+        up_left = previous_row[i - bpp] if i >= bpp else 0
+        match filter_type:
+            case 0:
+                predictor = 0
+            case 1:
+                predictor = left
+            case 2:
+                predictor = up
+            case 3:
+                predictor = (left + up) >> 1
+            case _:
+                p = left + up - up_left
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                predictor = left if pa <= pb and pa <= pc else up if pb <= pc else up_left
+        result.append((value - predictor) & 0xFF)
+    return bytes(result)
+
+
+def _create_png(width: int, height: int, bit_depth: int, color_type: int, rows: list[bytes], bpp: int, chunks: list[tuple[bytes, bytes]] = ()) -> bytes:
+    image_data = bytearray()
+    previous_row = bytes(len(rows[0]))
+    for y, row in enumerate(rows):
+        filter_type = y % 5
+        image_data.append(filter_type)
+        image_data.extend(_filter_png_row(filter_type, row, previous_row, bpp))
+        previous_row = row
+
+    data = bytearray(b'\x89PNG\r\n\x1a\n')
+    for chunk_type, chunk_data in [(b'IHDR', struct.pack('>IIBBBBB', width, height, bit_depth, color_type, 0, 0, 0)), *chunks, (b'IDAT', zlib.compress(bytes(image_data))), (b'IEND', b'')]:
+        data.extend(struct.pack('>I', len(chunk_data)))
+        data.extend(chunk_type)
+        data.extend(chunk_data)
+        data.extend(struct.pack('>I', zlib.crc32(chunk_type + chunk_data)))
+    return bytes(data)
+
+
+_SPRITE_SHEET_BITMAP = [
+    [1, 1, 1, 0, 0, 1],
+    [1, 0, 1, 0, 1, 0],
+    [1, 1, 1, 1, 1, 1],
+    [0, 0, 0, 0, 0, 0],
+    [0, 1, 0, 1, 1, 0],
+    [1, 0, 1, 0, 0, 1],
+]
+
+
+def _create_sprite_sheet_pngs() -> list[bytes]:
+    gray_rows = [bytes(0 if pixel else 255 for pixel in bitmap_row) for bitmap_row in _SPRITE_SHEET_BITMAP]
+    # Ink is opaque, the white pixels in the first column are transparent.
+    rgba_rows = [b''.join(bytes((10, 20, 30, 255)) if pixel else bytes((255, 255, 255, 0 if x == 0 else 255)) for x, pixel in enumerate(bitmap_row)) for bitmap_row in _SPRITE_SHEET_BITMAP]
+    palette_rows = [int(''.join('1' if pixel else '0' for pixel in bitmap_row) + '00', 2).to_bytes(1, 'big') for bitmap_row in _SPRITE_SHEET_BITMAP]
+    return [
+        _create_png(6, 6, 8, 0, gray_rows, 1),
+        _create_png(6, 6, 8, 6, rgba_rows, 4),
+        _create_png(6, 6, 1, 3, palette_rows, 1, [(b'PLTE', bytes((255, 255, 255, 0, 0, 0)))]),
+        _create_png(6, 6, 1, 0, [bytes([~row[0] & 0xFF]) for row in palette_rows], 1),
+    ]
+
+
+def test_load_glyph_files(tmp_path: Path):
+    tmp_path.joinpath('notdef.txt').write_text('####\n##..\n####\n')
+    tmp_path.joinpath('0041.txt').write_text('..####..\n##....##\n########\n')
+    tmp_path.joinpath('readme.md').write_text('# Glyphs\n')
+    font_metric = _create_font_metric()
+
+    glyphs, character_mapping = loader.load_glyph_files(tmp_path, font_metric)
+    assert character_mapping == {0x41: 'u0041'}
+    assert [glyph.name for glyph in glyphs] == ['.notdef', 'u0041']
+    assert glyphs[0].bitmap == [
+        [1, 1],
+        [1, 0],
+        [1, 1],
+    ]
+    assert glyphs[1].bitmap == [
+        [0, 1, 1, 0],
+        [1, 0, 0, 1],
+        [1, 1, 1, 1],
+    ]
+    assert glyphs[1].horizontal_offset == (0, 0)
+    assert glyphs[1].advance_width == 4
+    assert glyphs[1].vertical_offset == (-2, 0)
+    assert glyphs[1].advance_height == 4
+
+    parallel_glyphs, parallel_character_mapping = loader.load_glyph_files(tmp_path, font_metric, max_workers=2)
+    assert parallel_glyphs == glyphs
+    assert parallel_character_mapping == character_mapping
+
+
+def test_load_glyph_files_illegal_pixels(tmp_path: Path):
+    tmp_path.joinpath('notdef.txt').write_text('##\n#x\n')
+    with pytest.raises(ValueError):
+        loader.load_glyph_files(tmp_path, _create_font_metric())
+
+
+@pytest.mark.parametrize('index', range(4))
+def test_load_sprite_sheet(index: int, tmp_path: Path):
+    file_path = tmp_path.joinpath('sheet.png')
+    file_path.write_bytes(_create_sprite_sheet_pngs()[index])
+
+    glyphs, character_mapping = loader.load_sprite_sheet(file_path, (3, 3), [-1, None, 0x41, 0x42], _create_font_metric())
+    assert character_mapping == {0x41: 'u0041', 0x42: 'u0042'}
+    assert [glyph.name for glyph in glyphs] == ['.notdef', 'u0041', 'u0042']
+    assert all(glyph.is_packed for glyph in glyphs)
+    assert glyphs[0].bitmap == [
+        [1, 1, 1],
+        [1, 0, 1],
+        [1, 1, 1],
+    ]
+    assert glyphs[1].bitmap == [
+        [0, 0, 0],
+        [0, 1, 0],
+        [1, 0, 1],
+    ]
+    assert glyphs[2].bitmap == [
+        [0, 0, 0],
+        [1, 1, 0],
+        [0, 0, 1],
+    ]
+
+    with pytest.raises(ValueError):
+        loader.load_sprite_sheet(file_path, (3, 3), range(5), _create_font_metric())
+
+
+def test_add_sprite_sheet_glyphs(tmp_path: Path):
+    file_path = tmp_path.joinpath('sheet.png')
+    file_path.write_bytes(_create_sprite_sheet_pngs()[0])
+
+    builder = FontBuilder()
+    builder.font_metric = _create_font_metric()
+    glyphs = builder.add_sprite_sheet_glyphs(file_path, (3, 3), [-1, None, 0x41])
+    assert builder.glyphs == glyphs
+    assert builder.character_mapping == {0x41: 'u0041'}
+    builder.prepare_glyphs()
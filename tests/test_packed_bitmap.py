@@ -0,0 +1,84 @@
+from copy import copy, deepcopy
+
+import pytest
+
+from pixel_font_builder import PackedBitmap
+
+
+def test_from_bitmap():
+    packed_bitmap = PackedBitmap.from_bitmap([
+        [0, 0, 1, 0, 1, 0, 0, 0, 1],
+        [1, 1, 1, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ])
+    assert packed_bitmap.width == 9
+    assert packed_bitmap.height == 3
+    assert packed_bitmap.dimensions == (9, 3)
+    assert packed_bitmap.stride == 2
+    assert packed_bitmap.data == bytes([0b_00101000, 0b_10000000, 0b_11100000, 0, 0, 0])
+    assert packed_bitmap.row_values() == [0b_001010001, 0b_111000000, 0]
+    assert packed_bitmap.row_value(1) == 0b_111000000
+    assert packed_bitmap.to_bitmap_row(0) == [0, 0, 1, 0, 1, 0, 0, 0, 1]
+    assert bytes(packed_bitmap.row(1)) == bytes([0b_11100000, 0])
+    assert [bytes(row) for row in packed_bitmap.rows()] == [bytes([0b_00101000, 0b_10000000]), bytes([0b_11100000, 0]), bytes([0, 0])]
+    assert packed_bitmap.to_bitmap() == [
+        [0, 0, 1, 0, 1, 0, 0, 0, 1],
+        [1, 1, 1, 0, 0, 0, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 0, 0, 0],
+    ]
+
+
+def test_from_bitmap_empty():
+    packed_bitmap = PackedBitmap.from_bitmap([])
+    assert packed_bitmap.dimensions == (0, 0)
+    assert packed_bitmap.data == b''
+    assert packed_bitmap.to_bitmap() == []
+
+    packed_bitmap = PackedBitmap.from_bitmap([[], []])
+    assert packed_bitmap.dimensions == (0, 2)
+    assert packed_bitmap.row_values() == [0, 0]
+    assert packed_bitmap.to_bitmap() == [[], []]
+
+
+def test_from_bitmap_ragged():
+    with pytest.raises(ValueError):
+        PackedBitmap.from_bitmap([[1, 0], [1]])
+
+
+def test_from_row_values():
+    packed_bitmap = PackedBitmap.from_row_values(3, [0b_101, 0b_010])
+    assert packed_bitmap.data == bytes([0b_10100000, 0b_01000000])
+    assert packed_bitmap.to_bitmap() == [[1, 0, 1], [0, 1, 0]]
+
+    with pytest.raises(ValueError):
+        PackedBitmap.from_row_values(3, [0b_1000])
+
+
+def test_stride():
+    packed_bitmap = PackedBitmap(3, 2, bytes([0b_10100000, 0xFF, 0b_01000000, 0xFF]), 2)
+    assert packed_bitmap.row_values() == [0b_101, 0b_010]
+    assert packed_bitmap.row_value(1) == 0b_010
+    assert packed_bitmap == PackedBitmap.from_row_values(3, [0b_101, 0b_010])
+    assert hash(packed_bitmap) == hash(PackedBitmap.from_row_values(3, [0b_101, 0b_010]))
+
+    with pytest.raises(ValueError):
+        PackedBitmap(3, 2, bytes([0, 0, 0]))
+    with pytest.raises(ValueError):
+        PackedBitmap(9, 1, bytes([0]), 1)
+
+
+def test_copy():
+    packed_bitmap_1 = PackedBitmap.from_bitmap([[1, 0, 0, 1]])
+    packed_bitmap_2 = copy(packed_bitmap_1)
+    packed_bitmap_3 = deepcopy(packed_bitmap_1)
+
+    assert packed_bitmap_1 == packed_bitmap_2
+    assert packed_bitmap_1 == packed_bitmap_3
+    assert packed_bitmap_1 is packed_bitmap_2
+    assert packed_bitmap_1 is packed_bitmap_3
+
+
+def test_eq():
+    packed_bitmap_1 = PackedBitmap.from_bitmap([[1, 0, 0, 1]])
+    packed_bitmap_2 = PackedBitmap.from_bitmap([[1, 0, 0, 1]])
+    assert packed_bitmap_1 == packed_bitmap_2